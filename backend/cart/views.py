@@ -1,6 +1,7 @@
 from django.shortcuts import redirect, render, get_object_or_404
 from catalog.models import Product
-from promotions.utils import calculate_product_price
+from promotions.money import from_paise, to_paise
+from promotions.price_snapshots import snapshot_prices, with_price_snapshots
 
 def cart_add(request, product_id):
     product = get_object_or_404(Product, id=product_id)
@@ -14,7 +15,8 @@ def cart_add(request, product_id):
     else:
         cart[str(product_id)] = {
             "name": product.name,
-            "price": float(product.sale_price),
+            # Integer paise: sessions are JSON, and floats drift
+            "price_paise": to_paise(product.final_price),
             "quantity": quantity,
             "image": product.image.url if product.image else "",
         }
@@ -27,7 +29,7 @@ def cart_add(request, product_id):
 
 def cart_detail(request):
     cart = request.session.get("cart", {})
-    total = sum(item["price"] * item["quantity"] for item in cart.values())
+    total = from_paise(sum(item["price_paise"] * item["quantity"] for item in cart.values()))
 
     return render(request, "cart/cart_detail.html", {
         "cart": cart,
@@ -38,32 +40,35 @@ def cart_detail(request):
     cart = request.session.get("cart", {})
 
     cart_items = {}
-    total = 0
+    total_paise = 0
+
+    # One query for the cart's products, with their price snapshots joined in
+    products = with_price_snapshots(Product.objects).in_bulk(
+        [int(product_id) for product_id in cart]
+    )
+    snapshot_prices(products.values())
 
     for product_id, item in cart.items():
-        try:
-            product = Product.objects.get(id=product_id)
-        except Product.DoesNotExist:
+        product = products.get(int(product_id))
+        if product is None:
             continue
 
-        # 🔥 Apply category promotion
-        final_price, discount, promotion = calculate_product_price(product)
-
+        price_paise = to_paise(product.pricing.final_price) * item["quantity"]
         cart_items[product_id] = {
             "name": item["name"],
             "quantity": item["quantity"],
             "image": item.get("image"),
             "mrp": product.mrp,
-            "promotion": promotion,
-            "final_price": final_price,
-            "price": final_price * item["quantity"],
+            "promotion": product.pricing.promotion,
+            "final_price": product.pricing.final_price,
+            "price": from_paise(price_paise),
         }
 
-        total += final_price * item["quantity"]
+        total_paise += price_paise
 
     context = {
         "cart": cart_items,
-        "total": total,
+        "total": from_paise(total_paise),
     }
 
     return render(request, "cart/cart_detail.html", context)
@@ -7,6 +7,9 @@ from django.core.files.base import ContentFile
 from django.db import transaction
 from django.core.files.temp import NamedTemporaryFile
 from .models import Category, Product
+from .closure import update_closure
+from .utils import CategoryResolver
+from promotions.price_snapshots import refresh_category_snapshots
 from django.shortcuts import render, redirect
 from django.urls import path
 from django.utils.text import slugify
@@ -67,7 +70,7 @@ class CategoryAdmin(admin.ModelAdmin):
     list_filter = ('is_active', 'parent')
     search_fields = ('name', 'slug')
     prepopulated_fields = {'slug': ('name',)}
-    fields = ("name", "slug", "image", "banner")
+    fields = ("name", "slug", "image", "banner", "threshold_profile")
     actions = [export_categories_csv]
 
     def get_urls(self):
@@ -97,21 +100,56 @@ class CategoryAdmin(admin.ModelAdmin):
             decoded = csv_file.read().decode("utf-8").splitlines()
             reader = csv.DictReader(decoded)
 
+            # Existing categories are read once; new ones are created in
+            # bulk, parents first
+            resolver = CategoryResolver()
+            updated = {}
+            previous_parents = {}
+
             for row in reader:
                 parent = None
                 parent_slug = row.get("parent_slug")
 
                 if parent_slug:
-                    parent = Category.objects.filter(slug=parent_slug).first()
-
-                Category.objects.update_or_create(
-                    slug=row["slug"],
-                    defaults={
-                        "name": row["name"],
-                        "parent": parent,
-                        "is_active": bool(int(row.get("is_active", 1))),
-                    },
+                    parent = resolver.get(parent_slug)
+
+                name = row["name"]
+                is_active = bool(int(row.get("is_active", 1)))
+
+                category = resolver.get(row["slug"])
+                if category is None:
+                    resolver.add(Category(
+                        slug=row["slug"],
+                        name=name,
+                        parent=parent,
+                        is_active=is_active,
+                    ))
+                    continue
+
+                category.name = name
+                category.is_active = is_active
+                if category.pk:
+                    previous_parents.setdefault(category.pk, category.parent_id)
+                    updated[category.pk] = category
+                resolver.set_parent(category, parent)
+
+            with transaction.atomic():
+                resolver.flush()
+
+                for category in updated.values():
+                    category.parent_id = category.parent.pk if category.parent else None
+                Category.objects.bulk_update(
+                    updated.values(), ["name", "parent", "is_active"]
                 )
+                # Moved categories get their ancestor links rewritten and
+                # their subtrees repriced
+                update_closure(list(updated))
+                moved = [
+                    category_id for category_id, category in updated.items()
+                    if category.parent_id != previous_parents[category_id]
+                ]
+                if moved:
+                    transaction.on_commit(lambda: refresh_category_snapshots(moved))
 
             messages.success(request, "Categories imported successfully!")
             return redirect("..")
@@ -185,6 +223,9 @@ class ProductAdmin(admin.ModelAdmin):
         ('Pricing', {
             'fields': ('mrp', 'sale_price', 'stock')
         }),
+        ('Deal Price', {
+            'fields': ('is_deal_price', 'deal_price_starts_at', 'deal_price_ends_at')
+        }),
         ('Content', {
             'fields': ('description', 'specifications', 'image')
         }),
@@ -376,17 +417,34 @@ class ProductAdmin(admin.ModelAdmin):
 
         created = updated = skipped = 0
 
-        # -----------------------------
-        # PROCESS ROWS
-        # -----------------------------
+        rows = []
         for row_values in reader:
             raw_row = dict(zip(raw_headers, row_values))
 
-            row = {
+            rows.append({
                 key: raw_row.get(csv_col, "").strip()
                 for key, csv_col in normalized_headers.items()
-            }
+            })
+
+        # -----------------------------
+        # CATEGORIES (created in bulk up front)
+        # -----------------------------
+        resolver = CategoryResolver()
+        for row in rows:
+            if not all([row.get("SKU"), row.get("Product Name"),
+                        row.get("Category"), row.get("Subcategory")]):
+                continue
+            try:
+                category = resolver.resolve(row["Category"])
+                resolver.resolve(row["Subcategory"], parent=category)
+            except ValueError:
+                continue
+        resolver.flush()
 
+        # -----------------------------
+        # PROCESS ROWS
+        # -----------------------------
+        for row in rows:
             # sku = row.get("sku")
             # name = row.get("name")
             # category_name = row.get("category")
@@ -398,7 +456,6 @@ class ProductAdmin(admin.ModelAdmin):
             subcategory_name = row.get("Subcategory")
 
             self.message_user(request, f"Processing SKU={sku}, Name={name}, Image={row.get('Image')}")
-            print("CSV HEADERS:", raw_headers, row_values)
 
             # -----------------------------
             # REQUIRED FIELD CHECK
@@ -410,17 +467,13 @@ class ProductAdmin(admin.ModelAdmin):
             # -----------------------------
             # CATEGORY & SUBCATEGORY
             # -----------------------------
-            category, _ = Category.objects.get_or_create(
-                name=category_name,
-                parent=None,
-                defaults={"slug": slugify(category_name)}
-            )
-
-            subcategory, _ = Category.objects.get_or_create(
-                name=subcategory_name,
-                parent=category,
-                defaults={"slug": slugify(subcategory_name)}
-            )
+            try:
+                category = resolver.resolve(category_name)
+                subcategory = resolver.resolve(subcategory_name, parent=category)
+            except ValueError:
+                # Slug already used by a category under another parent
+                skipped += 1
+                continue
 
             # -----------------------------
             # SAFE NUMERIC VALUES
@@ -0,0 +1,85 @@
+# catalog/closure.py
+from collections import defaultdict
+
+from .models import Category, CategoryClosure
+
+
+DEFAULT_CLOSURE_BATCH_SIZE = 1000
+
+
+def ancestor_chains(category_ids):
+    """
+    ``{category_id: [category_id, parent_id, grandparent_id, ...]}`` for
+    ``category_ids``, nearest first, in one query
+    """
+    chains = defaultdict(list)
+    links = (
+        CategoryClosure.objects
+        .filter(descendant_id__in=set(category_ids) - {None})
+        .order_by("descendant_id", "depth")
+        .values_list("descendant_id", "ancestor_id")
+    )
+    for descendant_id, ancestor_id in links:
+        chains[descendant_id].append(ancestor_id)
+    return dict(chains)
+
+
+def descendant_ids(category_ids):
+    """
+    ``category_ids`` and every category below them, in one query
+    """
+    return set(
+        CategoryClosure.objects
+        .filter(ancestor_id__in=category_ids)
+        .values_list("descendant_id", flat=True)
+    ) | set(category_ids)
+
+
+def update_closure(category_ids, batch_size=DEFAULT_CLOSURE_BATCH_SIZE):
+    """
+    Rewrites the ancestor links of ``category_ids`` and their subtrees
+    from ``parent_id``, after the categories were created or moved. Takes
+    a whole batch at once (e.g. every category an import created) in a
+    fixed number of queries.
+    """
+    subtree = descendant_ids(category_ids)
+    parents = dict(
+        Category.objects.filter(id__in=subtree).values_list("id", "parent_id")
+    )
+
+    # Ancestors outside the subtree keep their links: read them once
+    outside = {
+        parent_id for parent_id in parents.values()
+        if parent_id is not None and parent_id not in parents
+    }
+    chains = ancestor_chains(outside)
+
+    def chain(category_id):
+        ids = []
+        current = category_id
+        while current in parents and current not in ids:
+            ids.append(current)
+            current = parents[current]
+        if current is not None and current not in ids:
+            ids.extend(chains.get(current, [current]))
+        return ids
+
+    CategoryClosure.objects.filter(descendant_id__in=parents).delete()
+    CategoryClosure.objects.bulk_create(
+        [
+            CategoryClosure(ancestor_id=ancestor_id, descendant_id=category_id, depth=depth)
+            for category_id in parents
+            for depth, ancestor_id in enumerate(chain(category_id))
+        ],
+        batch_size=batch_size,
+    )
+
+
+def rebuild_closure(batch_size=DEFAULT_CLOSURE_BATCH_SIZE):
+    """
+    Rewrites the whole closure table from ``parent_id``
+    """
+    CategoryClosure.objects.all().delete()
+    update_closure(
+        list(Category.objects.values_list("id", flat=True)), batch_size=batch_size
+    )
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from catalog.closure import rebuild_closure
+from catalog.models import CategoryClosure
+
+
+class Command(BaseCommand):
+    help = "Rewrites the category closure table from each category's parent"
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            rebuild_closure()
+        self.stdout.write(f"Wrote {CategoryClosure.objects.count()} category link(s)")
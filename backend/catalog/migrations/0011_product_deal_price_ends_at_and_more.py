@@ -0,0 +1,42 @@
+# Generated by Django 6.0.1 on 2026-10-16 20:37
+
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def close_legacy_deals(apps, schema_editor):
+    """
+    Deal prices used to be wiped on every process start. Give the existing
+    ones a window that has already closed so the expiry scheduler clears
+    them on its first run instead.
+    """
+    Product = apps.get_model("catalog", "Product")
+    Product.objects.filter(
+        is_deal_price=True,
+        deal_price_ends_at__isnull=True,
+    ).update(deal_price_ends_at=timezone.now())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0010_remove_product_csv_upload'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='deal_price_ends_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='deal_price_starts_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['is_deal_price', 'deal_price_ends_at'], name='product_deal_expiry_idx'),
+        ),
+        migrations.RunPython(close_legacy_deals, migrations.RunPython.noop),
+    ]
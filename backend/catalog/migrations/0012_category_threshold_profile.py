@@ -0,0 +1,20 @@
+# Generated by Django 6.0.1 on 2026-10-16 22:05
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0011_product_deal_price_ends_at_and_more'),
+        ('pricing_monitor', '0023_pricethresholdprofile'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='category',
+            name='threshold_profile',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='categories', to='pricing_monitor.pricethresholdprofile'),
+        ),
+    ]
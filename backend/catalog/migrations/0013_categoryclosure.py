@@ -0,0 +1,48 @@
+# Generated by Django 6.0.1 on 2026-10-17 00:10
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def build_closure(apps, schema_editor):
+    Category = apps.get_model("catalog", "Category")
+    CategoryClosure = apps.get_model("catalog", "CategoryClosure")
+
+    parents = dict(Category.objects.values_list("id", "parent_id"))
+    links = []
+    for category_id in parents:
+        depth = 0
+        current = category_id
+        seen = set()
+        while current is not None and current not in seen:
+            seen.add(current)
+            links.append(CategoryClosure(
+                ancestor_id=current, descendant_id=category_id, depth=depth
+            ))
+            current = parents.get(current)
+            depth += 1
+    CategoryClosure.objects.bulk_create(links, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0012_category_threshold_profile'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CategoryClosure',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('depth', models.PositiveIntegerField()),
+                ('ancestor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='descendant_links', to='catalog.category')),
+                ('descendant', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ancestor_links', to='catalog.category')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['ancestor', 'depth'], name='category_closure_ancestor_idx')],
+                'constraints': [models.UniqueConstraint(fields=('descendant', 'ancestor'), name='category_closure_unique_link')],
+            },
+        ),
+        migrations.RunPython(build_closure, migrations.RunPython.noop),
+    ]
@@ -1,8 +1,9 @@
-from django.db import models
+from django.db import models, transaction
 from django.urls import reverse
 from decimal import Decimal
 from django.utils import timezone
 from django.apps import apps
+from django.utils.functional import cached_property
 #from promotions.models import Promotion
 from pricing_monitor.models import ProductCSVUpload
 from django.utils.text import slugify
@@ -26,6 +27,15 @@ class Category(models.Model):
     is_active = models.BooleanField(default=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    # Import price thresholds; without one the parent's apply
+    threshold_profile = models.ForeignKey(
+        "pricing_monitor.PriceThresholdProfile",
+        on_delete=models.SET_NULL,
+        related_name="categories",
+        blank=True,
+        null=True
+    )
+
     class Meta:
         verbose_name_plural = "Categories"
         ordering = ['name']
@@ -37,18 +47,40 @@ class Category(models.Model):
     )
 
     def save(self, *args, **kwargs):
+        # A new or moved category needs its ancestor links (re)written
+        relink = self._state.adding or (
+            Category.objects.filter(pk=self.pk)
+            .exclude(parent_id=self.parent_id)
+            .exists()
+        )
+
         if not self.slug:
             base_slug = slugify(self.name)
             slug = base_slug
             counter = 1
 
-            while Category.objects.filter(slug=slug).exclude(id=self.id).exists():
+            # One query for every taken variant instead of one per attempt
+            taken = set(
+                Category.objects
+                .filter(slug__startswith=base_slug)
+                .exclude(id=self.id)
+                .values_list("slug", flat=True)
+            )
+            while slug in taken:
                 slug = f"{base_slug}-{counter}"
                 counter += 1
 
             self.slug = slug
 
-        super().save(*args, **kwargs)
+        # One transaction, so whatever runs on commit (e.g. repricing a
+        # moved subtree) sees the new ancestor links
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
+            if relink:
+                from .closure import update_closure
+
+                update_closure([self.pk])
 
     def __str__(self):
         if self.parent:
@@ -56,6 +88,44 @@ class Category(models.Model):
         return self.name
     
 
+class CategoryClosure(models.Model):
+    """
+    One row per (ancestor, descendant) pair of the category tree, including
+    each category with itself at depth 0, so the ancestors or descendants
+    of a category at any depth are one indexed query. Maintained by
+    catalog.closure.
+    """
+
+    ancestor = models.ForeignKey(
+        Category,
+        on_delete=models.CASCADE,
+        related_name='descendant_links'
+    )
+    descendant = models.ForeignKey(
+        Category,
+        on_delete=models.CASCADE,
+        related_name='ancestor_links'
+    )
+    depth = models.PositiveIntegerField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["descendant", "ancestor"],
+                name="category_closure_unique_link",
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=["ancestor", "depth"],
+                name="category_closure_ancestor_idx",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.ancestor_id} → {self.descendant_id} ({self.depth})"
+
+
 # catalog/models.py
 
 from django.db import models
@@ -105,6 +175,11 @@ class Product(models.Model):
 
     is_deal_price = models.BooleanField(default=False)
 
+    # Validity window of a pricing-monitor deal price; expired deals are
+    # cleared by pricing_monitor.services.deal_expiry
+    deal_price_starts_at = models.DateTimeField(null=True, blank=True)
+    deal_price_ends_at = models.DateTimeField(null=True, blank=True)
+
     # def get_promotion_label(self):
     #     """
     #     Determines promotion label for frontend display
@@ -156,30 +231,34 @@ class Product(models.Model):
     #         .first()
     #     )
 
+    @cached_property
+    def pricing(self):
+        """
+        This product's PriceQuote, from its price snapshot. Listing views
+        fill this in for a whole page with promotions.price_snapshots.
+        """
+        from promotions.price_snapshots import snapshot_prices
+        from promotions.pricing import PricingEngine
+
+        if self.pk is None:
+            return PricingEngine().price_one(self)
+        return snapshot_prices([self])[0]
+
+    @property
+    def final_price(self):
+        return self.pricing.final_price
+
+    @property
+    def discount(self):
+        return self.pricing.discount
+
     @property
     def active_product_promotion(self):
-        now = timezone.now()
-        return (
-            self.product_promotions
-            .filter(
-                is_active=True,
-                start_date__lte=now,
-                end_date__gte=now
-            )
-            .first()
-        )
+        return self.pricing.product_promotion
     
     @property
     def active_category_promotion(self):
-        now = timezone.now()
-        return (
-            self.category_promotions
-            .filter(
-                is_active=True,
-                start_date__lte=now,
-                end_date__gte=now,
-            ).first()
-        )
+        return self.pricing.category_promotion
     
     # @property
     # def active_category_promotion(self):
@@ -202,48 +281,7 @@ class Product(models.Model):
         2. Product promotion
         3. Category promotion
         """
-
-        
-        
-        from pricing_monitor.models import ProductCSVUpload
-        from promotions.models import ProductPromotion, CategoryPromotion
-        from django.utils import timezone
-
-        now = timezone.now()
-
-        # 1️⃣ Special Promotion (Pricing Monitor)
-        if ProductCSVUpload.objects.filter(
-            imported_products__product=self
-        ).exists():
-            return "Special Promotion"
-
-        # 2️⃣ Product Promotion
-        # if hasattr(self, "active_product_promotion") and self.active_product_promotion:
-        #     return "Product Promotion"
-        # 2️⃣ Product Promotion
-        if ProductPromotion.objects.filter(
-            product=self,
-            is_active=True,
-            start_date__lte=now,
-            end_date__gte=now,
-        ).exists():
-            return "Product Promotion"
-
-
-        # 3️⃣ Category Promotion
-        # if self.category and hasattr(self.category, "active_category_promotion"):
-        #     if self.category.active_category_promotion:
-        #         return "Category Promotion"
-        # 3️⃣ Category Promotion
-        if self.category and CategoryPromotion.objects.filter(
-            category=self.category,
-            is_active=True,
-            start_date__lte=now,
-            end_date__gte=now,
-        ).exists():
-            return "Category Promotion"
-
-        return None
+        return self.pricing.label
 
     # active_promotion = models.ForeignKey(
     #     "promotions.Promotion",
@@ -258,6 +296,12 @@ class Product(models.Model):
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(
+                fields=["is_deal_price", "deal_price_ends_at"],
+                name="product_deal_expiry_idx",
+            ),
+        ]
 
     def save(self, *args, **kwargs):
         if not self.slug:
@@ -291,7 +335,22 @@ class Product(models.Model):
         #     and self.sale_price > 0
         #     and self.sale_price < self.mrp
         # )
-        return self.is_deal_price and self.sale_price
+        return bool(
+            self.is_deal_price
+            and self.sale_price
+            and self.deal_price_is_live()
+        )
+
+    def deal_price_is_live(self, now=None):
+        """
+        True while now is inside the deal price validity window
+        """
+        now = now or timezone.now()
+        if self.deal_price_starts_at and self.deal_price_starts_at > now:
+            return False
+        if self.deal_price_ends_at and self.deal_price_ends_at <= now:
+            return False
+        return True
     
     # def active_promotion(self):
     #     """
@@ -330,61 +389,9 @@ class Product(models.Model):
         """
         Promotion priority:
         1. ProductPromotion
-        2. CategoryPromotion (self, child, parent)
+        2. CategoryPromotion (sub-category, category, then their parents)
         """
-        now = timezone.now()
-
-        ProductPromotion = apps.get_model("promotions", "ProductPromotion")
-        CategoryPromotion = apps.get_model("promotions", "CategoryPromotion")
-
-        # 1️⃣ PRODUCT PROMOTION
-        product_promo = ProductPromotion.objects.filter(
-            product=self,
-            is_active=True,
-            start_date__lte=now,
-            end_date__gte=now,
-        ).order_by("-discount_value").first()
-
-        if product_promo:
-            return product_promo
-
-        category = self.category
-
-        # 2️⃣ SAME CATEGORY
-        category_promo = CategoryPromotion.objects.filter(
-            category=category,
-            is_active=True,
-            start_date__lte=now,
-            end_date__gte=now,
-        ).order_by("-updated_at").first()
-
-        if category_promo:
-            return category_promo
-
-        # 3️⃣ CHILD CATEGORY PROMOTION (Mobiles → OnePlus)
-        child_category_promo = CategoryPromotion.objects.filter(
-            category__parent=category,
-            is_active=True,
-            start_date__lte=now,
-            end_date__gte=now,
-        ).order_by("-updated_at").first()
-
-        if child_category_promo:
-            return child_category_promo
-
-        # 4️⃣ PARENT CATEGORY PROMOTION
-        if category.parent:
-            parent_category_promo = CategoryPromotion.objects.filter(
-                category=category.parent,
-                is_active=True,
-                start_date__lte=now,
-                end_date__gte=now,
-            ).order_by("-updated_at").first()
-
-            if parent_category_promo:
-                return parent_category_promo
-
-        return None
+        return self.pricing.promotion
 
     @property
     def display_price(self):
@@ -425,43 +432,12 @@ class Product(models.Model):
     def get_effective_sale_price(self):
         """
         Returns the actual sale price considering:
-        1. Product promotion
-        2. Category promotion
-        3. sale_price
+        1. Deal price
+        2. Product promotion
+        3. Category promotion
         4. mrp
         """
-
-        # 1️⃣ Product promotion
-        promo = self.product_promotions.filter(
-            is_active=True,
-            start_date__lte=timezone.now(),
-            end_date__gte=timezone.now()
-        ).first()
-
-        if promo:
-            if promo.discount_type == "percentage":
-                return self.sale_price * (Decimal("1") - promo.discount_value / 100)
-            return max(self.sale_price - promo.discount_value, Decimal("0"))
-
-        # 2️⃣ Category promotion
-        if self.category:
-            cat_promo = self.category.categorypromotion_set.filter(
-                is_active=True,
-                start_date__lte=timezone.now(),
-                end_date__gte=timezone.now()
-            ).first()
-
-            if cat_promo:
-                if cat_promo.discount_type == "PERCENTAGE":
-                    return self.sale_price * (Decimal("1") - cat_promo.discount_value / 100)
-                return max(self.sale_price - cat_promo.discount_value, Decimal("0"))
-
-        # 3️⃣ Normal sale price
-        if self.sale_price:
-            return self.sale_price
-
-        # 4️⃣ Fallback
-        return self.mrp
+        return self.pricing.final_price
 
 
     def __str__(self):
@@ -1,3 +1,215 @@
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
 from django.test import TestCase
+from django.utils import timezone
+
+from catalog.closure import ancestor_chains, descendant_ids, rebuild_closure
+from catalog.models import Category, CategoryClosure, Product
+from catalog.utils import CategoryResolver
+from promotions.models import CategoryPromotion, ProductPriceSnapshot
+
+
+class CategoryClosureTests(TestCase):
+    """
+    The closure table follows creates, moves and bulk imports, and answers
+    ancestor and descendant lookups of any depth in one query.
+    """
+
+    def setUp(self):
+        self.electronics = Category.objects.create(name="Electronics", slug="electronics")
+        self.phones = Category.objects.create(name="Phones", slug="phones", parent=self.electronics)
+        self.android = Category.objects.create(name="Android", slug="android", parent=self.phones)
+        self.pixel = Category.objects.create(name="Pixel", slug="pixel", parent=self.android)
+
+    def links(self):
+        return set(CategoryClosure.objects.values_list("ancestor_id", "descendant_id", "depth"))
+
+    def test_ancestors_and_descendants_in_one_query(self):
+        with self.assertNumQueries(1):
+            chains = ancestor_chains([self.pixel.id, self.phones.id])
+        self.assertEqual(
+            chains[self.pixel.id],
+            [self.pixel.id, self.android.id, self.phones.id, self.electronics.id],
+        )
+        self.assertEqual(chains[self.phones.id], [self.phones.id, self.electronics.id])
+
+        with self.assertNumQueries(1):
+            subtree = descendant_ids([self.phones.id])
+        self.assertEqual(subtree, {self.phones.id, self.android.id, self.pixel.id})
+
+    def test_moving_a_category_moves_its_subtree(self):
+        gadgets = Category.objects.create(name="Gadgets", slug="gadgets")
+
+        self.android.parent = gadgets
+        self.android.save()
+
+        self.assertEqual(
+            ancestor_chains([self.pixel.id])[self.pixel.id],
+            [self.pixel.id, self.android.id, gadgets.id],
+        )
+        self.assertEqual(descendant_ids([self.phones.id]), {self.phones.id})
+
+        expected = self.links()
+        rebuild_closure()
+        self.assertEqual(self.links(), expected)
+
+    def test_bulk_created_categories_are_linked(self):
+        resolver = CategoryResolver()
+        tablets = resolver.resolve("Tablets", parent=self.electronics)
+        ipad = resolver.resolve("iPad", parent=tablets)
+        resolver.flush()
+
+        self.assertEqual(
+            ancestor_chains([ipad.id])[ipad.id],
+            [ipad.id, tablets.id, self.electronics.id],
+        )
+        self.assertIn(ipad.id, descendant_ids([self.electronics.id]))
+
+
+class CategoryResolverTests(TestCase):
+    """
+    Categories are read once per import and created in bulk, parents first.
+    """
+
+    def setUp(self):
+        self.electronics = Category.objects.create(name="Electronics", slug="electronics")
+
+    def test_lookups_come_from_memory(self):
+        resolver = CategoryResolver()
+
+        with self.assertNumQueries(0):
+            self.assertEqual(resolver.resolve("Electronics").pk, self.electronics.pk)
+            tablets = resolver.resolve("Tablets", parent=self.electronics)
+            self.assertIs(resolver.resolve("Tablets", parent=self.electronics), tablets)
+            with self.assertRaisesMessage(ValueError, "already exists under another parent"):
+                resolver.resolve("Electronics", parent=tablets)
+
+        resolver.flush()
+        tablets.refresh_from_db()
+        self.assertEqual(tablets.parent, self.electronics)
+
+    def test_one_insert_per_tree_level(self):
+        resolver = CategoryResolver()
+        for i in range(5):
+            parent = resolver.resolve(f"Brand {i}", parent=self.electronics)
+            resolver.resolve(f"Series {i}", parent=parent)
+
+        # Per level: the insert and the read back; then update_closure's five
+        with self.assertNumQueries(2 * 2 + 5):
+            resolver.flush()
+
+        self.assertEqual(
+            Category.objects.filter(parent__parent=self.electronics).count(), 5
+        )
+
+    def test_categories_created_meanwhile_are_reused(self):
+        resolver = CategoryResolver()
+        tablets = resolver.resolve("Tablets", parent=self.electronics)
+        ipad = resolver.resolve("iPad", parent=tablets)
+
+        # Another import creates the same category first
+        existing = Category.objects.create(
+            name="Tablets", slug="tablets", parent=self.electronics
+        )
+        resolver.flush()
+
+        self.assertEqual(tablets.pk, existing.pk)
+        self.assertEqual(Category.objects.filter(slug="tablets").count(), 1)
+        self.assertEqual(Category.objects.get(slug="ipad").parent_id, existing.pk)
+        self.assertEqual(
+            ancestor_chains([ipad.pk])[ipad.pk],
+            [ipad.pk, existing.pk, self.electronics.pk],
+        )
+
+
+class AdminImportTests(TestCase):
+    """
+    The category and product CSV imports of the admin.
+    """
+
+    def setUp(self):
+        User = get_user_model()
+        self.client.force_login(
+            User.objects.create_superuser("admin", "admin@example.com", "password")
+        )
+        self.electronics = Category.objects.create(name="Electronics", slug="electronics")
+
+    def post_csv(self, url, content):
+        return self.client.post(
+            url, {"csv_file": SimpleUploadedFile("import.csv", content.encode())}
+        )
+
+    def test_category_import_creates_updates_and_moves(self):
+        gadgets = Category.objects.create(name="Gadgets", slug="gadgets", parent=self.electronics)
+
+        response = self.post_csv(
+            "/admin/catalog/category/import-csv/",
+            "slug,name,parent_slug,is_active\n"
+            "appliances,Appliances,,1\n"
+            "kitchen,Kitchen,appliances,1\n"
+            "gadgets,Gadgets & Toys,appliances,0\n",
+        )
+
+        self.assertEqual(response.status_code, 302)
+        kitchen = Category.objects.get(slug="kitchen")
+        self.assertEqual(kitchen.parent.slug, "appliances")
+        gadgets.refresh_from_db()
+        self.assertEqual(
+            (gadgets.name, gadgets.parent.slug, gadgets.is_active),
+            ("Gadgets & Toys", "appliances", False),
+        )
+        self.assertEqual(
+            descendant_ids([kitchen.parent_id]), {kitchen.parent_id, kitchen.pk, gadgets.pk}
+        )
+
+    def test_category_import_reprices_moved_subtrees(self):
+        appliances = Category.objects.create(name="Appliances", slug="appliances")
+        gadgets = Category.objects.create(name="Gadgets", slug="gadgets", parent=self.electronics)
+        now = timezone.now()
+        with self.captureOnCommitCallbacks(execute=True):
+            CategoryPromotion.objects.create(
+                category=appliances,
+                discount_type="PERCENTAGE",
+                discount_value=10,
+                start_date=now - timedelta(days=1),
+                end_date=now + timedelta(days=1),
+            )
+            product = Product.objects.create(
+                sku="ADM-9", name="Gadget", slug="adm-9", category=gadgets, mrp=1000
+            )
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.post_csv(
+                "/admin/catalog/category/import-csv/",
+                "slug,name,parent_slug,is_active\n"
+                "gadgets,Gadgets,appliances,1\n",
+            )
+
+        snapshot = ProductPriceSnapshot.objects.get(product=product)
+        self.assertEqual((snapshot.source, snapshot.final_price), ("category", Decimal("900.00")))
+
+    def test_product_import_creates_categories_once(self):
+        header = (
+            "SKU,Product Name,Slug,Category,Subcategory,MRP,Sale Price,Stock,"
+            "Description,Specifications,Image\n"
+        )
+        response = self.post_csv(
+            "/admin/catalog/product/import-csv/",
+            header
+            + "ADM-1,Kettle,kettle,Appliances,Kitchen,1000,900,5,,,\n"
+            + "ADM-2,Toaster,toaster,Appliances,Kitchen,2000,,3,,,\n"
+            + "ADM-3,Clash,clash,Kitchen,Electronics,2000,,3,,,\n"
+            + "ADM-4,No price,no-price,Appliances,Kitchen,0,,3,,,\n",
+        )
 
-# Create your tests here.
+        self.assertEqual(response.status_code, 302)
+        kitchen = Category.objects.get(slug="kitchen")
+        self.assertEqual(kitchen.parent.slug, "appliances")
+        self.assertEqual(Category.objects.filter(slug__in=["appliances", "kitchen"]).count(), 2)
+        self.assertEqual(
+            list(Product.objects.order_by("sku").values_list("sku", "category__slug", "sale_price")),
+            [("ADM-1", "kitchen", Decimal("900.00")), ("ADM-2", "kitchen", Decimal("2000.00"))],
+        )
@@ -20,3 +20,118 @@
 
 #     return round(final_price, 2), round(discount, 2), promotion
 
+
+
+from django.utils.text import slugify
+
+from .closure import update_closure
+from .models import Category
+
+
+class CategoryResolver:
+    """
+    Per-import category cache.
+
+    Every (slug, parent) pair is read once when the resolver is created.
+    resolve() then answers from memory and only queues categories that do
+    not exist yet; flush() creates the queued ones with one bulk_create per
+    tree level, parents first, so children can point at their new IDs,
+    then writes their ancestor links in one batch.
+    """
+
+    def __init__(self):
+        self.categories = {}   # slug -> Category (saved or pending)
+        self.parents = {}      # slug -> parent ID, or the pending parent
+        self.pending = []
+        self.slugs = {}        # name -> slug, feeds repeat the same names
+
+        for category in Category.objects.only("id", "name", "slug", "parent_id", "is_active"):
+            self.categories[category.slug] = category
+            self.parents[category.slug] = category.parent_id
+
+    @staticmethod
+    def parent_key(parent):
+        """
+        Saved categories compare by ID, pending ones by identity.
+        """
+        if parent is None or parent.pk is not None:
+            return getattr(parent, "pk", None)
+        return parent
+
+    def get(self, slug):
+        return self.categories.get(slug)
+
+    def resolve(self, name, parent=None):
+        """
+        Category called ``name`` under ``parent``, queued for creation if
+        it does not exist. Raises ValueError when the slug is already used
+        under another parent (slugs are unique across the whole tree).
+        """
+        name = name.strip()
+        slug = self.slugs.get(name)
+        if slug is None:
+            slug = self.slugs[name] = slugify(name)
+
+        category = self.categories.get(slug)
+        if category is not None:
+            if self.parents[slug] != self.parent_key(parent):
+                raise ValueError(
+                    f"Category slug '{slug}' already exists under another parent"
+                )
+            return category
+
+        return self.add(Category(name=name, slug=slug, parent=parent))
+
+    def add(self, category):
+        """
+        Queues an unsaved category built by the caller.
+        """
+        self.categories[category.slug] = category
+        self.parents[category.slug] = self.parent_key(category.parent)
+        self.pending.append(category)
+        return category
+
+    def set_parent(self, category, parent):
+        category.parent = parent
+        self.parents[category.slug] = self.parent_key(parent)
+
+    def flush(self):
+        """
+        Creates every queued category, one bulk_create per tree level.
+
+        Another import (or a parallel shard of the same one) may have
+        created some of the slugs since this resolver was loaded: those
+        rows are kept as they are and their IDs read back by slug.
+        """
+        created = []
+        while self.pending:
+            ready = [
+                c for c in self.pending
+                if c.parent is None or c.parent.pk is not None
+            ]
+            if not ready:
+                raise ValueError("Category parents form a cycle")
+
+            for category in ready:
+                category.parent_id = category.parent.pk if category.parent else None
+            Category.objects.bulk_create(ready, ignore_conflicts=True)
+
+            saved = {
+                slug: (pk, parent_id)
+                for pk, slug, parent_id in Category.objects
+                .filter(slug__in=[category.slug for category in ready])
+                .order_by()
+                .values_list("id", "slug", "parent_id")
+            }
+            for category in ready:
+                if category.slug not in saved:
+                    raise ValueError(f"Category '{category.name}' could not be created")
+                category.pk, category.parent_id = saved[category.slug]
+                category._state.adding = False
+                created.append(category.pk)
+                self.parents[category.slug] = category.parent_id
+
+            self.pending = [c for c in self.pending if c.pk is None]
+
+        if created:
+            update_closure(created)
@@ -5,7 +5,7 @@ from django.db.models import Q
 #from products.models import Product   # adjust app name if needed
 #from promotions.utils import calculate_product_price
 #from promotions.utils import get_active_category_promotion
-from promotions.services import get_final_price, calculate_price
+from promotions.price_snapshots import snapshot_prices, with_price_snapshots
 
 def category_detail(request, slug):
     category = get_object_or_404(Category, slug=slug, is_active=True)
@@ -34,21 +34,15 @@ def category_detail(request, slug):
             is_active=True
         ).distinct()
 
-    paginator = Paginator(products_qs, 12)
+    paginator = Paginator(with_price_snapshots(products_qs), 12)
     page_number = request.GET.get("page")
     products = paginator.get_page(page_number)
 
     # ✅ NO PRICE / PROMOTION ASSIGNMENTS HERE
     # Pricing is now handled by Product model properties
 
-    # 🔥 APPLY FINAL PRICE LOGIC (REQUIRED)
-    for product in products:
-        price_data = calculate_price(product)
-
-        product.mrp = price_data["mrp"]
-        product.final_price = price_data["final_price"]
-        product.discount = price_data["discount"]
-        # product.active_promotion = price_data["promotion"]
+    # 🔥 Prices come joined in from the snapshots; the template reads product.pricing
+    snapshot_prices(products)
 
     context = {
         "category": category,
@@ -181,17 +175,11 @@ def category_detail(request, slug):
 
 #     return render(request, "catalog/product_detail.html", context)
 
-from promotions.services import calculate_price
-
 def product_detail(request, slug):
-    product = get_object_or_404(Product, slug=slug, is_active=True)
-
-    price_data = calculate_price(product)
-
-    product.mrp = price_data["mrp"]
-    product.final_price = price_data["final_price"]
-    product.discount = price_data["discount"]
-    product.active_promotion = price_data["promotion"]
+    product = get_object_or_404(
+        with_price_snapshots(Product.objects), slug=slug, is_active=True
+    )
+    snapshot_prices([product])
 
     context = {
         "product": product,
@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/6.0/ref/settings/
 """
 
+from datetime import timedelta
 from pathlib import Path
 import dj_database_url
 
@@ -105,6 +106,14 @@ DATABASES = {
     )
 }
 
+if DATABASES["default"]["ENGINE"] == "django.db.backends.sqlite3":
+    # Parallel CSV imports write from several processes: take the write
+    # lock when a transaction starts and wait for it instead of failing
+    DATABASES["default"].setdefault("OPTIONS", {}).update(
+        transaction_mode="IMMEDIATE",
+        timeout=30,
+    )
+
 
 # Password validation
 # https://docs.djangoproject.com/en/6.0/ref/settings/#auth-password-validators
@@ -157,3 +166,32 @@ INTERNAL_IPS = [
 NPM_BIN_PATH = r"C:\Program Files\nodejs\npm.cmd"
 
 CORS_ALLOW_ALL_ORIGINS = True
+
+# How long imported deal prices stay live when an upload sets no end date
+PRICING_DEAL_PRICE_DURATION = timedelta(days=7)
+
+# Processes used to import one upload; rows are sharded by SKU
+PRICING_IMPORT_WORKERS = 1
+
+# A processing upload without a worker heartbeat for this long is resumed
+# from its checkpoint by the next worker, once its worker is known to be
+# gone
+PRICING_IMPORT_STALE_AFTER = timedelta(minutes=5)
+
+# How often a running job refreshes its heartbeat (from a background
+# thread, so long pre-passes and shards count as alive too)
+PRICING_IMPORT_HEARTBEAT_INTERVAL = timedelta(seconds=30)
+
+# Chunked uploads that received no chunk for this long are deleted with
+# their part files (process_csv_uploads while idle, or
+# expire_chunked_uploads)
+PRICING_CHUNKED_UPLOAD_EXPIRY = timedelta(hours=24)
+
+# Overrides of the import's price thresholds (see
+# pricing_monitor/services/price_rules.py), e.g. {"max_discount": 60}
+PRICING_PRICE_THRESHOLDS = {}
+
+# Each process keeps an in-memory index of promotions, rebuilt when a
+# promotion is saved or deleted (a version stamp in the database, read
+# once per request, tells every process) and at least this often
+PROMOTIONS_INDEX_MAX_AGE = timedelta(minutes=5)
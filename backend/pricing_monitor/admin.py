@@ -1,11 +1,18 @@
 import csv
 from django.http import HttpResponse
 from django.contrib import admin, messages
-from .models import ImportedProduct, ProductCSVUpload, SkippedPriceImport
-from .services.csv_processor import process_csv_upload
+from .models import (
+    CSVImportLog,
+    ImportedProduct,
+    PriceThresholdProfile,
+    ProductCSVUpload,
+    SkippedPriceImport,
+)
+from .services.dry_run import dry_run_csv_upload
+from .services.jobs import enqueue_uploads, resume_uploads
 from django.urls import reverse, path
 from django.shortcuts import redirect
-from django.utils.html import format_html
+from django.utils.html import format_html, format_html_join
 from catalog.models import Product
 
 # class ImportedProductInline(admin.TabularInline):
@@ -35,6 +42,44 @@ class ImportedProductInline(admin.TabularInline):
     can_delete = True
     # template = "admin/catalog/product/tabular_inline.html"
 
+
+class ImportLogInline(admin.TabularInline):
+    model = CSVImportLog
+    extra = 0
+    readonly_fields = (
+        "created_at",
+        "imported",
+        "skipped",
+        "unchanged",
+        "duration_seconds",
+        "queries",
+        "bytes_read",
+        "peak_memory_kb",
+        "stages",
+    )
+    fields = readonly_fields
+    can_delete = False
+
+    def has_add_permission(self, request, obj=None):
+        return False
+
+    @admin.display(description="Stages")
+    def stages(self, obj):
+        # ⏱ slowest stage first, e.g. "products 1.20s / 12 q"
+        timings = sorted(
+            (obj.stage_timings or {}).items(),
+            key=lambda item: item[1]["seconds"],
+            reverse=True,
+        )
+        return format_html_join(
+            "", "<div>{} {}s / {} q</div>",
+            (
+                (name, f"{totals['seconds']:.2f}", totals["queries"])
+                for name, totals in timings
+                if name != "import"
+            ),
+        ) or "-"
+
 # ================= EXPORT SKIPPED PRICE IMPORTS =================
 
 def export_skipped_prices_csv(request):
@@ -106,18 +151,64 @@ class ProductCSVUploadAdmin(admin.ModelAdmin):
     #     "uploaded_at",
     # )
     # list_editable = ("min_net_price_percent",)
-    list_display = ("id","file", "consider_price_validation", "uploaded_at")
+    list_display = (
+        "id",
+        "file",
+        "consider_price_validation",
+        "status",
+        "progress",
+        "uploaded_at",
+    )
     list_editable = ("consider_price_validation",)
-    readonly_fields = ("uploaded_at", "processed")
-    inlines = [ImportedProductInline]
-    actions = ["process_csv"]
+    readonly_fields = (
+        "uploaded_at",
+        "processed",
+        "claimed_by",
+        "started_at",
+        "finished_at",
+        "rows_done",
+        "rows_total",
+        "rows_per_second",
+        "error",
+        "checkpoint_row",
+        "checkpoint_at",
+        "content_digest",
+        "duplicate_of",
+        "archive",
+        "archive_member",
+        "dry_run_at",
+        "dry_run_summary",
+        "dry_run_file",
+    )
+    inlines = [ImportLogInline, ImportedProductInline]
+    actions = ["dry_run_csv", "process_csv", "resume_csv"]
 
     fieldsets = (
         (None, {
-            "fields": ("file", "consider_price_validation"),
+            "fields": (
+                "file",
+                "feed_key",
+                "consider_price_validation",
+                "duplicate_sku_policy",
+            ),
+        }),
+        ("Deal price window", {
+            "fields": ("deal_starts_at", "deal_ends_at"),
+        }),
+        ("Dry run", {
+            "fields": ("dry_run_at", "dry_run_summary", "dry_run_file"),
         }),
         ("Status", {
-            "fields": ("status",),
+            "fields": (
+                "status",
+                "processed",
+                ("rows_done", "rows_total", "rows_per_second"),
+                ("claimed_by", "started_at", "finished_at"),
+                ("checkpoint_row", "checkpoint_at"),
+                ("content_digest", "duplicate_of"),
+                ("archive", "archive_member"),
+                "error",
+            ),
         }),
     )
 
@@ -133,23 +224,76 @@ class ProductCSVUploadAdmin(admin.ModelAdmin):
         print("FILES RECEIVED:", request.FILES)
         super().save_model(request, obj, form, change)
 
-    def process_csv(self, request, queryset):
-        print("🧠 ADMIN ACTION TRIGGERED") 
-        for upload in queryset:
-            print(f"📂 PROCESSING FILE: {upload.file.name}") 
-            #imported, skipped = process_csv_upload(upload.file)
-            imported, skipped = process_csv_upload(upload)
-            upload.processed = True
-            upload.save(update_fields=["processed"])
+    def progress(self, obj):
+        if obj.progress_percent is None:
+            return "-"
+        return f"{obj.rows_done}/{obj.rows_total} ({obj.progress_percent}%)"
 
+    def dry_run_csv(self, request, queryset):
+        # Read-only preview: fast enough to run inside the request
+        for upload in queryset:
+            try:
+                summary = dry_run_csv_upload(upload)
+            except ValueError as e:
+                # e.g. a .zip of several feeds: each is previewed on its own
+                # upload once the worker has split the archive
+                self.message_user(request, f"{upload}: {e}", level=messages.ERROR)
+                continue
             self.message_user(
                 request,
-                f"CSV Processed: Imported {imported}, Skipped {skipped}",
-                level=messages.SUCCESS,
+                f"{upload}: {summary['create']} new, {summary['increase']} up, "
+                f"{summary['decrease']} down, {summary['unchanged']} unchanged, "
+                f"{summary['rejected']} rejected. Download the diff from the upload page.",
+                level=messages.INFO,
             )
 
+    dry_run_csv.short_description = "Dry run: preview price changes"
+
+    def process_csv(self, request, queryset):
+        # Processing runs in the `process_csv_uploads` worker, not in this request
+        queued = enqueue_uploads(queryset)
+
+        self.message_user(
+            request,
+            f"Queued {queued} upload(s) for processing. "
+            "Progress is shown in the Status column.",
+            level=messages.SUCCESS,
+        )
+
     process_csv.short_description = "Process CSV & Validate Prices"
 
+    def resume_csv(self, request, queryset):
+        queued = resume_uploads(queryset)
+
+        self.message_user(
+            request,
+            f"Queued {queued} failed upload(s) to resume from their last checkpoint.",
+            level=messages.SUCCESS,
+        )
+
+    resume_csv.short_description = "Resume failed imports"
+
+
+@admin.register(PriceThresholdProfile)
+class PriceThresholdProfileAdmin(admin.ModelAdmin):
+    list_display = (
+        "name",
+        "min_discount",
+        "max_discount",
+        "min_margin",
+        "max_margin",
+        "low_price",
+        "high_price",
+        "category_names",
+        "updated_at",
+    )
+    search_fields = ("name",)
+
+    @admin.display(description="Categories")
+    def category_names(self, obj):
+        # Sub-categories without a profile of their own inherit this one
+        return ", ".join(obj.categories.values_list("name", flat=True)) or "-"
+
 
 @admin.register(SkippedPriceImport)
 class SkippedPriceImportAdmin(admin.ModelAdmin):
@@ -1,19 +1,50 @@
+import re
+
+from django.shortcuts import get_object_or_404
+from django.urls import reverse
 from django.views.decorators.csrf import csrf_exempt
 from django.utils.decorators import method_decorator
 
 from rest_framework.views import APIView
-from rest_framework.parsers import MultiPartParser, FormParser
+from rest_framework.parsers import FormParser, JSONParser, MultiPartParser
 from rest_framework.response import Response
 from rest_framework import status
 from rest_framework.renderers import JSONRenderer
 
-from pricing_monitor.models import ProductCSVUpload
+from pricing_monitor.models import ChunkedUpload, ProductCSVUpload
+from pricing_monitor.services.chunked_upload import (
+    ALLOWED_EXTENSIONS,
+    INVALID_FILE_TYPE,
+    ChunkedUploadError,
+    append_chunk,
+    finish_chunked_upload,
+    start_chunked_upload,
+)
+
+
+# "bytes 0-1048575/5000000" (the total is optional)
+CONTENT_RANGE_RE = re.compile(r"^bytes (\d+)-(\d+)(?:/(\d+|\*))?$")
+
+
+def queued_upload_response(upload, file_name):
+    return Response(
+        {
+            "message": "File uploaded successfully",
+            "upload_id": upload.id,
+            "file_name": file_name,
+            "status": upload.status,
+            "status_url": reverse("pricing-upload-status", args=[upload.id]),
+        },
+        status=status.HTTP_201_CREATED
+    )
 
 
 @method_decorator(csrf_exempt, name="dispatch")
 class ProductCSVUploadAPIView(APIView):
     """
-    Handles CSV/XLSX upload from React frontend
+    Handles CSV/XLSX upload from React frontend. A .csv.gz or .zip is
+    stored compressed; a zip of several CSVs is imported as one feed per
+    CSV, in one job.
     """
     parser_classes = (MultiPartParser, FormParser)
     renderer_classes = (JSONRenderer,)
@@ -29,26 +60,150 @@ class ProductCSVUploadAPIView(APIView):
             )
 
         # 2️⃣ Validate file type
-        allowed_extensions = (".csv", ".xlsx", ".xls")
-        if not file.name.lower().endswith(allowed_extensions):
+        if not file.name.lower().endswith(ALLOWED_EXTENSIONS):
             return Response(
-                {"error": "Invalid file type. Only CSV or Excel files are allowed."},
+                {"error": INVALID_FILE_TYPE},
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        # 3️⃣ Save upload record
+        # 3️⃣ Save upload record (queued for the background worker)
         upload = ProductCSVUpload.objects.create(
             file=file,
-            status="uploaded"
+            feed_key=request.data.get("feed_key", "")[:100],
+            status=ProductCSVUpload.STATUS_UPLOADED
         )
 
         # 4️⃣ Success response (React-friendly)
+        return queued_upload_response(upload, file.name)
+
+
+@method_decorator(csrf_exempt, name="dispatch")
+class ChunkedUploadAPIView(APIView):
+    """
+    Starts a chunked upload for feeds too large for one request:
+    POST {file_name, size, feed_key}, then PUT the byte ranges to
+    chunk_url and POST the file's SHA-256 to finish_url
+    """
+    parser_classes = (JSONParser, FormParser)
+    renderer_classes = (JSONRenderer,)
+
+    def post(self, request, *args, **kwargs):
+        try:
+            chunked = start_chunked_upload(
+                request.data.get("file_name"),
+                request.data.get("size"),
+                feed_key=request.data.get("feed_key", ""),
+            )
+        except (TypeError, ValueError) as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
         return Response(
             {
-                "message": "File uploaded successfully",
-                "upload_id": upload.id,
-                "file_name": file.name,
-                "status": upload.status
+                "upload_token": chunked.token,
+                "size": chunked.size,
+                "received": chunked.received,
+                "chunk_url": reverse("pricing-upload-chunk", args=[chunked.token]),
+                "finish_url": reverse("pricing-upload-finish", args=[chunked.token]),
             },
             status=status.HTTP_201_CREATED
         )
+
+
+@method_decorator(csrf_exempt, name="dispatch")
+class ChunkedUploadChunkAPIView(APIView):
+    """
+    PUT: one byte range of the file, with a Content-Range header. Sending
+    a range again is harmless. GET: how many bytes arrived, to resume.
+    """
+    renderer_classes = (JSONRenderer,)
+
+    def get(self, request, token, *args, **kwargs):
+        chunked = get_object_or_404(ChunkedUpload, token=token)
+        return Response({"size": chunked.size, "received": chunked.received})
+
+    def put(self, request, token, *args, **kwargs):
+        chunked = get_object_or_404(ChunkedUpload, token=token)
+
+        match = CONTENT_RANGE_RE.match(request.headers.get("Content-Range", ""))
+        if not match:
+            return Response(
+                {"error": "Content-Range header required, e.g. 'bytes 0-1048575/5000000'."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        start, end = int(match.group(1)), int(match.group(2))
+        length = end - start + 1
+        if length <= 0 or int(request.headers.get("Content-Length") or 0) != length:
+            return Response(
+                {"error": "Content-Length does not match the Content-Range."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        # The body is streamed to storage, never parsed
+        try:
+            received = append_chunk(chunked, start, request.stream, length)
+        except ChunkedUploadError as e:
+            return Response(
+                {"error": str(e), "received": e.received},
+                status=status.HTTP_409_CONFLICT
+            )
+
+        return Response({"size": chunked.size, "received": received})
+
+
+@method_decorator(csrf_exempt, name="dispatch")
+class ChunkedUploadFinishAPIView(APIView):
+    """
+    Checks the SHA-256 of the assembled file and queues it for import
+    """
+    parser_classes = (JSONParser, FormParser)
+    renderer_classes = (JSONRenderer,)
+
+    def post(self, request, token, *args, **kwargs):
+        chunked = get_object_or_404(ChunkedUpload, token=token)
+
+        try:
+            upload = finish_chunked_upload(chunked, request.data.get("sha256"))
+        except ChunkedUploadError as e:
+            return Response(
+                {"error": str(e), "received": e.received},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        return queued_upload_response(upload, chunked.file_name)
+
+
+class ProductCSVUploadStatusAPIView(APIView):
+    """
+    Polling endpoint for background processing progress
+    """
+    renderer_classes = (JSONRenderer,)
+
+    def get(self, request, upload_id, *args, **kwargs):
+        upload = get_object_or_404(ProductCSVUpload, id=upload_id)
+
+        return Response(
+            {
+                "upload_id": upload.id,
+                "status": upload.status,
+                "processed": upload.processed,
+                "rows_done": upload.rows_done,
+                "rows_total": upload.rows_total,
+                "rows_per_second": upload.rows_per_second,
+                "progress_percent": upload.progress_percent,
+                "started_at": upload.started_at,
+                "finished_at": upload.finished_at,
+                "error": upload.error,
+                "duplicate_of": upload.duplicate_of_id,
+                # The CSVs of a .zip, each imported as a feed of its own
+                "feeds": [
+                    {
+                        "upload_id": feed.id,
+                        "file_name": feed.archive_member,
+                        "status": feed.status,
+                        "rows_done": feed.rows_done,
+                        "rows_total": feed.rows_total,
+                    }
+                    for feed in upload.archive_feeds.order_by("id")
+                ],
+            }
+        )
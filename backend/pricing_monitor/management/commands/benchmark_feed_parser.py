@@ -0,0 +1,115 @@
+import csv
+import io
+import os
+import tempfile
+import time
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+
+from pricing_monitor.services.csv_reader import CSVRowReader
+from pricing_monitor.services.feed_generator import write_synthetic_feed
+from pricing_monitor.services.parsers import FEED_COLUMNS, iter_feed_rows, parse_price
+
+
+REQUIRED = [column for _, column in FEED_COLUMNS]
+
+
+def legacy_to_decimal(value):
+    # to_decimal before the parsers module
+    try:
+        return Decimal(str(value).replace("₹", "").strip())
+    except Exception:
+        return None
+
+
+def legacy_path(path):
+    """
+    DictReader dict per row, to_decimal with exception handling.
+    """
+    parsed = 0
+    with open(path, "rb") as raw:
+        text = io.TextIOWrapper(raw, encoding="utf-8-sig", newline="")
+        for row in csv.DictReader(text):
+            if not all(row.get(column) for column in REQUIRED):
+                continue
+            row["SKU"].strip()
+            row["Product Name"].strip()
+            row["Category"].strip().title()
+            mrp = legacy_to_decimal(row["MRP"])
+            net_price = legacy_to_decimal(row["Net Price"])
+            if mrp is not None and net_price is not None:
+                parsed += 1
+    return parsed
+
+
+def compiled_path(path):
+    """
+    csv.reader lists, column indices resolved once, compiled parsers.
+    """
+    parsed = 0
+    with open(path, "rb") as raw:
+        for _, row in iter_feed_rows(CSVRowReader(raw)):
+            if not all(row):
+                continue
+            row.sku.strip()
+            row.name.strip()
+            row.category.strip().title()
+            mrp = parse_price(row.mrp)
+            net_price = parse_price(row.net_price)
+            if mrp is not None and net_price is not None:
+                parsed += 1
+    return parsed
+
+
+class Command(BaseCommand):
+    help = (
+        "Compares rows per second of the compiled feed parser with the "
+        "DictReader + to_decimal path it replaced"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=200_000)
+        parser.add_argument(
+            "--file",
+            help="Feed to parse instead of a generated one",
+        )
+        parser.add_argument(
+            "--plain",
+            action="store_true",
+            help="Generate plain numbers instead of '1,70,000' / '₹' / '%' values",
+        )
+        parser.add_argument("--repeat", type=int, default=3)
+
+    def handle(self, *args, **options):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = options["file"]
+            if not path:
+                path = write_synthetic_feed(
+                    os.path.join(tmp, "feed.csv"),
+                    options["rows"],
+                    formatted=not options["plain"],
+                )
+
+            results = {}
+            for label, run in (("dictreader+to_decimal", legacy_path),
+                               ("compiled", compiled_path)):
+                best = None
+                for _ in range(options["repeat"]):
+                    started = time.perf_counter()
+                    parsed = run(path)
+                    elapsed = time.perf_counter() - started
+                    best = elapsed if best is None else min(best, elapsed)
+                results[label] = (best, parsed)
+
+            with open(path, "rb") as raw:
+                rows = sum(1 for _ in CSVRowReader(raw).iter_values())
+
+        self.stdout.write(f"{rows} rows")
+        baseline = results["dictreader+to_decimal"][0]
+        for label, (elapsed, parsed) in results.items():
+            self.stdout.write(
+                f"{label:>22}: {rows / elapsed:>10.0f} rows/s  "
+                f"({parsed} rows with both prices parsed, "
+                f"{baseline / elapsed:.2f}x)"
+            )
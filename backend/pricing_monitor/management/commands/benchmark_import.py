@@ -0,0 +1,109 @@
+import json
+import subprocess
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from pricing_monitor.services.bulk_importer import DEFAULT_CHUNK_SIZE
+from pricing_monitor.services.import_benchmark import run_import_benchmark
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=settings.BASE_DIR,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class Command(BaseCommand):
+    help = (
+        "Imports a generated pricing feed through process_csv_upload and "
+        "reports rows/s, queries per row, peak memory and time per stage "
+        "as JSON. Writes to the configured database and removes its rows "
+        "afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=20_000)
+        parser.add_argument("--categories", type=int, default=10)
+        parser.add_argument("--subcategories", type=int, default=5)
+        parser.add_argument("--duplicate-rate", type=float, default=0.0)
+        parser.add_argument("--bad-rate", type=float, default=0.0)
+        parser.add_argument("--promotions", type=int, default=0)
+        parser.add_argument("--formatted", action="store_true")
+        parser.add_argument(
+            "--no-validation",
+            action="store_true",
+            help="Import into an empty catalog without price validation",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=DEFAULT_CHUNK_SIZE,
+            help="0 measures the row-by-row importer",
+        )
+        parser.add_argument("--workers", type=int, default=1)
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument(
+            "--trace-memory",
+            action="store_true",
+            help="Peak Python memory per stage (tracemalloc, much slower)",
+        )
+        parser.add_argument("--output", help="Also write the JSON result to this file")
+        parser.add_argument(
+            "--compare",
+            help="JSON result of an earlier run to compare rows/s and queries with",
+        )
+        parser.add_argument(
+            "--keep",
+            action="store_true",
+            help="Keep the imported products, categories and uploads",
+        )
+
+    def handle(self, *args, **options):
+        result = run_import_benchmark(
+            rows=options["rows"],
+            categories=options["categories"],
+            subcategories=options["subcategories"],
+            duplicate_rate=options["duplicate_rate"],
+            bad_rate=options["bad_rate"],
+            promotions=options["promotions"],
+            formatted=options["formatted"],
+            validate=not options["no_validation"],
+            chunk_size=options["chunk_size"],
+            workers=options["workers"],
+            seed=options["seed"],
+            trace_memory=options["trace_memory"],
+            keep=options["keep"],
+        )
+        result["git_commit"] = git_commit()
+
+        output = json.dumps(result, indent=2)
+        self.stdout.write(output)
+        if options["output"]:
+            with open(options["output"], "w", encoding="utf-8") as f:
+                f.write(output + "\n")
+
+        if options["compare"]:
+            with open(options["compare"], encoding="utf-8") as f:
+                self.compare(json.load(f), result)
+
+    def compare(self, before, after):
+        self.stderr.write(
+            f"vs {before.get('git_commit') or options_label(before)}:"
+        )
+        for key in ("rows_per_second", "queries_per_row", "wall_seconds", "peak_rss_kb"):
+            old, new = before.get(key), after.get(key)
+            if not old or new is None:
+                continue
+            self.stderr.write(f"  {key:>16}: {old} -> {new} ({new / old:.2f}x)")
+
+
+def options_label(result):
+    return result.get("created_at", "baseline")
@@ -0,0 +1,71 @@
+import os
+import tempfile
+import time
+
+from django.core.management.base import BaseCommand
+
+from pricing_monitor.services.bulk_importer import DEFAULT_CHUNK_SIZE
+from pricing_monitor.services.feed_generator import write_synthetic_feed
+from pricing_monitor.services.import_benchmark import cleanup_benchmark, upload_feed
+from pricing_monitor.services.parallel_import import process_csv_upload_parallel
+
+
+class Command(BaseCommand):
+    help = (
+        "Imports the same synthetic feed with 1..N worker processes and "
+        "reports how throughput scales. Writes to the configured database "
+        "and removes its rows afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=20_000)
+        parser.add_argument(
+            "--max-workers",
+            type=int,
+            default=os.cpu_count() or 1,
+        )
+        parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+        parser.add_argument(
+            "--keep",
+            action="store_true",
+            help="Keep the imported products, categories and uploads",
+        )
+
+    def handle(self, *args, **options):
+        rows = options["rows"]
+        run_id = int(time.time())
+
+        self.stdout.write(f"{'workers':>7}  {'seconds':>8}  {'rows/s':>9}  {'speedup':>7}")
+
+        baseline = None
+        with tempfile.TemporaryDirectory() as tmp:
+            for workers in range(1, options["max_workers"] + 1):
+                # Fresh SKUs per run, so every run creates the same rows
+                prefix = f"BENCH{run_id}W{workers}"
+                path = write_synthetic_feed(
+                    os.path.join(tmp, f"{prefix}.csv"),
+                    rows,
+                    sku_prefix=prefix,
+                )
+
+                upload = upload_feed(path, consider_price_validation=False)
+
+                started = time.perf_counter()
+                imported, skipped = process_csv_upload_parallel(
+                    upload,
+                    workers=workers,
+                    chunk_size=options["chunk_size"],
+                )
+                elapsed = time.perf_counter() - started
+
+                if baseline is None:
+                    baseline = elapsed
+                self.stdout.write(
+                    f"{workers:>7}  {elapsed:>8.2f}  {rows / elapsed:>9.0f}  "
+                    f"{baseline / elapsed:>6.2f}x"
+                )
+                if skipped:
+                    self.stderr.write(f"  {skipped} rows skipped, {imported} imported")
+
+                if not options["keep"]:
+                    cleanup_benchmark(prefix, [upload])
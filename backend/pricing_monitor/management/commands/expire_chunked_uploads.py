@@ -0,0 +1,26 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from pricing_monitor.services.chunked_upload import expire_chunked_uploads
+
+
+class Command(BaseCommand):
+    help = "Deletes abandoned chunked uploads and their part files"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--hours",
+            type=float,
+            default=None,
+            help="Age without a new chunk after which an unfinished upload "
+                 "is deleted (default: PRICING_CHUNKED_UPLOAD_EXPIRY)",
+        )
+
+    def handle(self, *args, **options):
+        older_than = None
+        if options["hours"] is not None:
+            older_than = timedelta(hours=options["hours"])
+
+        deleted = expire_chunked_uploads(older_than=older_than)
+        self.stdout.write(f"Deleted {deleted} abandoned chunked upload(s)")
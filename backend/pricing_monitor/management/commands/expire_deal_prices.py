@@ -0,0 +1,46 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from pricing_monitor.services.deal_expiry import (
+    DEFAULT_EXPIRY_BATCH_SIZE,
+    expire_deal_prices,
+    next_deal_expiry,
+)
+
+
+class Command(BaseCommand):
+    help = "Clears pricing-monitor deal prices whose validity window has closed"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--loop",
+            action="store_true",
+            help="Keep running and wake up when the next deal expires",
+        )
+        parser.add_argument(
+            "--max-sleep",
+            type=float,
+            default=60,
+            help="Longest wait between checks in --loop mode, so deals "
+                 "imported while sleeping are still picked up on time",
+        )
+        parser.add_argument("--batch-size", type=int, default=DEFAULT_EXPIRY_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        while True:
+            expired = expire_deal_prices(batch_size=options["batch_size"])
+            if expired:
+                self.stdout.write(f"Expired {expired} deal price(s)")
+
+            if not options["loop"]:
+                return
+
+            sleep = options["max_sleep"]
+            next_expiry = next_deal_expiry()
+            if next_expiry is not None:
+                until_next = (next_expiry - timezone.now()).total_seconds()
+                sleep = max(0, min(sleep, until_next))
+
+            time.sleep(sleep)
@@ -0,0 +1,72 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from pricing_monitor.services.feed_generator import write_synthetic_feed
+from pricing_monitor.services.import_benchmark import create_synthetic_promotions
+
+
+class Command(BaseCommand):
+    help = (
+        "Writes a synthetic pricing feed with the columns of "
+        "data/Pricing_Monitor.csv"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("output", help="Path of the CSV to write")
+        parser.add_argument("--rows", type=int, default=10_000)
+        parser.add_argument("--sku-prefix", default="SYN")
+        parser.add_argument("--categories", type=int, default=10)
+        parser.add_argument(
+            "--subcategories",
+            type=int,
+            default=5,
+            help="Sub-categories per category",
+        )
+        parser.add_argument(
+            "--duplicate-rate",
+            type=float,
+            default=0.0,
+            help="Share of rows repeating an earlier SKU (0-1)",
+        )
+        parser.add_argument(
+            "--bad-rate",
+            type=float,
+            default=0.0,
+            help="Share of rows with a value the importer rejects (0-1)",
+        )
+        parser.add_argument(
+            "--formatted",
+            action="store_true",
+            help="Write amounts as '1,70,000' / '₹' / '15%%'",
+        )
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument(
+            "--promotions",
+            type=int,
+            default=0,
+            help="Create active promotions on this many of the feed's categories",
+        )
+
+    def handle(self, *args, **options):
+        for rate in ("duplicate_rate", "bad_rate"):
+            if not 0 <= options[rate] <= 1:
+                raise CommandError(f"--{rate.replace('_', '-')} must be between 0 and 1")
+
+        write_synthetic_feed(
+            options["output"],
+            options["rows"],
+            sku_prefix=options["sku_prefix"],
+            categories=options["categories"],
+            subcategories=options["subcategories"],
+            duplicate_rate=options["duplicate_rate"],
+            bad_rate=options["bad_rate"],
+            formatted=options["formatted"],
+            seed=options["seed"],
+        )
+        self.stdout.write(f"Wrote {options['rows']} rows to {options['output']}")
+
+        if options["promotions"]:
+            created = create_synthetic_promotions(
+                options["sku_prefix"],
+                min(options["promotions"], options["categories"]),
+            )
+            self.stdout.write(f"Created {len(created)} active category promotions")
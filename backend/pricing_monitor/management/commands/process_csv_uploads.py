@@ -0,0 +1,68 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from pricing_monitor.services.bulk_importer import DEFAULT_CHUNK_SIZE
+from pricing_monitor.services.chunked_upload import expire_chunked_uploads
+from pricing_monitor.services.jobs import (
+    claim_next_upload,
+    default_worker_id,
+    run_upload,
+)
+
+
+class Command(BaseCommand):
+    help = "Background worker that processes queued ProductCSVUpload files"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Process everything that is queued, then exit",
+        )
+        parser.add_argument(
+            "--sleep",
+            type=float,
+            default=5,
+            help="Seconds to wait between polls when the queue is empty",
+        )
+        parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+        parser.add_argument("--worker-id", default=default_worker_id())
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=None,
+            help="Processes per upload (default: PRICING_IMPORT_WORKERS)",
+        )
+
+    def handle(self, *args, **options):
+        worker_id = options["worker_id"]
+        self.stdout.write(f"CSV worker {worker_id} started")
+
+        while True:
+            upload = claim_next_upload(worker_id)
+
+            if upload is None:
+                # Idle: clean up chunked uploads their clients abandoned
+                expired = expire_chunked_uploads()
+                if expired:
+                    self.stdout.write(f"Deleted {expired} abandoned chunked upload(s)")
+                if options["once"]:
+                    return
+                time.sleep(options["sleep"])
+                continue
+
+            self.stdout.write(f"Processing upload #{upload.id}: {upload.file.name}")
+            try:
+                imported, skipped = run_upload(
+                    upload,
+                    chunk_size=options["chunk_size"],
+                    workers=options["workers"],
+                )
+            except Exception as e:
+                self.stderr.write(f"Upload #{upload.id} failed: {e}")
+                continue
+
+            self.stdout.write(self.style.SUCCESS(
+                f"Upload #{upload.id} done: Imported {imported}, Skipped {skipped}"
+            ))
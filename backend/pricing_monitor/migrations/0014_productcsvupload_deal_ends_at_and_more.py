@@ -0,0 +1,23 @@
+# Generated by Django 6.0.1 on 2026-10-16 20:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pricing_monitor', '0013_productcsvupload_job_progress'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='productcsvupload',
+            name='deal_ends_at',
+            field=models.DateTimeField(blank=True, help_text='When imported deal prices expire (default: import time + PRICING_DEAL_PRICE_DURATION)', null=True),
+        ),
+        migrations.AddField(
+            model_name='productcsvupload',
+            name='deal_starts_at',
+            field=models.DateTimeField(blank=True, help_text='When imported deal prices go live (default: at import time)', null=True),
+        ),
+    ]
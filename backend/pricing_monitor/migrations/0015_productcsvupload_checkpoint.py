@@ -0,0 +1,43 @@
+# Generated by Django 6.0.1 on 2026-10-16 20:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pricing_monitor', '0014_productcsvupload_deal_ends_at_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='productcsvupload',
+            name='checkpoint_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='productcsvupload',
+            name='checkpoint_encoding',
+            field=models.CharField(blank=True, max_length=20),
+        ),
+        migrations.AddField(
+            model_name='productcsvupload',
+            name='checkpoint_imported',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='productcsvupload',
+            name='checkpoint_offset',
+            field=models.BigIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='productcsvupload',
+            name='checkpoint_row',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='productcsvupload',
+            name='checkpoint_skipped',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
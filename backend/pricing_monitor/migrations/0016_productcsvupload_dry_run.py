@@ -0,0 +1,28 @@
+# Generated by Django 6.0.1 on 2026-10-16 20:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pricing_monitor', '0015_productcsvupload_checkpoint'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='productcsvupload',
+            name='dry_run_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='productcsvupload',
+            name='dry_run_file',
+            field=models.FileField(blank=True, null=True, upload_to='pricing_monitor/dry_runs/'),
+        ),
+        migrations.AddField(
+            model_name='productcsvupload',
+            name='dry_run_summary',
+            field=models.JSONField(blank=True, null=True),
+        ),
+    ]
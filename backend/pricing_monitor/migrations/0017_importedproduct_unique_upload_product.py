@@ -0,0 +1,38 @@
+# Generated by Django 6.0.1 on 2026-10-16 21:00
+
+from django.db import migrations, models
+from django.db.models import Max
+
+
+def drop_duplicate_imports(apps, schema_editor):
+    """
+    update_or_create could leave several rows for one product and upload.
+    Keep the latest (it holds the prices that were applied).
+    """
+    ImportedProduct = apps.get_model("pricing_monitor", "ImportedProduct")
+    duplicates = (
+        ImportedProduct.objects.values("csv_upload_id", "product_id")
+        .annotate(keep=Max("id"), rows=models.Count("id"))
+        .filter(rows__gt=1)
+    )
+    for group in duplicates:
+        ImportedProduct.objects.filter(
+            csv_upload_id=group["csv_upload_id"],
+            product_id=group["product_id"],
+        ).exclude(id=group["keep"]).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0011_product_deal_price_ends_at_and_more'),
+        ('pricing_monitor', '0016_productcsvupload_dry_run'),
+    ]
+
+    operations = [
+        migrations.RunPython(drop_duplicate_imports, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='importedproduct',
+            constraint=models.UniqueConstraint(fields=('csv_upload', 'product'), name='unique_imported_product_per_upload'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 6.0.1 on 2026-10-16 21:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pricing_monitor', '0017_importedproduct_unique_upload_product'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='productcsvupload',
+            name='duplicate_sku_policy',
+            field=models.CharField(choices=[('last', 'Import the last row'), ('first', 'Import the first row'), ('reject', 'Reject every row of the SKU')], default='last', help_text='Which row is imported when the file lists a SKU more than once', max_length=10),
+        ),
+    ]
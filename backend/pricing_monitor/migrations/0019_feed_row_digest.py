@@ -0,0 +1,46 @@
+# Generated by Django 6.0.1 on 2026-10-16 21:06
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pricing_monitor', '0018_productcsvupload_duplicate_sku_policy'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='csvimportlog',
+            name='unchanged',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='productcsvupload',
+            name='content_digest',
+            field=models.CharField(blank=True, db_index=True, max_length=64),
+        ),
+        migrations.AddField(
+            model_name='productcsvupload',
+            name='duplicate_of',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='pricing_monitor.productcsvupload'),
+        ),
+        migrations.AddField(
+            model_name='productcsvupload',
+            name='feed_key',
+            field=models.CharField(blank=True, db_index=True, help_text="Uploads of the same supplier feed share a key; rows that did not change since the feed's last import are not processed again", max_length=100),
+        ),
+        migrations.CreateModel(
+            name='FeedRowDigest',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('feed_key', models.CharField(max_length=100)),
+                ('sku', models.CharField(max_length=100)),
+                ('digest', models.BigIntegerField()),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('feed_key', 'sku'), name='unique_feed_row_digest')],
+            },
+        ),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 6.0.1 on 2026-10-16 21:18
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pricing_monitor', '0019_feed_row_digest'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='csvimportlog',
+            name='bytes_read',
+            field=models.BigIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='csvimportlog',
+            name='csv_upload',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='import_logs', to='pricing_monitor.productcsvupload'),
+        ),
+        migrations.AddField(
+            model_name='csvimportlog',
+            name='duration_seconds',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='csvimportlog',
+            name='peak_memory_kb',
+            field=models.IntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='csvimportlog',
+            name='queries',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='csvimportlog',
+            name='stage_timings',
+            field=models.JSONField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 6.0.1 on 2026-10-16 21:40
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pricing_monitor', '0021_chunked_upload'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='productcsvupload',
+            name='archive',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='archive_feeds', to='pricing_monitor.productcsvupload'),
+        ),
+        migrations.AddField(
+            model_name='productcsvupload',
+            name='archive_member',
+            field=models.CharField(blank=True, max_length=255),
+        ),
+    ]
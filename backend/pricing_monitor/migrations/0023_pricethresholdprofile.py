@@ -0,0 +1,28 @@
+# Generated by Django 6.0.1 on 2026-10-16 22:05
+
+from decimal import Decimal
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pricing_monitor', '0022_productcsvupload_archive'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PriceThresholdProfile',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, unique=True)),
+                ('min_discount', models.DecimalField(decimal_places=2, default=Decimal('5'), max_digits=5)),
+                ('max_discount', models.DecimalField(decimal_places=2, default=Decimal('50'), max_digits=5)),
+                ('min_margin', models.DecimalField(decimal_places=2, default=Decimal('15'), max_digits=5)),
+                ('max_margin', models.DecimalField(decimal_places=2, default=Decimal('80'), max_digits=5)),
+                ('low_price', models.DecimalField(decimal_places=2, default=Decimal('10'), help_text='Net prices below this are suspiciously low', max_digits=10)),
+                ('high_price', models.DecimalField(decimal_places=2, default=Decimal('200'), help_text='Net prices above this are flagged when their margin is low', max_digits=10)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
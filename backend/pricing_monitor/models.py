@@ -1,4 +1,5 @@
 from django.db import models
+import uuid
 from decimal import Decimal
 
 # from checkout import admin
@@ -30,17 +31,109 @@ class SkippedPriceImport(models.Model):
         return f"{self.sku} - Row {self.row_number}"
 
 class ProductCSVUpload(models.Model):
+    STATUS_PENDING = "pending"
+    STATUS_UPLOADED = "uploaded"      # queued for the background worker
+    STATUS_PROCESSING = "processing"
+    STATUS_PROCESSED = "processed"
+    STATUS_FAILED = "failed"
+
+    # What to do with a SKU that appears on several rows of one file
+    DUPLICATE_SKU_LAST = "last"
+    DUPLICATE_SKU_FIRST = "first"
+    DUPLICATE_SKU_REJECT = "reject"
+    DUPLICATE_SKU_CHOICES = [
+        (DUPLICATE_SKU_LAST, "Import the last row"),
+        (DUPLICATE_SKU_FIRST, "Import the first row"),
+        (DUPLICATE_SKU_REJECT, "Reject every row of the SKU"),
+    ]
+
     # file = models.FileField(upload_to="csv_uploads/", blank=True, null=True)
     file = models.FileField(upload_to='pricing_monitor/uploads/', blank=True, null=True)
     uploaded_at = models.DateTimeField(auto_now_add=True)
     processed = models.BooleanField(default=False)
-    status = models.CharField(max_length=20, default='pending')
+    status = models.CharField(max_length=20, default='pending', db_index=True)
+
+    # Background job progress (see services/jobs.py)
+    claimed_by = models.CharField(max_length=100, blank=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    heartbeat_at = models.DateTimeField(null=True, blank=True)
+    rows_done = models.PositiveIntegerField(default=0)
+    rows_total = models.PositiveIntegerField(null=True, blank=True)
+    rows_per_second = models.FloatField(null=True, blank=True)
+    error = models.TextField(blank=True)
+
+    # Committed-row checkpoint, written in the same transaction as each
+    # chunk (see services/checkpoint.py)
+    checkpoint_at = models.DateTimeField(null=True, blank=True)
+    checkpoint_row = models.PositiveIntegerField(default=0)
+    checkpoint_offset = models.BigIntegerField(null=True, blank=True)
+    checkpoint_encoding = models.CharField(max_length=20, blank=True)
+    checkpoint_imported = models.PositiveIntegerField(default=0)
+    checkpoint_skipped = models.PositiveIntegerField(default=0)
+
+    # Last dry run (see services/dry_run.py)
+    dry_run_at = models.DateTimeField(null=True, blank=True)
+    dry_run_summary = models.JSONField(null=True, blank=True)
+    dry_run_file = models.FileField(
+        upload_to="pricing_monitor/dry_runs/",
+        blank=True,
+        null=True,
+    )
 
     consider_price_validation = models.BooleanField(
         default=True,
         help_text="If unchecked, CSV prices will be imported without validation"
     )
 
+    feed_key = models.CharField(
+        max_length=100,
+        blank=True,
+        db_index=True,
+        help_text="Uploads of the same supplier feed share a key; rows that "
+                  "did not change since the feed's last import are not processed again"
+    )
+    # SHA-256 of the file: an identical re-upload is not processed twice
+    content_digest = models.CharField(max_length=64, blank=True, db_index=True)
+    duplicate_of = models.ForeignKey(
+        "self",
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="+",
+    )
+
+    # One feed of a .zip upload (see services/feed_archive.py): it reads
+    # ``archive_member`` of the archive's file and is processed in the
+    # archive's job
+    archive = models.ForeignKey(
+        "self",
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name="archive_feeds",
+    )
+    archive_member = models.CharField(max_length=255, blank=True)
+
+    duplicate_sku_policy = models.CharField(
+        max_length=10,
+        choices=DUPLICATE_SKU_CHOICES,
+        default=DUPLICATE_SKU_LAST,
+        help_text="Which row is imported when the file lists a SKU more than once"
+    )
+
+    deal_starts_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        help_text="When imported deal prices go live (default: at import time)"
+    )
+    deal_ends_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        help_text="When imported deal prices expire "
+                  "(default: import time + PRICING_DEAL_PRICE_DURATION)"
+    )
+
     # min_net_price_percent = models.DecimalField(
     #     max_digits=5,
     #     decimal_places=2,
@@ -51,15 +144,45 @@ class ProductCSVUpload(models.Model):
     def __str__(self):
         return f"Upload #{self.id}"
 
+    @property
+    def feed_name(self):
+        if self.archive_member:
+            return f"{self.file.name}:{self.archive_member}"
+        return self.file.name
+
+    @property
+    def progress_percent(self):
+        if not self.rows_total:
+            return None
+        return round(self.rows_done * 100 / self.rows_total, 1)
+
 # @admin.register(ProductCSVUpload)
 # class ProductCSVUploadAdmin(admin.ModelAdmin):
 #     list_display = ("id", "file", "processed", "consider_price_validation", "uploaded_at")
 #     list_filter = ("processed", "consider_price_validation")
 
 class CSVImportLog(models.Model):
+    csv_upload = models.ForeignKey(
+        ProductCSVUpload,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="import_logs"
+    )
     file_name = models.CharField(max_length=255)
     imported = models.IntegerField()
     skipped = models.IntegerField()
+    # Rows identical to the feed's previous import, not processed again
+    unchanged = models.IntegerField(default=0)
+
+    # 📊 Import metrics (see services/import_metrics.py)
+    duration_seconds = models.FloatField(null=True, blank=True)
+    queries = models.IntegerField(default=0)
+    bytes_read = models.BigIntegerField(null=True, blank=True)
+    peak_memory_kb = models.IntegerField(null=True, blank=True)
+    # stage -> {"seconds", "queries", "calls", "peak_memory_kb"}
+    stage_timings = models.JSONField(null=True, blank=True)
+
     created_at = models.DateTimeField(auto_now_add=True)
 
 
@@ -80,5 +203,84 @@ class ImportedProduct(models.Model):
 
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        constraints = [
+            # One row per product and upload; the importers upsert on it
+            models.UniqueConstraint(
+                fields=["csv_upload", "product"],
+                name="unique_imported_product_per_upload",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.product.sku} (Upload {self.csv_upload.id})"
+
+
+# Digest of the last imported row of each SKU of a feed
+# (see services/feed_digest.py)
+class FeedRowDigest(models.Model):
+    feed_key = models.CharField(max_length=100)
+    sku = models.CharField(max_length=100)
+    digest = models.BigIntegerField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["feed_key", "sku"],
+                name="unique_feed_row_digest",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.feed_key}: {self.sku}"
+
+
+class PriceThresholdProfile(models.Model):
+    # Import price thresholds for a part of the catalog (see
+    # services/threshold_profiles.py). A category uses its own profile or
+    # the nearest ancestor's; the defaults are the frontend's
+    name = models.CharField(max_length=100, unique=True)
+    min_discount = models.DecimalField(max_digits=5, decimal_places=2, default=Decimal("5"))
+    max_discount = models.DecimalField(max_digits=5, decimal_places=2, default=Decimal("50"))
+    min_margin = models.DecimalField(max_digits=5, decimal_places=2, default=Decimal("15"))
+    max_margin = models.DecimalField(max_digits=5, decimal_places=2, default=Decimal("80"))
+    low_price = models.DecimalField(
+        max_digits=10,
+        decimal_places=2,
+        default=Decimal("10"),
+        help_text="Net prices below this are suspiciously low"
+    )
+    high_price = models.DecimalField(
+        max_digits=10,
+        decimal_places=2,
+        default=Decimal("200"),
+        help_text="Net prices above this are flagged when their margin is low"
+    )
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return self.name
+
+
+class ChunkedUpload(models.Model):
+    # A file sent in byte ranges (see services/chunked_upload.py); the
+    # ProductCSVUpload is created once the whole file checks out
+    token = models.UUIDField(default=uuid.uuid4, unique=True, editable=False)
+    file_name = models.CharField(max_length=255)
+    size = models.BigIntegerField()
+    received = models.BigIntegerField(default=0)
+    # Storage name of the partial file, appended to chunk by chunk
+    part_file = models.CharField(max_length=255, blank=True)
+    feed_key = models.CharField(max_length=100, blank=True)
+    csv_upload = models.OneToOneField(
+        ProductCSVUpload,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="chunked_upload",
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
     def __str__(self):
-        return f"{self.product.sku} (Upload {self.csv_upload.id})"
\ No newline at end of file
+        return f"{self.file_name} ({self.received}/{self.size} bytes)"
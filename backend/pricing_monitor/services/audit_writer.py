@@ -0,0 +1,75 @@
+# pricing_monitor/services/audit_writer.py
+from pricing_monitor.models import ImportedProduct, SkippedPriceImport
+
+
+DEFAULT_AUDIT_BATCH_SIZE = 500
+
+IMPORTED_PRODUCT_FIELDS = ["mrp", "previous_price", "updated_price"]
+
+
+class AuditWriter:
+    """
+    Buffers the SkippedPriceImport / ImportedProduct rows of an upload and
+    writes them in bulk: skips with one bulk_create, imports with one
+    upsert on (csv_upload, product).
+
+    The buffer is flushed when it holds ``batch_size`` records, and by the
+    caller at the end of each chunk (so audit rows commit together with
+    the prices they describe) and at the end of the import.
+    """
+
+    def __init__(self, csv_upload, batch_size=DEFAULT_AUDIT_BATCH_SIZE):
+        self.csv_upload = csv_upload
+        self.batch_size = batch_size
+        self.skipped_rows = []
+        self.imported_rows = {}   # product id -> ImportedProduct
+
+    def __len__(self):
+        return len(self.skipped_rows) + len(self.imported_rows)
+
+    def skip(self, row_number, sku, product_name, mrp, price, reason, suggestion,
+             current_sale_price=None):
+        self.add_skip(SkippedPriceImport(
+            row_number=row_number,
+            sku=sku,
+            product_name=product_name,
+            mrp=mrp or 0,
+            price=price or 0,
+            current_sale_price=current_sale_price,
+            reason=reason,
+            suggestion=suggestion,
+        ))
+
+    def add_skip(self, record):
+        self.skipped_rows.append(record)
+        self.flush_if_full()
+
+    def imported(self, product, mrp, previous_price, updated_price):
+        # Same product twice in one upload: the last row wins, as it did
+        # with update_or_create
+        self.imported_rows[product.id] = ImportedProduct(
+            csv_upload=self.csv_upload,
+            product=product,
+            mrp=mrp,
+            previous_price=previous_price,
+            updated_price=updated_price,
+        )
+        self.flush_if_full()
+
+    def flush_if_full(self):
+        if self.batch_size and len(self) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if self.skipped_rows:
+            SkippedPriceImport.objects.bulk_create(self.skipped_rows)
+            self.skipped_rows = []
+
+        if self.imported_rows:
+            ImportedProduct.objects.bulk_create(
+                self.imported_rows.values(),
+                update_conflicts=True,
+                unique_fields=["csv_upload", "product"],
+                update_fields=IMPORTED_PRODUCT_FIELDS,
+            )
+            self.imported_rows = {}
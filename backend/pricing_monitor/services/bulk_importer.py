@@ -0,0 +1,601 @@
+# pricing_monitor/services/bulk_importer.py
+from itertools import islice
+
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from django.utils.text import slugify
+
+from catalog.models import Product
+from catalog.utils import CategoryResolver
+from pricing_monitor.models import CSVImportLog
+from promotions.price_snapshots import refresh_price_snapshots
+from .audit_writer import AuditWriter
+from .csv_processor import NOT_A_NUMBER_SUGGESTION
+from .checkpoint import ImportCheckpoint
+from .deal_expiry import deal_window
+from .duplicates import DUPLICATE_SKU_SUGGESTION, scan_upload
+from .feed_digest import load_row_digests, row_digest, save_row_digests
+from .import_metrics import ImportMetrics
+from .parsers import FEED_COLUMNS, iter_feed_rows, parse_price
+from .price_rules import price_rejections
+from .promotion_snapshot import PromotionSnapshot
+from .threshold_profiles import ThresholdTable
+
+
+DEFAULT_CHUNK_SIZE = 1000
+
+BASE_REQUIRED_COLUMNS = ["SKU", "Product Name", "Category", "Sub-category"]
+
+
+def iter_chunks(rows, chunk_size):
+    """
+    Splits an iterable of rows into lists of at most ``chunk_size`` rows.
+    """
+    rows = iter(rows)
+    while True:
+        chunk = list(islice(rows, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def process_csv_upload_in_chunks(csv_upload, chunk_size=DEFAULT_CHUNK_SIZE,
+                                 on_progress=None, resume=False, metrics=None):
+    """
+    Set-based version of process_csv_upload.
+
+    Each chunk is imported in one transaction with a fixed number of
+    queries: products are preloaded by SKU, categories resolved from an
+    in-memory map and all writes go through bulk_create / bulk_update.
+
+    With a ``feed_key`` on the upload, rows identical to that feed's last
+    import are neither imported nor skipped; the log counts them as
+    ``unchanged``.
+
+    Every chunk transaction also moves the upload's checkpoint. With
+    ``resume=True`` the import continues after the last committed row of
+    an interrupted run instead of starting over.
+
+    ``on_progress(rows_done)`` is called after every committed chunk.
+    Time and queries per stage are added to ``metrics`` (ImportMetrics)
+    and stored on the CSVImportLog.
+    """
+    metrics = metrics or ImportMetrics()
+    checkpoint = ImportCheckpoint(csv_upload, resume=resume)
+
+    with metrics.measure():
+        # Always over the whole file, so a resumed run keeps the same rows
+        with metrics.stage("duplicates"):
+            duplicates = scan_upload(csv_upload, metrics=metrics)
+        reader = checkpoint.reader()
+
+        def on_commit(rows, imported, skipped):
+            checkpoint.commit(reader, rows, imported, skipped)
+
+        def report_progress(_):
+            # Rows of earlier attempts count too
+            on_progress(checkpoint.rows_done)
+
+        import_rows(
+            csv_upload,
+            iter_feed_rows(reader),
+            chunk_size=chunk_size,
+            on_progress=report_progress if on_progress else None,
+            on_commit=on_commit,
+            window=deal_window(csv_upload, now=checkpoint.started_at),
+            promotions_at=checkpoint.started_at,
+            duplicates=duplicates,
+            metrics=metrics,
+        )
+        metrics.bytes_read += reader.bytes_read
+
+    CSVImportLog.objects.create(
+        csv_upload=csv_upload,
+        file_name=csv_upload.feed_name,
+        imported=checkpoint.imported,
+        skipped=checkpoint.skipped,
+        unchanged=checkpoint.rows_done - checkpoint.imported - checkpoint.skipped,
+        **metrics.log_fields(),
+    )
+
+    return checkpoint.imported, checkpoint.skipped
+
+
+def import_rows(csv_upload, rows, chunk_size=DEFAULT_CHUNK_SIZE,
+                on_progress=None, on_commit=None, window=None,
+                promotions_at=None, duplicates=None, metrics=None):
+    """
+    Imports ``(row_number, FeedRow)`` pairs chunk by chunk and returns
+    ``(imported, skipped)``. Does not write a CSVImportLog.
+
+    ``on_commit(rows, imported, skipped)`` runs inside each chunk
+    transaction, after the chunk's writes.
+
+    ``window`` and ``promotions_at`` let several processes importing parts
+    of the same upload share one deal window and one promotion timestamp.
+
+    ``duplicates`` (a DuplicateSKUs pre-pass over all of ``rows``) decides
+    which row of a repeated SKU is imported.
+    """
+    imported = 0
+    skipped = 0
+    rows_done = 0
+    window = window or deal_window(csv_upload)
+    metrics = metrics or ImportMetrics()
+
+    # One promotion snapshot and one threshold table per upload: every
+    # chunk validates against the same point in time
+    promotions = None
+    thresholds = None
+    if getattr(csv_upload, "consider_price_validation", False):
+        promotions = PromotionSnapshot(at=promotions_at)
+        thresholds = ThresholdTable()
+
+    categories = CategoryResolver()
+    chunks = iter_chunks(rows, chunk_size)
+
+    while True:
+        # Reading and parsing the feed happens as the chunk is taken
+        with metrics.stage("parse"):
+            chunk = next(chunks, None)
+        if chunk is None:
+            break
+
+        with transaction.atomic():
+            chunk_imported, chunk_skipped = ChunkImport(
+                csv_upload,
+                chunk,
+                deal_window=window,
+                promotions=promotions,
+                thresholds=thresholds,
+                categories=categories,
+                duplicates=duplicates,
+                metrics=metrics,
+            ).run()
+            if on_commit:
+                on_commit(len(chunk), chunk_imported, chunk_skipped)
+        imported += chunk_imported
+        skipped += chunk_skipped
+        rows_done += len(chunk)
+
+        if on_progress:
+            on_progress(rows_done)
+
+    return imported, skipped
+
+
+class ChunkImport:
+    """
+    Imports one chunk of ``(row_number, FeedRow)`` pairs.
+
+    Rows are decided one by one against in-memory state, in the same order
+    and with the same rules as the row-by-row importer, and the resulting
+    writes are flushed in bulk at the end.
+    """
+
+    def __init__(self, csv_upload, rows, deal_window=None, promotions=None,
+                 thresholds=None, categories=None, duplicates=None, metrics=None):
+        self.csv_upload = csv_upload
+        self.metrics = metrics or ImportMetrics()
+        self.duplicates = duplicates
+        # Rows are compared with the feed's last import (see feed_digest)
+        self.feed_key = getattr(csv_upload, "feed_key", "")
+        self.rows = rows
+        self.deal_starts_at, self.deal_ends_at = deal_window or (None, None)
+        self.validate = getattr(csv_upload, "consider_price_validation", False)
+        self.promotions = promotions
+        if self.validate and promotions is None:
+            self.promotions = PromotionSnapshot()
+        # Thresholds per category (see threshold_profiles)
+        self.thresholds = thresholds
+        if self.validate and thresholds is None:
+            self.thresholds = ThresholdTable()
+        self.categories = categories or CategoryResolver()
+
+        required_columns = list(BASE_REQUIRED_COLUMNS)
+        if self.validate:
+            required_columns.extend(["MRP", "Net Price"])
+        # (position in FeedRow, column name)
+        self.required_fields = [
+            (position, column)
+            for position, (_, column) in enumerate(FEED_COLUMNS)
+            if column in required_columns
+        ]
+
+        self.now = timezone.now()
+
+        self.products = {}           # sku -> Product (saved or pending)
+        self.new_products = {}       # sku -> pending Product
+        self.changed_products = {}   # sku -> existing Product with new price
+        self.used_slugs = set()
+        self.imported_rows = {}      # sku -> ImportedProduct defaults
+        self.new_product_rows = {}   # sku -> rows imported into a new Product
+        self.row_digests = {}        # sku -> digest of the feed's last import
+        self.digests = {}            # row number -> digest, rows to process
+        self.unchanged_rows = set()  # row numbers identical to the last import
+        self.new_digests = {}        # sku -> digest of the row applied now
+        self.rule_rejections = {}    # row number -> (reason, suggestion)
+        self.row_prices = {}         # row number -> parsed (mrp, net price)
+        # Flushed only in write(), so audit writes are timed on their own
+        self.audit = AuditWriter(csv_upload, batch_size=None)
+
+        self.imported = 0
+        self.skipped = 0
+
+    def run(self):
+        with self.metrics.stage("preload"):
+            self.preload()
+
+        with self.metrics.stage("validation"):
+            if self.validate:
+                self.evaluate_rules(self.rows)
+            for index, row in self.rows:
+                self.import_row(index, row)
+
+        self.write()
+        return self.imported, self.skipped
+
+    # ------------------------------------------------------------------
+    # PRELOAD (one query per model, independent of the chunk size)
+    # ------------------------------------------------------------------
+    def preload(self):
+        rows = self.rows
+        if self.feed_key:
+            rows = self.preload_digests()
+
+        skus = set()
+        names = set()
+
+        for _, row in rows:
+            sku = (row.sku or "").strip()
+            if sku:
+                skus.add(sku)
+            names.add(slugify((row.name or "").strip()))
+
+        for product in Product.objects.filter(sku__in=skus):
+            self.products[product.sku] = product
+
+        self.used_slugs = set(
+            Product.objects.filter(slug__in=names).values_list("slug", flat=True)
+        )
+
+    def preload_digests(self):
+        """
+        Finds the rows identical to the feed's last import whose product
+        still has that price, and returns the other rows. Only the prices
+        of the unchanged products are loaded.
+        """
+        digests = {}
+        for index, row in self.rows:
+            digests[index] = row_digest(row)
+
+        skus = {(row.sku or "").strip() for _, row in self.rows}
+        self.row_digests = load_row_digests(self.feed_key, skus)
+        # The product may have been edited or its deal expired since
+        prices = dict(
+            Product.objects
+            .filter(sku__in=self.row_digests)
+            .values_list("sku", "sale_price")
+        )
+
+        remaining = []
+        for index, row in self.rows:
+            sku = (row.sku or "").strip()
+            digest = digests[index]
+            if (
+                self.row_digests.get(sku) == digest
+                and prices.get(sku) is not None
+                and prices[sku] == parse_price(row.net_price)
+            ):
+                self.unchanged_rows.add(index)
+            else:
+                self.digests[index] = digest
+                remaining.append((index, row))
+        return remaining
+
+    def evaluate_rules(self, rows):
+        """
+        Runs the threshold rules (see price_rules) over ``rows`` in one
+        vectorised pass, using the thresholds of each product's category
+        (see threshold_profiles). Keeps the rejected rows for import_row,
+        along with every row's parsed prices so they are parsed only once. Rows
+        whose SKU is unknown or whose Net Price is not a number are left
+        out; import_row rejects them for that first.
+        """
+        indices = []
+        mrps = []
+        net_prices = []
+        current_prices = []
+        category_ids = []
+
+        for index, row in rows:
+            mrp = parse_price(row.mrp)
+            net_price = parse_price(row.net_price)
+            self.row_prices[index] = (mrp, net_price)
+
+            product = self.products.get((row.sku or "").strip())
+            if product is None or net_price is None:
+                continue
+            current_sale_price = self.promotions.current_sale_price(product)
+            if current_sale_price is None:
+                current_sale_price = mrp
+
+            indices.append(index)
+            mrps.append(mrp)
+            net_prices.append(net_price)
+            current_prices.append(current_sale_price)
+            category_ids.append(product.subcategory_id or product.category_id)
+
+        if not indices:
+            return
+        rejections = price_rejections(
+            mrps, net_prices, current_prices,
+            thresholds=self.thresholds.lookup(category_ids),
+        )
+        for position, rejection in rejections.items():
+            self.rule_rejections[indices[position]] = rejection
+
+    # ------------------------------------------------------------------
+    # ROW DECISIONS (in memory)
+    # ------------------------------------------------------------------
+    def import_row(self, index, row):
+        mrp = None
+        net_price = None
+
+        # 1️⃣ Required columns validation
+        for position, column in self.required_fields:
+            if not row[position]:
+                self.skip(
+                    index, row.sku or "", row.name or "", None, None,
+                    reason=f"Missing required column: {column}",
+                    suggestion="Check CSV format or values",
+                )
+                return
+
+        # 🔁 Only one row per SKU reaches the database
+        if self.duplicates:
+            reason = self.duplicates.skip_reason(index, row.sku.strip())
+            if reason:
+                self.skip(
+                    index, row.sku.strip(), row.name.strip(), None, None,
+                    reason=reason,
+                    suggestion=DUPLICATE_SKU_SUGGESTION,
+                )
+                return
+
+        # ⏩ Same row as the feed's last import: nothing to validate or write
+        if index in self.unchanged_rows:
+            return
+        digest = self.digests.get(index)
+
+        try:
+            sku = row.sku.strip()
+            name = row.name.strip()
+            category_name = row.category.strip().title()
+            subcategory_name = row.subcategory.strip().title()
+
+            prices = self.row_prices.get(index)
+            if prices is None:
+                prices = parse_price(row.mrp), parse_price(row.net_price)
+            mrp, net_price = prices
+
+            # 🔒 Price validation against the current sale price
+            if self.validate:
+                product = self.products.get(sku)
+                if not product:
+                    self.skip(
+                        index, sku, name, mrp, net_price,
+                        reason="SKU not found in catalog",
+                        suggestion="Create the product before importing its price",
+                    )
+                    return
+
+                current_sale_price = self.promotions.current_sale_price(product)
+                if current_sale_price is None:
+                    current_sale_price = mrp
+
+                if net_price is None:
+                    self.skip(
+                        index, sku, name, mrp, net_price,
+                        current_sale_price=current_sale_price,
+                        reason=f"Net Price '{row.net_price}' is not a number",
+                        suggestion=NOT_A_NUMBER_SUGGESTION,
+                    )
+                    return
+
+                if net_price < current_sale_price:
+                    self.skip(
+                        index, sku, name, mrp, net_price,
+                        current_sale_price=current_sale_price,
+                        reason=(
+                            f"CSV Net Price ({net_price}) is lower than "
+                            f"current sale price ({current_sale_price})"
+                        ),
+                        suggestion="Increase Net Price to match or exceed current sale price",
+                    )
+                    return
+
+                # 📏 Discount / margin / price thresholds
+                rejection = self.rule_rejections.get(index)
+                if rejection:
+                    reason, suggestion = rejection
+                    self.skip(
+                        index, sku, name, mrp, net_price,
+                        current_sale_price=current_sale_price,
+                        reason=reason,
+                        suggestion=suggestion,
+                    )
+                    return
+
+            # 2️⃣ CATEGORY / 3️⃣ SUBCATEGORY
+            category = self.categories.resolve(category_name)
+            subcategory = None
+            if subcategory_name:
+                subcategory = self.categories.resolve(subcategory_name, parent=category)
+
+            # 4️⃣ PRODUCT UPSERT
+            product = self.products.get(sku)
+            created = product is None
+            if created:
+                product = self.new_product(sku, name, category, subcategory, mrp)
+
+            previous_price = product.sale_price or product.mrp
+            if net_price is not None and previous_price == net_price:
+                self.unchanged(index, sku, name, mrp, net_price)
+                self.remember_digest(sku, digest)
+                return
+
+            if net_price is not None:
+                product.sale_price = net_price
+            product.is_deal_price = True
+            product.deal_price_starts_at = self.deal_starts_at
+            product.deal_price_ends_at = self.deal_ends_at
+            product.is_active = True
+
+            if sku not in self.new_products:
+                self.changed_products[sku] = product
+
+            # 5️⃣ TRACK IMPORT
+            self.track_import(index, sku, name, created, mrp, previous_price, net_price)
+            self.remember_digest(sku, digest)
+
+        except Exception as e:
+            self.skip(
+                index, row.sku or "", row.name or "", mrp, net_price,
+                reason=str(e),
+                suggestion="Check CSV format or values",
+            )
+
+    def remember_digest(self, sku, digest):
+        if digest is not None:
+            self.new_digests[sku] = digest
+
+    def track_import(self, index, sku, name, created, mrp, previous_price, net_price):
+        self.imported_rows[sku] = {
+            "mrp": mrp,
+            "previous_price": previous_price if not created else None,
+            "updated_price": net_price,
+        }
+
+        self.imported += 1
+        if sku in self.new_products:
+            self.new_product_rows.setdefault(sku, []).append(
+                (index, name, mrp, net_price)
+            )
+
+    def unchanged(self, index, sku, name, mrp, net_price):
+        self.skip(
+            index, sku, name, mrp, net_price,
+            reason="CSV net price is same as current sale price",
+            suggestion="Change price to create a new update",
+        )
+
+    def new_product(self, sku, name, category, subcategory, mrp):
+        slug = slugify(name)
+        if mrp is None:
+            raise ValueError("MRP is required to create a new product")
+        if slug in self.used_slugs:
+            raise ValueError(f"Product slug '{slug}' already exists")
+
+        product = self.build_product(sku, name, slug, category, subcategory, mrp)
+        self.used_slugs.add(slug)
+        self.products[sku] = product
+        self.new_products[sku] = product
+        return product
+
+    def build_product(self, sku, name, slug, category, subcategory, mrp):
+        return Product(
+            sku=sku,
+            name=name,
+            slug=slug,
+            category=category,
+            subcategory=subcategory,
+            mrp=mrp,
+        )
+
+    def skip(self, index, sku, name, mrp, net_price, reason, suggestion,
+             current_sale_price=None):
+        self.audit.skip(
+            index, sku, name, mrp, net_price,
+            reason=reason,
+            suggestion=suggestion,
+            current_sale_price=current_sale_price,
+        )
+        self.skipped += 1
+
+    # ------------------------------------------------------------------
+    # BULK WRITES
+    # ------------------------------------------------------------------
+    def write(self):
+        with self.metrics.stage("categories"):
+            self.categories.flush()
+
+        with self.metrics.stage("products"):
+            self.create_products()
+
+            for product in self.changed_products.values():
+                product.updated_at = self.now
+            Product.objects.bulk_update(
+                self.changed_products.values(),
+                [
+                    "sale_price",
+                    "is_deal_price",
+                    "deal_price_starts_at",
+                    "deal_price_ends_at",
+                    "is_active",
+                    "updated_at",
+                ],
+            )
+
+        with self.metrics.stage("audit"):
+            for sku, defaults in self.imported_rows.items():
+                self.audit.imported(self.products[sku], **defaults)
+            self.audit.flush()
+
+            if self.new_digests:
+                save_row_digests(self.feed_key, self.new_digests)
+
+        # bulk writes send no signals: reprice the chunk's products here
+        with self.metrics.stage("snapshots"):
+            refresh_price_snapshots(
+                {**self.changed_products, **self.new_products}.values()
+            )
+
+    def create_products(self):
+        new_products = list(self.new_products.values())
+        for product in new_products:
+            product.category_id = product.category.id
+            if product.subcategory is not None:
+                product.subcategory_id = product.subcategory.id
+
+        try:
+            with transaction.atomic():
+                Product.objects.bulk_create(new_products)
+        except IntegrityError:
+            # Another import (e.g. a parallel shard of the same upload)
+            # took a slug after preload: insert one by one and turn the
+            # rows of the products that lost into skips
+            for product in new_products:
+                try:
+                    with transaction.atomic():
+                        product.save(force_insert=True)
+                except IntegrityError as e:
+                    self.reject_new_product(product, e)
+
+    def reject_new_product(self, product, error):
+        reason = str(error)
+        if Product.objects.filter(slug=product.slug).exists():
+            reason = f"Product slug '{product.slug}' already exists"
+
+        del self.new_products[product.sku]
+        del self.products[product.sku]
+        self.imported_rows.pop(product.sku, None)
+        self.new_digests.pop(product.sku, None)
+
+        for index, name, mrp, net_price in self.new_product_rows.pop(product.sku, []):
+            self.imported -= 1
+            self.skip(
+                index, product.sku, name, mrp, net_price,
+                reason=reason,
+                suggestion="Check CSV format or values",
+            )
@@ -0,0 +1,78 @@
+# pricing_monitor/services/checkpoint.py
+from django.utils import timezone
+
+from pricing_monitor.models import ProductCSVUpload
+from .csv_reader import upload_reader
+
+
+class ImportCheckpoint:
+    """
+    Committed-row checkpoint of one upload, kept on its ProductCSVUpload.
+
+    commit() is called inside each chunk transaction, so the checkpoint
+    moves only together with the rows it covers. ``started_at`` is the
+    import timestamp of the first attempt; a resumed run reuses it for the
+    deal window and the promotion snapshot so it decides every row exactly
+    like an uninterrupted run would.
+    """
+
+    def __init__(self, csv_upload, resume=False):
+        self.csv_upload = csv_upload
+
+        if resume and csv_upload.checkpoint_at:
+            return
+
+        csv_upload.checkpoint_at = timezone.now()
+        csv_upload.checkpoint_row = 0
+        csv_upload.checkpoint_offset = None
+        csv_upload.checkpoint_encoding = ""
+        csv_upload.checkpoint_imported = 0
+        csv_upload.checkpoint_skipped = 0
+        self.save()
+
+    @property
+    def started_at(self):
+        return self.csv_upload.checkpoint_at
+
+    @property
+    def rows_done(self):
+        return self.csv_upload.checkpoint_row
+
+    @property
+    def imported(self):
+        return self.csv_upload.checkpoint_imported
+
+    @property
+    def skipped(self):
+        return self.csv_upload.checkpoint_skipped
+
+    def reader(self):
+        """
+        Row reader positioned right after the last committed row.
+        """
+        return upload_reader(
+            self.csv_upload,
+            offset=self.csv_upload.checkpoint_offset,
+            rows_before=self.csv_upload.checkpoint_row,
+            encoding=self.csv_upload.checkpoint_encoding or None,
+        )
+
+    def commit(self, reader, rows, imported, skipped):
+        upload = self.csv_upload
+        upload.checkpoint_row += rows
+        upload.checkpoint_offset = reader.tell()
+        upload.checkpoint_encoding = reader.encoding
+        upload.checkpoint_imported += imported
+        upload.checkpoint_skipped += skipped
+        self.save()
+
+    def save(self):
+        upload = self.csv_upload
+        ProductCSVUpload.objects.filter(id=upload.id).update(
+            checkpoint_at=upload.checkpoint_at,
+            checkpoint_row=upload.checkpoint_row,
+            checkpoint_offset=upload.checkpoint_offset,
+            checkpoint_encoding=upload.checkpoint_encoding,
+            checkpoint_imported=upload.checkpoint_imported,
+            checkpoint_skipped=upload.checkpoint_skipped,
+        )
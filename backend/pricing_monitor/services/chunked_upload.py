@@ -0,0 +1,199 @@
+# pricing_monitor/services/chunked_upload.py
+import hmac
+import os
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import transaction
+from django.utils import timezone
+
+from pricing_monitor.models import ChunkedUpload, ProductCSVUpload
+from .feed_archive import COMPRESSED_EXTENSIONS
+from .feed_digest import file_digest
+
+
+# Compressed feeds are stored as sent and decompressed while importing
+ALLOWED_EXTENSIONS = (".csv", ".xlsx", ".xls") + COMPRESSED_EXTENSIONS
+
+INVALID_FILE_TYPE = (
+    "Invalid file type. Only CSV or Excel files, .csv.gz or .zip of CSVs, are allowed."
+)
+
+PART_DIRECTORY = "pricing_monitor/chunked/"
+
+COPY_BUFFER_SIZE = 64 * 1024
+
+# Unfinished uploads that received nothing for this long are deleted
+DEFAULT_CHUNKED_UPLOAD_EXPIRY = timedelta(hours=24)
+
+
+class ChunkedUploadError(ValueError):
+    """
+    A chunk or a finish call the upload cannot accept. ``received`` is
+    the offset the client should continue from.
+    """
+
+    def __init__(self, message, received=None):
+        super().__init__(message)
+        self.received = received
+
+
+def upload_storage():
+    return ProductCSVUpload._meta.get_field("file").storage
+
+
+def start_chunked_upload(file_name, size, feed_key=""):
+    """
+    Opens a chunked upload of ``size`` bytes with an empty part file in
+    media storage.
+    """
+    file_name = os.path.basename(file_name or "")
+    if not file_name.lower().endswith(ALLOWED_EXTENSIONS):
+        raise ChunkedUploadError(INVALID_FILE_TYPE)
+    if size is None or int(size) <= 0:
+        raise ChunkedUploadError("File size must be a positive number of bytes.")
+
+    chunked = ChunkedUpload(file_name=file_name, size=int(size), feed_key=feed_key[:100])
+    chunked.part_file = upload_storage().save(
+        f"{PART_DIRECTORY}{chunked.token}.part", ContentFile(b"")
+    )
+    chunked.save()
+    return chunked
+
+
+def append_chunk(chunked, start, stream, length):
+    """
+    Appends ``length`` bytes read from ``stream`` at byte ``start`` of the
+    file and returns the number of bytes received so far.
+
+    A chunk that was already received (a retry) changes nothing; one that
+    overlaps the received bytes only adds its new tail. A chunk starting
+    past the received bytes is refused, so the file never has gaps.
+    """
+    with transaction.atomic():
+        # One writer per upload at a time
+        chunked = ChunkedUpload.objects.select_for_update().get(id=chunked.id)
+        if chunked.csv_upload_id:
+            raise ChunkedUploadError("Upload is already finished.", chunked.received)
+
+        end = start + length
+        if start > chunked.received:
+            raise ChunkedUploadError(
+                f"Expected a chunk starting at byte {chunked.received}.",
+                chunked.received,
+            )
+        if end > chunked.size:
+            raise ChunkedUploadError(
+                f"Chunk ends past the declared size of {chunked.size} bytes.",
+                chunked.received,
+            )
+        if end <= chunked.received:
+            return chunked.received
+
+        # ⏩ Skip the bytes of an overlapping retry that are already stored
+        overlap = chunked.received - start
+        while overlap:
+            data = stream.read(min(overlap, COPY_BUFFER_SIZE))
+            if not data:
+                break
+            overlap -= len(data)
+
+        written = 0
+        with open(upload_storage().path(chunked.part_file), "r+b") as part:
+            part.seek(chunked.received)
+            while written < end - chunked.received:
+                data = stream.read(min(end - chunked.received - written, COPY_BUFFER_SIZE))
+                if not data:
+                    break
+                part.write(data)
+                written += len(data)
+
+            if chunked.received + written != end:
+                # A short body leaves no partial bytes behind
+                part.truncate(chunked.received)
+                raise ChunkedUploadError(
+                    "Chunk body is shorter than its byte range.", chunked.received
+                )
+
+        chunked.received = end
+        chunked.save(update_fields=["received", "updated_at"])
+        return chunked.received
+
+
+def finish_chunked_upload(chunked, checksum):
+    """
+    Checks the SHA-256 of the assembled file against ``checksum`` and
+    turns it into a queued ProductCSVUpload. Finishing twice returns the
+    same upload.
+
+    On a checksum mismatch the received bytes are discarded; the client
+    has to start a new upload.
+    """
+    with transaction.atomic():
+        chunked = ChunkedUpload.objects.select_for_update().get(id=chunked.id)
+        if chunked.csv_upload_id:
+            return chunked.csv_upload
+
+        if chunked.received != chunked.size:
+            raise ChunkedUploadError(
+                f"Received {chunked.received} of {chunked.size} bytes.",
+                chunked.received,
+            )
+
+        storage = upload_storage()
+        with storage.open(chunked.part_file, "rb") as part:
+            digest = file_digest(part)
+
+        if hmac.compare_digest(digest, (checksum or "").strip().lower()):
+            # 📦 Move the part file into place instead of copying it
+            upload_to = ProductCSVUpload._meta.get_field("file").upload_to
+            name = storage.get_available_name(f"{upload_to}{chunked.file_name}")
+            os.makedirs(os.path.dirname(storage.path(name)), exist_ok=True)
+            os.replace(storage.path(chunked.part_file), storage.path(name))
+
+            chunked.csv_upload = ProductCSVUpload.objects.create(
+                file=name,
+                feed_key=chunked.feed_key,
+                content_digest=digest,
+                status=ProductCSVUpload.STATUS_UPLOADED,
+            )
+            chunked.part_file = ""
+            chunked.save(update_fields=["csv_upload", "part_file", "updated_at"])
+            return chunked.csv_upload
+
+    # ❌ Corrupted on the way: nothing to resume from
+    storage.delete(chunked.part_file)
+    chunked.delete()
+    raise ChunkedUploadError("Checksum does not match the uploaded bytes.")
+
+
+def expire_chunked_uploads(older_than=None):
+    """
+    Deletes the unfinished chunked uploads that received no chunk for
+    ``older_than`` (PRICING_CHUNKED_UPLOAD_EXPIRY by default), with their
+    part files, and returns how many were deleted. Clients of an expired
+    upload have to start over.
+    """
+    if older_than is None:
+        older_than = getattr(
+            settings, "PRICING_CHUNKED_UPLOAD_EXPIRY", DEFAULT_CHUNKED_UPLOAD_EXPIRY
+        )
+    expired = ChunkedUpload.objects.filter(
+        csv_upload__isnull=True,
+        updated_at__lt=timezone.now() - older_than,
+    )
+
+    storage = upload_storage()
+    deleted = 0
+    for chunked_id in expired.values_list("id", flat=True):
+        with transaction.atomic():
+            # A chunk may have arrived since: re-checked under the row lock
+            chunked = expired.select_for_update().filter(id=chunked_id).first()
+            if chunked is None:
+                continue
+            if chunked.part_file:
+                storage.delete(chunked.part_file)
+            chunked.delete()
+            deleted += 1
+    return deleted
@@ -3,16 +3,29 @@ import csv
 from decimal import Decimal
 from django.utils.text import slugify
 from catalog.models import Product, Category
-from pricing_monitor.models import ImportedProduct, SkippedPriceImport, CSVImportLog
-from .price_rules import validate_price
+from catalog.utils import CategoryResolver
+from pricing_monitor.models import ImportedProduct, ProductCSVUpload, SkippedPriceImport, CSVImportLog
+from .audit_writer import AuditWriter
+from .csv_reader import upload_reader
+from .parsers import iter_feed_rows, parse_price
+from .deal_expiry import deal_window
+from .duplicates import DUPLICATE_SKU_SUGGESTION, scan_upload
+from .feed_digest import identical_upload
+from .import_metrics import ImportMetrics
+from .promotion_snapshot import PromotionSnapshot
+from .price_rules import price_rejections
 from .suggestions import suggest_fix
+from .threshold_profiles import ThresholdTable
+
+
+NOT_A_NUMBER_SUGGESTION = "Use a plain amount such as 170000, 1,70,000 or ₹1,70,000.00"
 
 
 def to_decimal(value):
-    try:
-        return Decimal(str(value).replace("₹", "").strip())
-    except Exception:
-        return None
+    """
+    Price cell as a Decimal, or None (see parsers.parse_price).
+    """
+    return parse_price(value)
     
 def get_or_create_category(name, parent=None):
     """
@@ -32,63 +45,140 @@ def get_or_create_category(name, parent=None):
     )
 
 
-Product.objects.filter(is_deal_price=True).update(
-    is_deal_price=False,
-    sale_price=None
-)
-
-
-def process_csv_upload(csv_upload):
+def process_csv_upload(csv_upload, chunk_size=None, workers=None, dry_run=False,
+                       metrics=None):
     """
     Processes CSV and imports only valid Net Price products.
+
+    With ``chunk_size`` set, rows are imported by the set-based engine in
+    ``bulk_importer`` instead of one row at a time. With ``workers`` above
+    one, rows are sharded by SKU across that many processes.
+
+    Uploads with a ``feed_key`` always go through the set-based engine:
+    only it skips the rows that did not change since the feed's last
+    import and keeps the feed's row digests up to date (see feed_digest).
+
+    With ``dry_run`` nothing is imported: the diff of what would change is
+    stored on the upload and its summary returned (see ``dry_run``).
+
+    A file identical to an upload that was already processed is not
+    imported again: the upload is linked to it and ``(0, 0)`` returned.
+
+    ``metrics`` (ImportMetrics) collects time and queries per stage; the
+    totals are stored on the import's CSVImportLog.
     """
-    csv_file = csv_upload.file
-    csv_file.seek(0)
+    if dry_run:
+        from .dry_run import dry_run_csv_upload
+        return dry_run_csv_upload(csv_upload)
+
+    # An identical file was imported already
+    original = identical_upload(csv_upload)
+    if original is not None:
+        ProductCSVUpload.objects.filter(id=csv_upload.id).update(duplicate_of=original)
+        return 0, 0
+
+    if workers and workers > 1:
+        from .parallel_import import process_csv_upload_parallel
+        return process_csv_upload_parallel(
+            csv_upload, workers=workers, chunk_size=chunk_size, metrics=metrics
+        )
+
+    if chunk_size or csv_upload.feed_key:
+        from .bulk_importer import DEFAULT_CHUNK_SIZE, process_csv_upload_in_chunks
+        return process_csv_upload_in_chunks(
+            csv_upload, chunk_size=chunk_size or DEFAULT_CHUNK_SIZE, metrics=metrics
+        )
+
+    metrics = metrics or ImportMetrics()
+    with metrics.measure():
+        imported, skipped = import_csv_rows(csv_upload, metrics)
 
-    reader = csv.DictReader(csv_file.read().decode("utf-8").splitlines())
+    CSVImportLog.objects.create(
+        csv_upload=csv_upload,
+        file_name=csv_upload.feed_name,
+        imported=imported,
+        skipped=skipped,
+        **metrics.log_fields(),
+    )
+
+    return imported, skipped
+
+
+def import_csv_rows(csv_upload, metrics):
+    """
+    Row-by-row import of an upload. Returns ``(imported, skipped)``; does
+    not write a CSVImportLog.
+    """
+    reader = upload_reader(csv_upload)
+    # The cells are picked by position (FeedLayout), no dict per row
+    rows = iter_feed_rows(reader)
+    deal_starts_at, deal_ends_at = deal_window(csv_upload)
+    categories = CategoryResolver()
+    # Skip / import audit rows are written in batches
+    audit = AuditWriter(csv_upload)
+    # Which row of a repeated SKU is imported
+    with metrics.stage("duplicates"):
+        duplicates = scan_upload(csv_upload, metrics=metrics)
 
     imported = 0
     skipped = 0
 
+    # (FeedRow field, column)
     REQUIRED_COLUMNS = [
-        "SKU",
-        "Product Name",
-        "Category",
-        "Sub-category",
+        ("sku", "SKU"),
+        ("name", "Product Name"),
+        ("category", "Category"),
+        ("subcategory", "Sub-category"),
         # "MRP",
         # "Net Price",
     ]
 
     # MRP required ONLY when price validation is enabled
     if getattr(csv_upload, "consider_price_validation", False):
-        REQUIRED_COLUMNS.extend(["MRP", "Net Price"])
+        REQUIRED_COLUMNS.extend([("mrp", "MRP"), ("net_price", "Net Price")])
+        # Every row is validated against the promotions active at import start
+        promotions = PromotionSnapshot()
+        thresholds = ThresholdTable()
 
     from catalog.models import Product, Category
-    from promotions.models import ProductPromotion, CategoryPromotion
     from pricing_monitor.models import ImportedProduct, SkippedPriceImport, CSVImportLog
-    from django.utils import timezone
 
-    for index, row in enumerate(reader, start=2):
+    for index, row in rows:
         mrp = None
         net_price = None
 
         try:
             # 1️⃣ Required columns validation
-            for col in REQUIRED_COLUMNS:
-                if not row.get(col):
+            for field, col in REQUIRED_COLUMNS:
+                if not getattr(row, field):
                     raise ValueError(f"Missing required column: {col}")
 
-            sku = row["SKU"].strip()
-            name = row["Product Name"].strip()
-            category_name = row["Category"].strip().title()
-            subcategory_name = row["Sub-category"].strip().title()
+            sku = row.sku.strip()
+            name = row.name.strip()
+            category_name = row.category.strip().title()
+            subcategory_name = row.subcategory.strip().title()
+
+            # 🔁 Only one row per SKU reaches the database
+            reason = duplicates.skip_reason(index, sku)
+            if reason:
+                audit.skip(
+                    row_number=index,
+                    sku=sku,
+                    product_name=name,
+                    mrp=0,
+                    price=0,
+                    reason=reason,
+                    suggestion=DUPLICATE_SKU_SUGGESTION,
+                )
+                skipped += 1
+                continue
 
             # mrp = to_decimal(row["MRP"])
-            mrp = to_decimal(row["MRP"]) if row.get("MRP") else None
+            mrp = to_decimal(row.mrp) if row.mrp else None
             # net_price = to_decimal(row["Net Price"])
             net_price = (
-                to_decimal(row["Net Price"])
-                if row.get("Net Price")
+                to_decimal(row.net_price)
+                if row.net_price
                 else None
             )
 
@@ -99,46 +189,20 @@ def process_csv_upload(csv_upload):
 
                 product = Product.objects.filter(sku=sku).first()
                 if not product:
-                    SkippedPriceImport.objects.create(
+                    audit.skip(
+                        row_number=index,
                         sku=sku,
-                        reason="SKU not found in catalog"
+                        product_name=name,
+                        mrp=mrp or 0,
+                        price=net_price or 0,
+                        reason="SKU not found in catalog",
+                        suggestion="Create the product before importing its price",
                     )
+                    skipped += 1
                     continue
                 
-                current_sale_price = None
-
-                if product:
-                    # 1️⃣ Product promotion
-                    product_promo = product.product_promotions.filter(
-                        is_active=True,
-                        start_date__lte=timezone.now(),
-                        end_date__gte=timezone.now()
-                    ).first()
-
-                    if product_promo:
-                        # current_sale_price = product_promo.get_discounted_price()
-                        # base_price = product.sale_price or product.mrp
-                        # current_sale_price = product_promo.get_discounted_price(base_price)
-                        current_sale_price = product_promo.get_discounted_price()
-
-                    # 2️⃣ Category promotion
-                    elif product.category:
-                        category_promo = CategoryPromotion.objects.filter(
-                            category=product.category,
-                            is_active=True,
-                            start_date__lte=timezone.now(),
-                            end_date__gte=timezone.now()
-                        ).first()
-
-                        if category_promo:
-                            # current_sale_price = category_promo.get_discounted_price(
-                            #     product.sale_price or product.mrp
-                            # )
-                            current_sale_price = category_promo.get_discounted_price(product)
-
-                    # 3️⃣ Regular sale price
-                    if current_sale_price is None:
-                        current_sale_price = product.sale_price or product.mrp
+                # 1️⃣ Product promotion > 2️⃣ Category promotion > 3️⃣ Regular sale price
+                current_sale_price = promotions.current_sale_price(product)
 
                 # 4️⃣ Fallback (new product)
                 # if current_sale_price is None:
@@ -151,9 +215,24 @@ def process_csv_upload(csv_upload):
                         or mrp
                     )
 
+                # ❌ Reject a Net Price that is not a number
+                if net_price is None:
+                    audit.skip(
+                        row_number=index,
+                        sku=sku,
+                        product_name=name,
+                        mrp=mrp or 0,
+                        current_sale_price=current_sale_price,
+                        price=0,
+                        reason=f"Net Price '{row.net_price}' is not a number",
+                        suggestion=NOT_A_NUMBER_SUGGESTION,
+                    )
+                    skipped += 1
+                    continue
+
                 # ❌ Reject CSV row if net price is lower
                 if net_price < current_sale_price:
-                    SkippedPriceImport.objects.create(
+                    audit.skip(
                         row_number=index,
                         sku=sku,
                         product_name=name,
@@ -168,15 +247,38 @@ def process_csv_upload(csv_upload):
                     )
                     skipped += 1
                     continue
+
+                # 📏 Discount / margin / price thresholds
+                rejection = price_rejections(
+                    [mrp], [net_price], [current_sale_price],
+                    thresholds=thresholds.lookup(
+                        [product.subcategory_id or product.category_id]
+                    ),
+                ).get(0)
+                if rejection:
+                    reason, suggestion = rejection
+                    audit.skip(
+                        row_number=index,
+                        sku=sku,
+                        product_name=name,
+                        mrp=mrp or 0,
+                        current_sale_price=current_sale_price,
+                        price=net_price or 0,
+                        reason=reason,
+                        suggestion=suggestion,
+                    )
+                    skipped += 1
+                    continue
             # =====================================================
 
             # 2️⃣ CATEGORY
-            category = get_or_create_category(category_name)
+            category = categories.resolve(category_name)
 
             # 3️⃣ SUBCATEGORY
             subcategory = None
             if subcategory_name:
-                subcategory = get_or_create_category(subcategory_name, parent=category)
+                subcategory = categories.resolve(subcategory_name, parent=category)
+            categories.flush()
 
             # 4️⃣ PRODUCT UPSERT
             product, created = Product.objects.get_or_create(
@@ -193,13 +295,16 @@ def process_csv_upload(csv_upload):
             previous_price = product.sale_price or product.mrp
             # ⏭ Skip if price is unchanged
             if net_price is not None and previous_price == net_price:
-                SkippedPriceImport.objects.create(
+                audit.skip(
                     row_number=index,
                     sku=sku,
                     product_name=name,
+                    mrp=mrp or 0,
+                    price=net_price or 0,
                     reason="CSV net price is same as current sale price",
                     suggestion="Change price to create a new update",
                 )
+                skipped += 1
                 continue
 
             # 🔁 ALWAYS UPDATE PRICES
@@ -215,12 +320,16 @@ def process_csv_upload(csv_upload):
                 # product.is_deal_price = True
 
             product.is_deal_price = True
+            product.deal_price_starts_at = deal_starts_at
+            product.deal_price_ends_at = deal_ends_at
             product.is_active = True
             # product.save()
 
             product.save(update_fields=[
                 "sale_price",
                 "is_deal_price",
+                "deal_price_starts_at",
+                "deal_price_ends_at",
                 "is_active",
                 "updated_at"
             ])
@@ -230,24 +339,21 @@ def process_csv_upload(csv_upload):
             #     csv_upload=csv_upload,
             #     product=product
             # )
-            ImportedProduct.objects.update_or_create(
-                csv_upload=csv_upload,
-                product=product,
-                defaults={
-                    "mrp": mrp,
-                    # "previous_price": product.sale_price if not created else None,
-                    "previous_price": previous_price if not created else None,
-                    "updated_price": net_price,
-                }
+            audit.imported(
+                product,
+                mrp=mrp,
+                # previous_price=product.sale_price if not created else None,
+                previous_price=previous_price if not created else None,
+                updated_price=net_price,
             )
 
             imported += 1
 
         except Exception as e:
-            SkippedPriceImport.objects.create(
+            audit.skip(
                 row_number=index,
-                sku=row.get("SKU", ""),
-                product_name=row.get("Product Name", ""),
+                sku=row.sku or "",
+                product_name=row.name or "",
                 mrp=mrp or 0,
                 price=net_price or 0,
                 reason=str(e),
@@ -255,11 +361,10 @@ def process_csv_upload(csv_upload):
             )
             skipped += 1
 
-    CSVImportLog.objects.create(
-        file_name=csv_file.name,
-        imported=imported,
-        skipped=skipped,
-    )
+    # Categories queued by rows that failed further down
+    categories.flush()
+    audit.flush()
+    metrics.bytes_read += reader.bytes_read
 
     return imported, skipped
 
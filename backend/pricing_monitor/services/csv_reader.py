@@ -0,0 +1,182 @@
+# pricing_monitor/services/csv_reader.py
+import codecs
+import csv
+import io
+
+
+# Excel exports carry a BOM; anything that is not UTF-8 is read as latin-1
+ENCODINGS = ("utf-8-sig", "latin-1")
+
+
+class CSVRowReader:
+    """
+    Streams ``(row_number, row)`` pairs from an uploaded CSV.
+
+    ``csv_file`` can be a Django File / FieldFile or any binary file
+    object. The bytes are decoded incrementally through a TextIOWrapper,
+    so memory use does not depend on the size of the file. Row numbers
+    match the spreadsheet (the header is row 1).
+
+    If the file turns out not to be UTF-8, reading restarts as latin-1 and
+    skips the rows that were already yielded.
+
+    tell() is the byte offset just after the last yielded row. Passing it
+    back as ``offset`` (with the number of rows before it and the
+    encoding in use) resumes reading there without parsing the prefix;
+    only the header is read again.
+    """
+
+    def __init__(self, csv_file, offset=0, rows_before=0, encoding=None):
+        self.raw = getattr(csv_file, "file", csv_file)
+        self.offset = offset or 0
+        self.rows_before = rows_before
+        self.encodings = ENCODINGS
+        if encoding:
+            self.encodings = (encoding,) + tuple(e for e in ENCODINGS if e != encoding)
+
+        self.encoding = None
+        self.fieldnames = None
+        self.text = None
+        self.end_offset = None
+
+    def __iter__(self):
+        for index, values in self.iter_values():
+            yield index, as_dict(self.fieldnames, values)
+
+    def iter_values(self):
+        """
+        Same rows as iterating the reader, as the plain lists csv.reader
+        returns. ``fieldnames`` is set before the first row.
+        """
+        emitted = 0
+
+        for encoding in self.encodings:
+            self.encoding = encoding
+            self.raw.seek(0)
+            if encoding != "utf-8-sig" and self.raw.read(3) != codecs.BOM_UTF8:
+                self.raw.seek(0)
+            self.text = io.TextIOWrapper(self.raw, encoding=encoding, newline="")
+
+            try:
+                reader = csv.reader(self.lines())
+                # csv.reader never reads past the record it returns, so the
+                # text position always sits right after the last row
+                self.fieldnames = next(reader, None)
+                if self.fieldnames is None:
+                    self.end_offset = self.text.tell()
+                    return
+                if self.offset:
+                    self.text.seek(self.offset)
+
+                index = self.rows_before + 1
+                for values in reader:
+                    if not values:
+                        continue
+                    index += 1
+                    if index - self.rows_before - 2 < emitted:
+                        continue
+                    yield index, values
+                    emitted += 1
+
+                self.end_offset = self.text.tell()
+                return
+            except UnicodeDecodeError:
+                continue
+            finally:
+                # Leave the underlying upload open for the caller
+                self.text.detach()
+                self.text = None
+
+    def lines(self):
+        # readline() instead of iteration keeps tell() available
+        while True:
+            line = self.text.readline()
+            if not line:
+                return
+            yield line
+
+    def tell(self):
+        if self.text is None:
+            return self.end_offset
+        return self.text.tell()
+
+    @property
+    def bytes_read(self):
+        # From ``offset`` on, so a resumed import counts only its own part
+        return max((self.tell() or 0) - self.offset, 0)
+
+
+def as_dict(fieldnames, values):
+    """
+    A row as csv.DictReader builds it: short rows are padded with None and
+    extra cells are kept under the None key.
+    """
+    row = dict(zip(fieldnames, values))
+    if len(values) > len(fieldnames):
+        row[None] = values[len(fieldnames):]
+    else:
+        for name in fieldnames[len(values):]:
+            row[name] = None
+    return row
+
+
+def row_reader(upload_file, offset=0, rows_before=0, encoding=None, member=None):
+    """
+    The row reader for an upload, picked by its file extension: Excel
+    workbooks are read by the readers in ``xlsx_reader``, anything else
+    as CSV. All of them yield the same ``(row_number, row)`` pairs.
+
+    A .csv.gz, or the CSV ``member`` of a .zip, is decompressed as it is
+    read (see ``feed_archive``); offsets and bytes_read then count
+    decompressed bytes.
+    """
+    from .feed_archive import is_archive, is_gzip, open_gzip, open_member
+    from .xlsx_reader import (
+        LEGACY_WORKBOOK_EXTENSIONS,
+        WORKBOOK_EXTENSIONS,
+        LegacyWorkbookRowReader,
+        WorkbookRowReader,
+    )
+
+    name = (getattr(upload_file, "name", None) or "").lower()
+    if is_gzip(name):
+        upload_file = open_gzip(getattr(upload_file, "file", upload_file))
+        reader_class = CSVRowReader
+    elif is_archive(name):
+        upload_file = open_member(getattr(upload_file, "file", upload_file), member)
+        reader_class = CSVRowReader
+    elif name.endswith(WORKBOOK_EXTENSIONS):
+        reader_class = WorkbookRowReader
+    elif name.endswith(LEGACY_WORKBOOK_EXTENSIONS):
+        reader_class = LegacyWorkbookRowReader
+    else:
+        reader_class = CSVRowReader
+
+    return reader_class(
+        upload_file, offset=offset, rows_before=rows_before, encoding=encoding
+    )
+
+
+def upload_reader(csv_upload, **kwargs):
+    """
+    row_reader for a ProductCSVUpload, reading its archive member if it
+    is one feed of a .zip.
+    """
+    return row_reader(
+        csv_upload.file, member=csv_upload.archive_member or None, **kwargs
+    )
+
+
+def iter_csv_rows(csv_file, member=None):
+    """
+    Streams ``(row_number, row)`` pairs from an uploaded CSV or Excel
+    workbook. See row_reader.
+    """
+    return iter(row_reader(csv_file, member=member))
+
+
+def count_csv_rows(csv_file, member=None):
+    """
+    Number of data rows in the upload, read in one streaming pass.
+    """
+    return sum(1 for _ in row_reader(csv_file, member=member).iter_values())
@@ -0,0 +1,71 @@
+# pricing_monitor/services/deal_expiry.py
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from catalog.models import Product
+
+
+DEFAULT_DEAL_PRICE_DURATION = timedelta(days=7)
+DEFAULT_EXPIRY_BATCH_SIZE = 500
+
+
+def deal_window(csv_upload, now=None):
+    """
+    Returns ``(starts_at, ends_at)`` for the deal prices of an upload.
+    """
+    now = now or timezone.now()
+    starts_at = getattr(csv_upload, "deal_starts_at", None) or now
+    ends_at = getattr(csv_upload, "deal_ends_at", None)
+
+    if ends_at is None:
+        duration = getattr(
+            settings, "PRICING_DEAL_PRICE_DURATION", DEFAULT_DEAL_PRICE_DURATION
+        )
+        ends_at = starts_at + duration
+
+    return starts_at, ends_at
+
+
+def expire_deal_prices(now=None, batch_size=DEFAULT_EXPIRY_BATCH_SIZE):
+    """
+    Clears deal prices whose window has closed.
+
+    Works in batches of primary keys taken from the
+    (is_deal_price, deal_price_ends_at) index so a large expiry never
+    holds one long table-wide UPDATE.
+    """
+    now = now or timezone.now()
+    expired = 0
+
+    while True:
+        ids = list(
+            Product.objects
+            .filter(is_deal_price=True, deal_price_ends_at__lte=now)
+            .order_by("deal_price_ends_at")
+            .values_list("id", flat=True)[:batch_size]
+        )
+        if not ids:
+            return expired
+
+        expired += Product.objects.filter(id__in=ids).update(
+            is_deal_price=False,
+            sale_price=None,
+            deal_price_starts_at=None,
+            deal_price_ends_at=None,
+            updated_at=now,
+        )
+
+
+def next_deal_expiry():
+    """
+    When the next live deal price expires, or None.
+    """
+    return (
+        Product.objects
+        .filter(is_deal_price=True, deal_price_ends_at__isnull=False)
+        .order_by("deal_price_ends_at")
+        .values_list("deal_price_ends_at", flat=True)
+        .first()
+    )
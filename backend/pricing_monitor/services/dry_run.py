@@ -0,0 +1,175 @@
+# pricing_monitor/services/dry_run.py
+import csv
+import io
+import tempfile
+from collections import Counter
+from types import SimpleNamespace
+
+from django.core.files import File
+from django.utils import timezone
+
+from catalog.models import Product
+from catalog.utils import CategoryResolver
+from pricing_monitor.models import ProductCSVUpload
+from .bulk_importer import DEFAULT_CHUNK_SIZE, ChunkImport, iter_chunks
+from .csv_reader import upload_reader
+from .duplicates import scan_upload
+from .parsers import iter_feed_rows
+from .promotion_snapshot import PromotionSnapshot
+
+
+DIFF_ACTIONS = ("create", "increase", "decrease", "unchanged", "rejected")
+
+DIFF_COLUMNS = [
+    "Row",
+    "SKU",
+    "Product Name",
+    "Action",
+    "Current Price",
+    "New Price",
+    "Change",
+    "Change %",
+    "Reason",
+]
+
+
+def load_catalog():
+    """
+    Every product's price fields, in one query: ``({sku: Product}, slugs)``.
+    """
+    products = {}
+    slugs = set()
+    for product in Product.objects.only(
+        "id", "sku", "slug", "mrp", "sale_price", "category_id", "subcategory_id",
+    ):
+        products[product.sku] = product
+        slugs.add(product.slug)
+    return products, slugs
+
+
+class DiffImport(ChunkImport):
+    """
+    Runs the importer's row rules over the whole feed against an
+    in-memory copy of the catalog and writes what every row would do to
+    ``writer`` instead of touching the database.
+    """
+
+    def __init__(self, csv_upload, writer, promotions=None, duplicates=None):
+        super().__init__(
+            csv_upload,
+            rows=(),
+            promotions=promotions,
+            categories=CategoryResolver(),
+            duplicates=duplicates,
+        )
+        self.writer = writer
+        self.counts = Counter({action: 0 for action in DIFF_ACTIONS})
+        self.products, self.used_slugs = load_catalog()
+
+    def feed(self, rows):
+        for chunk in iter_chunks(rows, DEFAULT_CHUNK_SIZE):
+            if self.validate:
+                self.rule_rejections = {}
+                self.row_prices = {}
+                self.evaluate_rules(chunk)
+            for index, row in chunk:
+                self.import_row(index, row)
+
+    def record(self, action, index, sku, name, current_price, new_price, reason=""):
+        change = change_percent = ""
+        if current_price and new_price is not None:
+            change = new_price - current_price
+            change_percent = round(change * 100 / current_price, 2)
+
+        self.writer.writerow([
+            index,
+            sku,
+            name,
+            action,
+            "" if current_price is None else current_price,
+            "" if new_price is None else new_price,
+            change,
+            change_percent,
+            reason,
+        ])
+        self.counts[action] += 1
+
+    def build_product(self, sku, name, slug, category, subcategory, mrp):
+        # Never saved: a plain object is enough and much cheaper than a model
+        return SimpleNamespace(
+            sku=sku,
+            name=name,
+            slug=slug,
+            mrp=mrp,
+            sale_price=None,
+        )
+
+    # Row outcomes of ChunkImport, recorded instead of written
+    def skip(self, index, sku, name, mrp, net_price, reason, suggestion,
+             current_sale_price=None):
+        self.record("rejected", index, sku, name, current_sale_price, net_price, reason)
+
+    def unchanged(self, index, sku, name, mrp, net_price):
+        self.record("unchanged", index, sku, name, net_price, net_price)
+
+    def track_import(self, index, sku, name, created, mrp, previous_price, net_price):
+        if created:
+            action = "create"
+            previous_price = None
+        elif net_price is None or net_price == previous_price:
+            action = "unchanged"
+        elif net_price > previous_price:
+            action = "increase"
+        else:
+            action = "decrease"
+        self.record(action, index, sku, name, previous_price, net_price)
+
+
+def dry_run_csv_upload(csv_upload):
+    """
+    Computes what importing ``csv_upload`` would change without writing
+    to Product, Category or the import logs.
+
+    The per-row diff is stored as a CSV on ``csv_upload.dry_run_file``;
+    the counts per action are stored on ``csv_upload.dry_run_summary``
+    and returned.
+    """
+    promotions = None
+    if csv_upload.consider_price_validation:
+        promotions = PromotionSnapshot()
+
+    with tempfile.TemporaryFile() as artifact:
+        text = io.TextIOWrapper(artifact, encoding="utf-8", newline="")
+        writer = csv.writer(text)
+        writer.writerow(DIFF_COLUMNS)
+
+        diff = DiffImport(
+            csv_upload,
+            writer,
+            promotions=promotions,
+            duplicates=scan_upload(csv_upload),
+        )
+        diff.feed(iter_feed_rows(upload_reader(csv_upload)))
+
+        text.flush()
+        text.detach()
+        artifact.seek(0)
+
+        summary = dict(diff.counts)
+        summary["rows"] = sum(diff.counts.values())
+
+        if csv_upload.dry_run_file:
+            csv_upload.dry_run_file.delete(save=False)
+        csv_upload.dry_run_file.save(
+            f"upload-{csv_upload.id}-dry-run.csv", File(artifact), save=False
+        )
+
+    csv_upload.dry_run_summary = summary
+    csv_upload.dry_run_at = timezone.now()
+    ProductCSVUpload.objects.filter(id=csv_upload.id).update(
+        dry_run_file=csv_upload.dry_run_file.name,
+        dry_run_summary=summary,
+        dry_run_at=csv_upload.dry_run_at,
+    )
+
+    return summary
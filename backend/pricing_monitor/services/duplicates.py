@@ -0,0 +1,90 @@
+# pricing_monitor/services/duplicates.py
+from pricing_monitor.models import ProductCSVUpload
+from .csv_reader import upload_reader
+from .parsers import iter_feed_rows
+
+
+DUPLICATE_SKU_SUGGESTION = "Keep one row per SKU in the file"
+
+
+class DuplicateSKUs:
+    """
+    SKUs that appear more than once in a feed, and which of their rows
+    the import keeps under ``policy``.
+
+    The pre-pass streams the feed once and keeps a hash set of the SKUs
+    it has seen, each with its first row number. Rows are matched on the
+    SKU itself, not just its hash, so two different SKUs whose hashes
+    collide are never taken for duplicates of each other.
+    """
+
+    def __init__(self, policy=ProductCSVUpload.DUPLICATE_SKU_LAST):
+        self.policy = policy
+        self.rows = {}   # duplicate sku -> [first row, last row, count]
+
+    @classmethod
+    def scan(cls, rows, policy=ProductCSVUpload.DUPLICATE_SKU_LAST):
+        """
+        Pre-pass over ``(row_number, FeedRow)`` pairs.
+        """
+        duplicates = cls(policy)
+        first_rows = {}   # sku -> first row number
+
+        for index, row in rows:
+            sku = (row.sku or "").strip()
+            if not sku:
+                continue
+
+            first = first_rows.setdefault(sku, index)
+            if first == index:
+                continue
+
+            seen = duplicates.rows.get(sku)
+            if seen is None:
+                duplicates.rows[sku] = [first, index, 2]
+            else:
+                seen[1] = index
+                seen[2] += 1
+
+        return duplicates
+
+    def __len__(self):
+        return len(self.rows)
+
+    def __contains__(self, sku):
+        return sku in self.rows
+
+    def skip_reason(self, index, sku):
+        """
+        Why row ``index`` must not be imported, or None if it is the row
+        kept for its SKU.
+        """
+        seen = self.rows.get(sku)
+        if seen is None:
+            return None
+        first, last, count = seen
+
+        if self.policy == ProductCSVUpload.DUPLICATE_SKU_REJECT:
+            return f"SKU appears {count} times in the file"
+        if self.policy == ProductCSVUpload.DUPLICATE_SKU_FIRST:
+            if index != first:
+                return f"Duplicate SKU: row {first} is imported instead"
+            return None
+        if index != last:
+            return f"Duplicate SKU: row {last} is imported instead"
+        return None
+
+
+def scan_upload(csv_upload, metrics=None):
+    """
+    Duplicate-SKU pre-pass over a whole upload, with its policy. The
+    bytes it reads are added to ``metrics`` (ImportMetrics).
+    """
+    reader = upload_reader(csv_upload)
+    duplicates = DuplicateSKUs.scan(
+        iter_feed_rows(reader),
+        csv_upload.duplicate_sku_policy,
+    )
+    if metrics is not None:
+        metrics.bytes_read += reader.bytes_read
+    return duplicates
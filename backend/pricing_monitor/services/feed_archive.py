@@ -0,0 +1,68 @@
+# pricing_monitor/services/feed_archive.py
+import gzip
+import posixpath
+import zipfile
+
+
+GZIP_EXTENSIONS = (".csv.gz",)
+ARCHIVE_EXTENSIONS = (".zip",)
+COMPRESSED_EXTENSIONS = GZIP_EXTENSIONS + ARCHIVE_EXTENSIONS
+
+# Files of a zip that are feeds; anything else in it is ignored
+ARCHIVE_MEMBER_EXTENSIONS = (".csv",)
+
+
+def is_gzip(name):
+    return (name or "").lower().endswith(GZIP_EXTENSIONS)
+
+
+def is_archive(name):
+    return (name or "").lower().endswith(ARCHIVE_EXTENSIONS)
+
+
+def open_gzip(raw):
+    """
+    The decompressed bytes of a .csv.gz as a file object. Data is inflated
+    as it is read; seeking back restarts decompression from the start.
+    """
+    raw.seek(0)
+    return gzip.GzipFile(fileobj=raw, mode="rb")
+
+
+def archive_members(raw):
+    """
+    Names of the feeds in a zip, in archive order. Folders, hidden files
+    and macOS resource forks are left out.
+    """
+    raw.seek(0)
+    with zipfile.ZipFile(raw) as archive:
+        return [
+            info.filename
+            for info in archive.infolist()
+            if not info.is_dir()
+            and not info.filename.startswith("__MACOSX/")
+            and not posixpath.basename(info.filename).startswith(".")
+            and info.filename.lower().endswith(ARCHIVE_MEMBER_EXTENSIONS)
+        ]
+
+
+def open_member(raw, member=None):
+    """
+    One feed of a zip as a file object, decompressed as it is read.
+
+    Without ``member`` the zip has to hold exactly one feed; an archive of
+    several feeds is split into one upload per feed by the job runner.
+    """
+    if member is None:
+        members = archive_members(raw)
+        if len(members) != 1:
+            raise ValueError(
+                f"Archive holds {len(members)} CSV feeds; "
+                "process it with the background worker"
+            )
+        member = members[0]
+
+    raw.seek(0)
+    # The ZipFile does not own ``raw``, so the member stays readable
+    # after the ZipFile object goes away
+    return zipfile.ZipFile(raw).open(member)
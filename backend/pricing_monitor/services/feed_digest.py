@@ -0,0 +1,99 @@
+# pricing_monitor/services/feed_digest.py
+import hashlib
+
+from django.utils import timezone
+
+from pricing_monitor.models import FeedRowDigest, ProductCSVUpload
+
+from .deal_expiry import deal_window
+
+
+def file_digest(upload_file):
+    """
+    SHA-256 of the uploaded bytes, read in chunks.
+    """
+    digest = hashlib.sha256()
+    upload_file.open("rb")
+    try:
+        for chunk in upload_file.chunks():
+            digest.update(chunk)
+    finally:
+        upload_file.seek(0)
+    return digest.hexdigest()
+
+
+def row_digest(row):
+    """
+    64-bit digest of the cells of a FeedRow the importer uses, as a
+    signed integer so it fits a BigIntegerField.
+    """
+    text = "\x1f".join(cell or "" for cell in row)
+    digest = hashlib.blake2b(text.encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "big", signed=True)
+
+
+def identical_upload(csv_upload, now=None):
+    """
+    The earlier processed upload with exactly the same file whose deal
+    prices are still live, or None. Stores the upload's content_digest on
+    the way.
+
+    Once the original's deal window has closed (expire_deal_prices has
+    cleared its prices) the same file is imported again, so the supplier,
+    or an admin queuing the upload again, can re-apply them.
+
+    The feeds of a .zip share its file and were checked with the archive,
+    so they are never identical uploads.
+    """
+    if csv_upload.archive_id:
+        return None
+
+    if not csv_upload.content_digest:
+        csv_upload.content_digest = file_digest(csv_upload.file)
+        ProductCSVUpload.objects.filter(id=csv_upload.id).update(
+            content_digest=csv_upload.content_digest
+        )
+
+    now = now or timezone.now()
+    originals = (
+        ProductCSVUpload.objects
+        .filter(
+            content_digest=csv_upload.content_digest,
+            processed=True,
+            duplicate_of__isnull=True,
+        )
+        .exclude(id=csv_upload.id)
+        .order_by("-id")
+    )
+    for original in originals:
+        # The window its import used, which started when it ran
+        _, ends_at = deal_window(original, now=original.started_at or original.uploaded_at)
+        if ends_at > now:
+            return original
+    return None
+
+
+def load_row_digests(feed_key, skus):
+    """
+    ``sku -> digest`` of the rows last imported from ``feed_key``.
+    """
+    return dict(
+        FeedRowDigest.objects
+        .filter(feed_key=feed_key, sku__in=skus)
+        .values_list("sku", "digest")
+    )
+
+
+def save_row_digests(feed_key, digests):
+    """
+    Upserts ``sku -> digest`` for ``feed_key`` in one statement.
+    """
+    FeedRowDigest.objects.bulk_create(
+        [
+            FeedRowDigest(feed_key=feed_key, sku=sku, digest=digest)
+            for sku, digest in digests.items()
+        ],
+        update_conflicts=True,
+        unique_fields=["feed_key", "sku"],
+        update_fields=["digest"],
+    )
@@ -0,0 +1,108 @@
+# pricing_monitor/services/feed_generator.py
+import csv
+import random
+
+
+FEED_COLUMNS = [
+    "SKU",
+    "Category",
+    "Sub-category",
+    "Brand",
+    "Product Name",
+    "MRP",
+    "Discount",
+    "Discount Amount",
+    "Net Price",
+    "Stock",
+    "Rating",
+]
+
+
+# Values suppliers get wrong, one of which goes into a "bad" row
+BAD_VALUES = [
+    ("Net Price", "N/A"),
+    ("Net Price", "1,50"),
+    ("MRP", ""),
+    ("Category", ""),
+]
+
+
+def indian_grouping(value):
+    """
+    170000.5 -> "1,70,000.50", the way supplier sheets print amounts.
+    """
+    whole, _, fraction = f"{value:.2f}".partition(".")
+    head, tail = whole[:-3], whole[-3:]
+    groups = []
+    while len(head) > 2:
+        groups.insert(0, head[-2:])
+        head = head[:-2]
+    if head:
+        groups.insert(0, head)
+    grouped = ",".join(groups + [tail]) if groups else tail
+    return grouped if fraction == "00" else f"{grouped}.{fraction}"
+
+
+def iter_synthetic_rows(rows, sku_prefix="SYN", categories=10,
+                        subcategories=5, seed=0, formatted=False,
+                        duplicate_rate=0.0, bad_rate=0.0):
+    """
+    Yields ``rows`` pricing feed rows with unique SKUs and names.
+    The same arguments always produce the same rows, and the SKU, name
+    and categories of row ``i`` do not depend on the seed.
+
+    With ``formatted`` the numbers look like ``product details.csv``:
+    "65,000", "15%", "₹1,70,000".
+
+    ``duplicate_rate`` of the rows repeat the SKU of an earlier row with
+    another price; ``bad_rate`` of the rows get one value the importer
+    rejects (see BAD_VALUES).
+    """
+    rng = random.Random(seed)
+
+    for i in range(rows):
+        item = i
+        if duplicate_rate and i and rng.random() < duplicate_rate:
+            item = rng.randrange(i)
+
+        category = item % categories
+        mrp = rng.randrange(100, 100_000)
+        discount = rng.randrange(1, 60)
+        net_price = round(mrp * (100 - discount) / 100, 2)
+
+        row = {
+            "SKU": f"{sku_prefix}-{item:08d}",
+            "Category": f"{sku_prefix} Category {category}",
+            "Sub-category": f"{sku_prefix} Category {category} Type {item % subcategories}",
+            "Brand": f"Brand {item % 97}",
+            "Product Name": f"{sku_prefix} Product {item}",
+            "MRP": mrp,
+            "Discount": discount,
+            "Discount Amount": round(mrp - net_price, 2),
+            "Net Price": net_price,
+            "Stock": rng.randrange(0, 500),
+            "Rating": round(rng.uniform(1, 5), 1),
+        }
+
+        if formatted:
+            row["MRP"] = indian_grouping(mrp)
+            row["Discount"] = f"{discount}%"
+            row["Discount Amount"] = indian_grouping(row["Discount Amount"])
+            row["Net Price"] = "₹" + indian_grouping(net_price)
+
+        if bad_rate and rng.random() < bad_rate:
+            column, value = rng.choice(BAD_VALUES)
+            row[column] = value
+
+        yield row
+
+
+def write_synthetic_feed(path, rows, **options):
+    """
+    Writes a synthetic pricing feed CSV to ``path``.
+    """
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=FEED_COLUMNS)
+        writer.writeheader()
+        writer.writerows(iter_synthetic_rows(rows, **options))
+    return path
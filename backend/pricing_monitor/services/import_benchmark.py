@@ -0,0 +1,177 @@
+# pricing_monitor/services/import_benchmark.py
+import os
+import tempfile
+import time
+import tracemalloc
+from datetime import timedelta
+
+from django.core.files import File
+from django.utils import timezone
+from django.utils.text import slugify
+
+from catalog.models import Category, Product
+from catalog.utils import CategoryResolver
+from pricing_monitor.models import CSVImportLog, ProductCSVUpload, SkippedPriceImport
+from promotions.models import CategoryPromotion
+from .bulk_importer import DEFAULT_CHUNK_SIZE
+from .csv_processor import process_csv_upload
+from .feed_generator import write_synthetic_feed
+from .import_metrics import ImportMetrics
+
+
+def create_synthetic_promotions(sku_prefix, count, discount=5):
+    """
+    Active percentage promotions on the first ``count`` categories of a
+    synthetic feed (see feed_generator), creating the categories if
+    needed.
+    """
+    resolver = CategoryResolver()
+    categories = [
+        resolver.resolve(f"{sku_prefix} Category {i}".title())
+        for i in range(count)
+    ]
+    resolver.flush()
+
+    now = timezone.now()
+    return CategoryPromotion.objects.bulk_create([
+        CategoryPromotion(
+            category=category,
+            discount_type="PERCENTAGE",
+            discount_value=discount,
+            start_date=now - timedelta(days=1),
+            end_date=now + timedelta(days=30),
+        )
+        for category in categories
+    ])
+
+
+def upload_feed(path, **fields):
+    with open(path, "rb") as f:
+        return ProductCSVUpload.objects.create(
+            file=File(f, name=os.path.basename(path)),
+            status=ProductCSVUpload.STATUS_PROCESSING,
+            **fields,
+        )
+
+
+def cleanup_benchmark(sku_prefix, uploads):
+    """
+    Removes what a benchmark run wrote for ``sku_prefix``.
+    """
+    Product.objects.filter(sku__startswith=sku_prefix).delete()
+    # Promotions go with their categories
+    Category.objects.filter(slug__startswith=slugify(sku_prefix)).delete()
+    SkippedPriceImport.objects.filter(sku__startswith=sku_prefix).delete()
+    for upload in uploads:
+        CSVImportLog.objects.filter(file_name=upload.file.name).delete()
+        upload.file.delete(save=False)
+        upload.delete()
+
+
+def run_import_benchmark(rows=20_000, categories=10, subcategories=5,
+                         duplicate_rate=0.0, bad_rate=0.0, promotions=0,
+                         formatted=False, validate=True,
+                         chunk_size=DEFAULT_CHUNK_SIZE, workers=None,
+                         seed=0, trace_memory=False, keep=False):
+    """
+    Generates a synthetic feed, imports it through process_csv_upload and
+    returns rows/s, queries per row, peak memory and the time and queries
+    of every stage as a JSON-ready dict.
+
+    With ``validate`` the feed's products are created first (from a feed
+    with other prices) so the measured run validates and updates
+    existing products, as a daily supplier feed does. ``chunk_size=0``
+    measures the row-by-row importer.
+    """
+    options = {
+        "rows": rows,
+        "categories": categories,
+        "subcategories": subcategories,
+        "duplicate_rate": duplicate_rate,
+        "bad_rate": bad_rate,
+        "promotions": promotions,
+        "formatted": formatted,
+        "validate": validate,
+        "chunk_size": chunk_size,
+        "workers": workers,
+        "seed": seed,
+    }
+    metrics = ImportMetrics(trace_memory=trace_memory)
+    prefix = f"BENCH{int(time.time())}"
+    feed = {
+        "sku_prefix": prefix,
+        "categories": categories,
+        "subcategories": subcategories,
+        "formatted": formatted,
+    }
+    uploads = []
+
+    if trace_memory:
+        tracemalloc.start()
+
+    try:
+        with tempfile.TemporaryDirectory(prefix="pricing-benchmark-") as tmp:
+            with metrics.stage("generate"):
+                path = write_synthetic_feed(
+                    os.path.join(tmp, f"{prefix}.csv"),
+                    rows,
+                    seed=seed,
+                    duplicate_rate=duplicate_rate,
+                    bad_rate=bad_rate,
+                    **feed,
+                )
+
+            if validate:
+                with metrics.stage("seed_catalog"):
+                    catalog = write_synthetic_feed(
+                        os.path.join(tmp, f"{prefix}-catalog.csv"),
+                        rows,
+                        seed=seed + 1,
+                        **feed,
+                    )
+                    uploads.append(upload_feed(catalog, consider_price_validation=False))
+                    process_csv_upload(
+                        uploads[-1], chunk_size=chunk_size or DEFAULT_CHUNK_SIZE
+                    )
+
+            if promotions:
+                with metrics.stage("promotions"):
+                    create_synthetic_promotions(prefix, min(promotions, categories))
+
+            uploads.append(upload_feed(path, consider_price_validation=validate))
+            # Only the measured import counts towards rows/s and queries/row;
+            # process_csv_upload times it as its "import" stage
+            measured = ImportMetrics(trace_memory=trace_memory)
+            imported, skipped = process_csv_upload(
+                uploads[-1],
+                chunk_size=chunk_size or None,
+                workers=workers,
+                metrics=measured,
+            )
+    finally:
+        if trace_memory:
+            tracemalloc.stop()
+        if not keep:
+            cleanup_benchmark(prefix, uploads)
+
+    stages = metrics.as_dict()
+    stages.update(measured.as_dict())
+    total = stages["import"]
+    totals = measured.log_fields()
+
+    return {
+        "benchmark": "import",
+        "created_at": timezone.now().isoformat(),
+        "options": options,
+        "rows": rows,
+        "imported": imported,
+        "skipped": skipped,
+        "wall_seconds": total["seconds"],
+        "rows_per_second": round(rows / total["seconds"], 1) if total["seconds"] else None,
+        "queries": totals["queries"],
+        "queries_per_row": round(totals["queries"] / rows, 4) if rows else None,
+        "bytes_read": totals["bytes_read"],
+        "peak_memory_kb": total["peak_memory_kb"],
+        "peak_rss_kb": totals["peak_memory_kb"],
+        "stages": stages,
+    }
@@ -0,0 +1,168 @@
+# pricing_monitor/services/import_metrics.py
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+from django.db import connection
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+def reset_peak_rss():
+    """
+    Starts a new peak-RSS measurement where the OS allows it (Linux);
+    elsewhere peak_rss_kb() stays the peak of the whole process.
+    """
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+    except OSError:
+        pass
+
+
+def peak_rss_kb():
+    """
+    Peak resident memory of this process in KB, or None if unknown.
+    """
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # bytes on macOS, KB elsewhere
+    return peak // 1024 if sys.platform == "darwin" else peak
+
+
+class ImportMetrics:
+    """
+    Wall time, SQL queries and (optionally) peak Python memory per stage
+    of an import.
+
+    Stages can nest ("import" around "parse" / "validation" / "products"
+    / "audit"...) and can be entered many times, once per chunk: the
+    numbers add up per name. Memory is traced with tracemalloc only when ``trace_memory`` is
+    set, as tracing slows Python down several times.
+    """
+
+    def __init__(self, trace_memory=False):
+        self.trace_memory = trace_memory
+        self.stages = {}
+        self.open_stages = []   # peaks of the stages that are running
+        self.bytes_read = 0
+        self.peak_rss_kb = None
+        self.worker_queries = 0
+
+    @contextmanager
+    def measure(self):
+        """
+        The whole import: the "import" stage plus the peak RSS.
+        """
+        reset_peak_rss()
+        try:
+            with self.stage("import"):
+                yield
+        finally:
+            self.note_rss(peak_rss_kb())
+
+    def note_rss(self, peak):
+        if peak is not None:
+            self.peak_rss_kb = max(self.peak_rss_kb or 0, peak)
+
+    @contextmanager
+    def stage(self, name):
+        totals = self.stages.setdefault(name, {
+            "seconds": 0.0,
+            "queries": 0,
+            "calls": 0,
+            "peak_memory_kb": None,
+        })
+        queries = [0]
+
+        def count_query(execute, sql, params, many, context):
+            queries[0] += 1
+            return execute(sql, params, many, context)
+
+        tracing = self.trace_memory and tracemalloc.is_tracing()
+        if tracing:
+            start_memory = tracemalloc.get_traced_memory()[0]
+            self.note_peak()
+            tracemalloc.reset_peak()
+            self.open_stages.append(start_memory)
+
+        started = time.perf_counter()
+        try:
+            with connection.execute_wrapper(count_query):
+                yield
+        finally:
+            totals["seconds"] += time.perf_counter() - started
+            totals["queries"] += queries[0]
+            totals["calls"] += 1
+
+            if tracing:
+                peak = max(self.open_stages.pop(), tracemalloc.get_traced_memory()[1])
+                peak_kb = (peak - start_memory) // 1024
+                totals["peak_memory_kb"] = max(totals["peak_memory_kb"] or 0, peak_kb)
+                # The enclosing stage saw this peak too
+                if self.open_stages:
+                    self.open_stages[-1] = max(self.open_stages[-1], peak)
+
+    def note_peak(self):
+        # reset_peak() is about to forget the peak of the enclosing stage
+        if self.open_stages:
+            self.open_stages[-1] = max(
+                self.open_stages[-1], tracemalloc.get_traced_memory()[1]
+            )
+
+    def merge(self, stages, peak=None):
+        """
+        Adds the stages measured by a worker process (see as_dict).
+        Worker time adds up across workers, so it can exceed wall time.
+        """
+        for name, totals in stages.items():
+            mine = self.stages.setdefault(name, {
+                "seconds": 0.0,
+                "queries": 0,
+                "calls": 0,
+                "peak_memory_kb": None,
+            })
+            mine["seconds"] += totals["seconds"]
+            mine["queries"] += totals["queries"]
+            mine["calls"] += totals["calls"]
+            if totals["peak_memory_kb"] is not None:
+                mine["peak_memory_kb"] = max(
+                    mine["peak_memory_kb"] or 0, totals["peak_memory_kb"]
+                )
+        self.worker_queries += stages.get("shard", {}).get("queries", 0)
+        self.note_rss(peak)
+
+    def log_fields(self):
+        """
+        The CSVImportLog fields of a measured import.
+        """
+        total = self.stages.get("import", {})
+        return {
+            "duration_seconds": round(total.get("seconds", 0.0), 3),
+            "queries": total.get("queries", 0) + self.worker_queries,
+            "bytes_read": self.bytes_read,
+            "peak_memory_kb": self.peak_rss_kb,
+            "stage_timings": self.as_dict(),
+        }
+
+    def as_dict(self):
+        return {
+            name: {
+                **totals,
+                "seconds": round(totals["seconds"], 4),
+            }
+            for name, totals in self.stages.items()
+        }
@@ -0,0 +1,430 @@
+# pricing_monitor/services/jobs.py
+import os
+import socket
+import threading
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import DatabaseError, connections
+from django.db.models import Q
+from django.utils import timezone
+
+from pricing_monitor.models import ProductCSVUpload
+from .bulk_importer import DEFAULT_CHUNK_SIZE, process_csv_upload_in_chunks
+from .csv_reader import count_csv_rows
+from .feed_archive import archive_members, is_archive
+from .feed_digest import identical_upload
+from .parallel_import import import_workers, process_csv_upload_parallel
+
+
+# A processing upload whose worker has not reported for this long is
+# considered abandoned and is resumed by the next worker
+DEFAULT_STALE_AFTER = timedelta(minutes=5)
+
+# How often a running job refreshes its heartbeat
+DEFAULT_HEARTBEAT_INTERVAL = timedelta(seconds=30)
+
+
+def default_worker_id():
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def worker_is_alive(worker_id):
+    """
+    Whether the worker ``worker_id`` (see default_worker_id) still runs:
+    True or False for a process of this host, None when it cannot be
+    told (another host, or an ID of another shape).
+    """
+    host, _, pid = worker_id.rpartition(":")
+    # os.kill() terminates the process on Windows instead of probing it
+    if host != socket.gethostname() or not pid.isdigit() or os.name == "nt":
+        return None
+    try:
+        os.kill(int(pid), 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        # Runs, under another user
+        return True
+    return True
+
+
+class Heartbeat:
+    """
+    Refreshes an upload's heartbeat_at from a background thread for as
+    long as its job runs, so hashing, counting, the duplicates pre-pass,
+    partitioning and long shards all count as alive, not only the moments
+    progress is reported.
+    """
+
+    def __init__(self, upload_id, interval=None):
+        if interval is None:
+            interval = getattr(
+                settings, "PRICING_IMPORT_HEARTBEAT_INTERVAL", DEFAULT_HEARTBEAT_INTERVAL
+            )
+        self.upload_id = upload_id
+        self.interval = interval.total_seconds()
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(
+            target=self.run, name=f"upload-{upload_id}-heartbeat", daemon=True
+        )
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stopped.set()
+        self.thread.join()
+
+    def run(self):
+        try:
+            while not self.stopped.wait(self.interval):
+                try:
+                    ProductCSVUpload.objects.filter(
+                        id=self.upload_id,
+                        status=ProductCSVUpload.STATUS_PROCESSING,
+                    ).update(heartbeat_at=timezone.now())
+                except DatabaseError:
+                    # e.g. the database stayed locked; the next beat retries
+                    pass
+        finally:
+            # This thread's own connection
+            connections.close_all()
+
+
+# Job state of an upload that is processed from scratch
+RESET_FIELDS = dict(
+    processed=False,
+    claimed_by="",
+    rows_done=0,
+    rows_total=None,
+    rows_per_second=None,
+    started_at=None,
+    finished_at=None,
+    error="",
+    checkpoint_at=None,
+    checkpoint_row=0,
+    checkpoint_offset=None,
+    checkpoint_encoding="",
+    checkpoint_imported=0,
+    checkpoint_skipped=0,
+    duplicate_of=None,
+)
+
+
+def enqueue_uploads(queryset):
+    """
+    Marks uploads as queued for the background worker.
+    Uploads that a worker is currently processing are left alone.
+
+    The feeds of a .zip are processed with their archive, so queuing the
+    archive queues them again too; they cannot be queued on their own.
+    """
+    queryset = queryset.filter(archive__isnull=True).exclude(
+        status=ProductCSVUpload.STATUS_PROCESSING
+    )
+    ProductCSVUpload.objects.filter(archive__in=queryset).update(
+        status=ProductCSVUpload.STATUS_PENDING,
+        **RESET_FIELDS,
+    )
+    return queryset.update(status=ProductCSVUpload.STATUS_UPLOADED, **RESET_FIELDS)
+
+
+def resume_uploads(queryset):
+    """
+    Queues failed uploads again, keeping their checkpoint so the worker
+    continues after the last committed row. A failed .zip resumes at its
+    failed feed.
+    """
+    queryset = queryset.filter(archive__isnull=True)
+    return queryset.filter(status=ProductCSVUpload.STATUS_FAILED).update(
+        status=ProductCSVUpload.STATUS_UPLOADED,
+        claimed_by="",
+        finished_at=None,
+        error="",
+    )
+
+
+def claim_next_upload(worker_id, stale_after=None):
+    """
+    Claims the oldest queued upload for ``worker_id``, or an upload whose
+    worker stopped sending heartbeats (it is then resumed from its
+    checkpoint).
+
+    A stale upload is only taken over once its worker is known to be gone:
+    a worker of this host that still runs keeps its upload. An upload
+    without a checkpoint (a parallel run) whose worker cannot be checked
+    is marked failed rather than imported a second time next to it; it
+    can be queued again from the admin.
+
+    The claim is a conditional UPDATE on the status (and heartbeat)
+    columns, so when several workers race for the same row exactly one of
+    them gets it, on every database backend.
+    """
+    if stale_after is None:
+        stale_after = getattr(
+            settings, "PRICING_IMPORT_STALE_AFTER", DEFAULT_STALE_AFTER
+        )
+    stale_before = timezone.now() - stale_after
+
+    candidates = (
+        ProductCSVUpload.objects
+        # Feeds of a .zip are only ever processed by their archive's job
+        .filter(archive__isnull=True)
+        .filter(
+            Q(status=ProductCSVUpload.STATUS_UPLOADED)
+            | Q(
+                status=ProductCSVUpload.STATUS_PROCESSING,
+                heartbeat_at__lt=stale_before,
+            )
+        )
+        .order_by("uploaded_at", "id")
+        .values_list("id", "status", "heartbeat_at", "claimed_by", "checkpoint_at")[:10]
+    )
+
+    for upload_id, status, heartbeat_at, claimed_by, checkpoint_at in candidates:
+        now = timezone.now()
+        unchanged = ProductCSVUpload.objects.filter(
+            id=upload_id,
+            status=status,
+            heartbeat_at=heartbeat_at,
+        )
+
+        if status == ProductCSVUpload.STATUS_PROCESSING:
+            alive = worker_is_alive(claimed_by)
+            if alive:
+                continue
+            if alive is None and checkpoint_at is None:
+                unchanged.update(
+                    status=ProductCSVUpload.STATUS_FAILED,
+                    error=(
+                        f"Worker {claimed_by} stopped sending heartbeats; "
+                        "queue the upload again once it is gone"
+                    ),
+                    finished_at=now,
+                )
+                continue
+
+        claimed = unchanged.update(
+            status=ProductCSVUpload.STATUS_PROCESSING,
+            claimed_by=worker_id,
+            started_at=now,
+            heartbeat_at=now,
+        )
+        if claimed:
+            return ProductCSVUpload.objects.get(id=upload_id)
+
+    return None
+
+
+def run_upload(upload, chunk_size=DEFAULT_CHUNK_SIZE, workers=None,
+               on_progress=None):
+    """
+    Processes a claimed upload (see process_upload) while a Heartbeat
+    keeps its claim alive.
+    """
+    with Heartbeat(upload.id):
+        return process_upload(
+            upload, chunk_size=chunk_size, workers=workers, on_progress=on_progress
+        )
+
+
+def process_upload(upload, chunk_size=DEFAULT_CHUNK_SIZE, workers=None,
+                   on_progress=None):
+    """
+    Processes a claimed upload in chunks, publishing progress on the
+    ProductCSVUpload row after every chunk (after every shard when
+    ``workers`` is above one).
+
+    An upload with a checkpoint continues after its last committed row.
+    Resumed runs are single-process: parallel runs keep no checkpoint.
+
+    A file identical to an already processed upload is marked processed
+    without importing it again. A .zip is processed feed by feed (see
+    run_archive).
+
+    ``on_progress(rows_done)`` is called after the upload's own progress
+    is published.
+    """
+    if is_archive(upload.file.name) and not upload.archive_member:
+        return run_archive(upload, chunk_size=chunk_size, workers=workers)
+
+    queryset = ProductCSVUpload.objects.filter(id=upload.id)
+    started = time.monotonic()
+    resume = upload.checkpoint_at is not None
+    resumed_from = upload.checkpoint_row if resume else 0
+    report_progress = on_progress
+
+    try:
+        original = identical_upload(upload)
+        if original is not None:
+            mark_duplicate(queryset, original)
+            return 0, 0
+
+        # Known already when the upload is resumed or is a feed of a .zip
+        rows_total = upload.rows_total
+        if rows_total is None:
+            rows_total = count_csv_rows(upload.file, member=upload.archive_member or None)
+        queryset.update(rows_total=rows_total, rows_done=resumed_from)
+
+        def on_progress(rows_done):
+            elapsed = time.monotonic() - started
+            queryset.update(
+                rows_done=rows_done,
+                rows_per_second=(
+                    round((rows_done - resumed_from) / elapsed, 1)
+                    if elapsed else None
+                ),
+                heartbeat_at=timezone.now(),
+            )
+            if report_progress:
+                report_progress(rows_done)
+
+        if resume:
+            imported, skipped = process_csv_upload_in_chunks(
+                upload,
+                chunk_size=chunk_size,
+                on_progress=on_progress,
+                resume=True,
+            )
+        else:
+            imported, skipped = process_csv_upload_parallel(
+                upload,
+                workers=import_workers(workers),
+                chunk_size=chunk_size,
+                on_progress=on_progress,
+            )
+
+    except Exception as e:
+        mark_failed(queryset, e)
+        raise
+
+    mark_processed(queryset)
+    return imported, skipped
+
+
+def run_archive(upload, chunk_size=DEFAULT_CHUNK_SIZE, workers=None):
+    """
+    Processes a claimed .zip upload. Every CSV in it is a feed of its own
+    (see archive_feeds), imported in this job one after the other with
+    process_upload; the archive's row shows the progress over all of them.
+
+    Feeds processed by an earlier attempt are not imported again, and a
+    feed that failed resumes from its checkpoint.
+    """
+    queryset = ProductCSVUpload.objects.filter(id=upload.id)
+    started = time.monotonic()
+    imported = 0
+    skipped = 0
+
+    try:
+        original = identical_upload(upload)
+        if original is not None:
+            mark_duplicate(queryset, original)
+            return 0, 0
+
+        feeds = archive_feeds(upload)
+        for feed in feeds:
+            if feed.rows_total is None:
+                feed.rows_total = count_csv_rows(upload.file, member=feed.archive_member)
+        rows_before = sum(feed.rows_total for feed in feeds if feed.processed)
+        resumed_from = rows_before
+        queryset.update(
+            rows_total=sum(feed.rows_total for feed in feeds),
+            rows_done=rows_before,
+        )
+
+        for feed in feeds:
+            if feed.processed:
+                continue
+
+            def on_progress(rows_done, rows_before=rows_before):
+                elapsed = time.monotonic() - started
+                queryset.update(
+                    rows_done=rows_before + rows_done,
+                    rows_per_second=(
+                        round((rows_before + rows_done - resumed_from) / elapsed, 1)
+                        if elapsed else None
+                    ),
+                    heartbeat_at=timezone.now(),
+                )
+
+            ProductCSVUpload.objects.filter(id=feed.id).update(
+                status=ProductCSVUpload.STATUS_PROCESSING,
+                claimed_by=upload.claimed_by,
+                started_at=timezone.now(),
+                heartbeat_at=timezone.now(),
+            )
+            # The archive's heartbeat covers its feeds
+            feed_imported, feed_skipped = process_upload(
+                feed, chunk_size=chunk_size, workers=workers, on_progress=on_progress
+            )
+            imported += feed_imported
+            skipped += feed_skipped
+            rows_before += feed.rows_total
+            queryset.update(rows_done=rows_before, heartbeat_at=timezone.now())
+
+    except Exception as e:
+        mark_failed(queryset, e)
+        raise
+
+    mark_processed(queryset)
+    return imported, skipped
+
+
+def archive_feeds(upload):
+    """
+    The feeds of a .zip upload, one ProductCSVUpload per CSV in it, in
+    archive order. They are created on first use with the archive's
+    import settings; the feed key is suffixed with the CSV's name so
+    every CSV keeps its own row digests.
+    """
+    existing = {feed.archive_member: feed for feed in upload.archive_feeds.all()}
+    feeds = []
+
+    for member in archive_members(upload.file.file):
+        feed = existing.get(member)
+        if feed is None:
+            feed = ProductCSVUpload.objects.create(
+                file=upload.file.name,
+                archive=upload,
+                archive_member=member,
+                feed_key=f"{upload.feed_key}:{member}"[:100] if upload.feed_key else "",
+                consider_price_validation=upload.consider_price_validation,
+                duplicate_sku_policy=upload.duplicate_sku_policy,
+                deal_starts_at=upload.deal_starts_at,
+                deal_ends_at=upload.deal_ends_at,
+                status=ProductCSVUpload.STATUS_PENDING,
+            )
+        feeds.append(feed)
+
+    if not feeds:
+        raise ValueError("Archive holds no CSV feeds")
+    return feeds
+
+
+def mark_duplicate(queryset, original):
+    queryset.update(
+        status=ProductCSVUpload.STATUS_PROCESSED,
+        processed=True,
+        duplicate_of=original,
+        finished_at=timezone.now(),
+    )
+
+
+def mark_failed(queryset, error):
+    queryset.update(
+        status=ProductCSVUpload.STATUS_FAILED,
+        error=str(error),
+        finished_at=timezone.now(),
+    )
+
+
+def mark_processed(queryset):
+    queryset.update(
+        status=ProductCSVUpload.STATUS_PROCESSED,
+        processed=True,
+        finished_at=timezone.now(),
+    )
@@ -0,0 +1,223 @@
+# pricing_monitor/services/parallel_import.py
+#
+# Spawned workers import this module before django.setup() has run, so
+# models are only imported inside functions here.
+import csv
+import multiprocessing
+import os
+import tempfile
+import zlib
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from django.conf import settings
+from django.db import connections
+from django.utils import timezone
+
+from .csv_reader import upload_reader
+from .parsers import FeedLayout
+
+
+ROW_NUMBER_COLUMN = "__row__"
+
+
+def import_workers(workers=None):
+    """
+    Number of worker processes, defaulting to PRICING_IMPORT_WORKERS.
+    """
+    if workers is None:
+        workers = getattr(settings, "PRICING_IMPORT_WORKERS", 1)
+    return max(1, int(workers))
+
+
+def shard_for(sku, shards):
+    """
+    Stable shard of a SKU. Every row of one SKU lands in the same shard,
+    so no two workers ever write the same Product.
+    """
+    return zlib.crc32((sku or "").strip().encode("utf-8")) % shards
+
+
+def partition_upload(csv_upload, shards, directory, metrics=None):
+    """
+    Streams the upload once into ``shards`` CSV files inside ``directory``.
+
+    Each shard row keeps its spreadsheet row number. Categories are left
+    to the workers: like the single-process import, a worker creates a
+    category only once a row using it passed validation, and workers that
+    create the same category at once share one row (see
+    CategoryResolver.flush).
+
+    Returns a list of ``(path, rows)`` pairs. The bytes read are added to
+    ``metrics`` (ImportMetrics).
+    """
+    paths = [os.path.join(directory, f"shard-{i}.csv") for i in range(shards)]
+    counts = [0] * shards
+    files = []
+    writers = []
+
+    reader = upload_reader(csv_upload)
+    layout = None
+
+    try:
+        for index, values in reader.iter_values():
+            if layout is None:
+                layout = FeedLayout(reader.fieldnames)
+                for path in paths:
+                    f = open(path, "w", encoding="utf-8", newline="")
+                    files.append(f)
+                    writer = csv.writer(f)
+                    writer.writerow([ROW_NUMBER_COLUMN] + layout.fieldnames)
+                    writers.append(writer)
+
+            row = layout.row(values)
+            shard = shard_for(row.sku, shards)
+            writers[shard].writerow([index] + values)
+            counts[shard] += 1
+    finally:
+        for f in files:
+            f.close()
+
+    if metrics is not None:
+        metrics.bytes_read += reader.bytes_read
+
+    return [
+        (path, rows)
+        for path, rows in zip(paths, counts)
+        if rows
+    ]
+
+
+def iter_shard_rows(path):
+    """
+    Reads back ``(row_number, FeedRow)`` pairs written by partition_upload.
+    """
+    with open(path, encoding="utf-8", newline="") as f:
+        reader = csv.reader(f)
+        layout = FeedLayout(next(reader)[1:])
+        for values in reader:
+            yield int(values[0]), layout.row(values[1:])
+
+
+def setup_worker():
+    import django
+    django.setup()
+
+
+def import_shard(upload_id, path, chunk_size, window, promotions_at):
+    """
+    Worker entry point: imports one shard with the chunked engine.
+
+    Returns ``(imported, skipped, stages, peak_rss_kb)``, the stages
+    as ImportMetrics.as_dict() for the parent to merge.
+    """
+    from pricing_monitor.models import ProductCSVUpload
+    from .bulk_importer import import_rows
+    from .duplicates import DuplicateSKUs
+    from .import_metrics import ImportMetrics, peak_rss_kb
+
+    metrics = ImportMetrics()
+    try:
+        with metrics.stage("shard"):
+            csv_upload = ProductCSVUpload.objects.get(id=upload_id)
+            # Every row of a SKU is in the same shard
+            with metrics.stage("duplicates"):
+                duplicates = DuplicateSKUs.scan(
+                    iter_shard_rows(path), csv_upload.duplicate_sku_policy
+                )
+            imported, skipped = import_rows(
+                csv_upload,
+                iter_shard_rows(path),
+                chunk_size=chunk_size,
+                window=window,
+                promotions_at=promotions_at,
+                duplicates=duplicates,
+                metrics=metrics,
+            )
+        return imported, skipped, metrics.as_dict(), peak_rss_kb()
+    finally:
+        connections.close_all()
+
+
+def process_csv_upload_parallel(csv_upload, workers=None, chunk_size=None,
+                                on_progress=None, metrics=None):
+    """
+    Imports an upload with several worker processes.
+
+    Rows are partitioned by a hash of the SKU into one shard per worker;
+    each worker runs the chunked engine on its shard against the same deal
+    window and promotion timestamp. The counts of all shards are merged
+    into one CSVImportLog. When two new SKUs in different shards share a
+    product slug, whichever shard writes first keeps it.
+
+    ``on_progress(rows_done)`` is called as each shard finishes. The
+    stages of the workers are merged into ``metrics``: their seconds add
+    up across processes, and peak memory is that of the largest process.
+    """
+    from pricing_monitor.models import CSVImportLog
+    from .bulk_importer import DEFAULT_CHUNK_SIZE, process_csv_upload_in_chunks
+    from .deal_expiry import deal_window
+    from .import_metrics import ImportMetrics
+
+    workers = import_workers(workers)
+    chunk_size = chunk_size or DEFAULT_CHUNK_SIZE
+
+    if workers == 1:
+        return process_csv_upload_in_chunks(
+            csv_upload,
+            chunk_size=chunk_size,
+            on_progress=on_progress,
+            metrics=metrics,
+        )
+
+    metrics = metrics or ImportMetrics()
+
+    window = deal_window(csv_upload)
+    promotions_at = timezone.now()
+
+    imported = 0
+    skipped = 0
+    rows_done = 0
+
+    with metrics.measure(), tempfile.TemporaryDirectory(prefix="pricing-import-") as directory:
+        with metrics.stage("partition"):
+            shards = partition_upload(csv_upload, workers, directory, metrics=metrics)
+
+        # spawn works the same on every platform and never inherits the
+        # parent's database connections
+        with metrics.stage("shards"), ProcessPoolExecutor(
+            max_workers=min(workers, len(shards)) or 1,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=setup_worker,
+        ) as pool:
+            futures = {
+                pool.submit(
+                    import_shard,
+                    csv_upload.id,
+                    path,
+                    chunk_size,
+                    window,
+                    promotions_at,
+                ): rows
+                for path, rows in shards
+            }
+
+            for future in as_completed(futures):
+                shard_imported, shard_skipped, stages, peak = future.result()
+                metrics.merge(stages, peak)
+                imported += shard_imported
+                skipped += shard_skipped
+                rows_done += futures[future]
+
+                if on_progress:
+                    on_progress(rows_done)
+
+    CSVImportLog.objects.create(
+        csv_upload=csv_upload,
+        file_name=csv_upload.feed_name,
+        imported=imported,
+        skipped=skipped,
+        unchanged=rows_done - imported - skipped,
+        **metrics.log_fields(),
+    )
+
+    return imported, skipped
@@ -0,0 +1,171 @@
+# pricing_monitor/services/parsers.py
+import re
+from collections import namedtuple
+from decimal import Decimal
+from operator import itemgetter
+
+
+# Digit groups are either Indian (1,70,000) or western (170,000); anything
+# else (e.g. a decimal comma "1,50") does not parse.
+GROUPED_RE = re.compile(r"\d{1,3}(?:,\d{3})+|\d{1,2}(?:,\d{2})+,\d{3}")
+
+# Everything else that still is a number: "-₹ 9,750", "Rs. 65,000",
+# "INR 500", "15 %"
+NUMBER_RE = re.compile(
+    r"""
+    \s*
+    (?P<sign>-)?\s*
+    (?:₹|rs\.?|inr|\$)?\s*
+    (?P<digits>
+        \d+
+      | \d{1,3}(?:,\d{3})+
+      | \d{1,2}(?:,\d{2})+,\d{3}
+    )
+    (?P<fraction>\.\d*)?
+    \s*(?P<percent>%)?
+    \s*
+    """,
+    re.VERBOSE | re.IGNORECASE,
+)
+
+
+def _plain(value):
+    """
+    Fast path for the common shapes ("45999", "65,000", "₹1,70,000.50"):
+    only string methods, no regex unless there are digit groups. Returns
+    None when the value needs the full NUMBER_RE.
+    """
+    text = value.strip()
+    if text[:1] == "₹":
+        text = text[1:].lstrip()
+
+    whole, dot, fraction = text.partition(".")
+    if "," in whole:
+        if GROUPED_RE.fullmatch(whole) is None:
+            return None
+        whole = whole.replace(",", "")
+
+    if not whole.isdecimal() or (fraction and not fraction.isdecimal()):
+        return None
+    return Decimal(f"{whole}.{fraction}" if fraction else whole)
+
+
+def _match(value):
+    return NUMBER_RE.fullmatch(value)
+
+
+def _decimal(match):
+    digits = match["digits"].replace(",", "")
+    fraction = (match["fraction"] or "").rstrip(".")
+    number = Decimal(digits + fraction)
+    return -number if match["sign"] else number
+
+
+def _text(value):
+    if value is None or isinstance(value, str):
+        return value
+    return str(value)
+
+
+def parse_price(value):
+    """
+    Decimal amount of a price cell, or None. A trailing % is not a price.
+    """
+    value = _text(value)
+    if not value:
+        return None
+
+    number = _plain(value)
+    if number is not None:
+        return number
+
+    match = _match(value)
+    if match is None or match["percent"]:
+        return None
+    return _decimal(match)
+
+
+def parse_percent(value):
+    """
+    Decimal percentage of a cell like "15%" or "15", or None.
+    """
+    value = _text(value)
+    if not value:
+        return None
+
+    number = _plain(value.rstrip().rstrip("%"))
+    if number is not None:
+        return number
+
+    match = _match(value)
+    if match is None:
+        return None
+    return _decimal(match)
+
+
+def parse_int(value):
+    """
+    Integer of a count cell like "1,200" or "25", or None.
+    """
+    number = parse_price(value)
+    if number is None or number != number.to_integral_value():
+        return None
+    return int(number)
+
+
+# ----------------------------------------------------------------------
+# Feed rows
+# ----------------------------------------------------------------------
+FEED_COLUMNS = (
+    ("sku", "SKU"),
+    ("name", "Product Name"),
+    ("category", "Category"),
+    ("subcategory", "Sub-category"),
+    ("mrp", "MRP"),
+    ("net_price", "Net Price"),
+)
+
+# The cells of a feed row the importers use, as raw text (None when the
+# column is missing or the row is short)
+FeedRow = namedtuple("FeedRow", [field for field, _ in FEED_COLUMNS])
+
+
+class FeedLayout:
+    """
+    Where each FEED_COLUMNS column sits in the rows of one feed, resolved
+    once from the header. row() then picks the cells out of a csv.reader
+    list with a single itemgetter call instead of building a dict.
+    """
+
+    def __init__(self, fieldnames):
+        # Later duplicates win, as they do in csv.DictReader
+        positions = {name: i for i, name in enumerate(fieldnames)}
+        self.indices = [positions.get(column) for _, column in FEED_COLUMNS]
+        self.fieldnames = list(fieldnames)
+
+        present = [i for i in self.indices if i is not None]
+        self.width = max(present) + 1 if present else 0
+        self.getter = None
+        if len(present) == len(self.indices):
+            self.getter = itemgetter(*self.indices)
+
+    def row(self, values):
+        if self.getter is not None and len(values) >= self.width:
+            return FeedRow._make(self.getter(values))
+
+        count = len(values)
+        return FeedRow._make(
+            values[i] if i is not None and i < count else None
+            for i in self.indices
+        )
+
+
+def iter_feed_rows(reader):
+    """
+    ``(row_number, FeedRow)`` pairs from a row reader's raw values.
+    """
+    layout = None
+    for index, values in reader.iter_values():
+        if layout is None:
+            layout = FeedLayout(reader.fieldnames)
+        yield index, layout.row(values)
@@ -1,5 +1,9 @@
+from collections import namedtuple
 from decimal import Decimal
 
+import numpy as np
+from django.conf import settings
+
 def get_current_sale_price(product):
     """
     Returns the effective sale price considering:
@@ -14,34 +18,248 @@ def get_current_sale_price(product):
 
     return product.mrp
 
-'''
-def validate_price(mrp, net_price, min_percent):
+# ----------------------------------------------------------------------
+# Threshold rules, evaluated on a whole chunk of rows at once with the
+# semantics of the frontend's validateProduct (utils/priceValidation.ts)
+# ----------------------------------------------------------------------
+PriceThresholds = namedtuple(
+    "PriceThresholds",
+    ["min_discount", "max_discount", "min_margin", "max_margin",
+     "low_price", "high_price"],
+)
+
+# DEFAULT_THRESHOLDS of the frontend; PRICING_PRICE_THRESHOLDS overrides them
+DEFAULT_THRESHOLDS = PriceThresholds(
+    min_discount=5,
+    max_discount=50,
+    min_margin=15,
+    max_margin=80,
+    low_price=10,
+    high_price=200,
+)
+
+# Feeds carry no cost; like the frontend, assume 60% of the selling price
+DEFAULT_COST_RATIO = 0.6
+
+# Deviation from the reference price (the frontend's competitor price,
+# the current sale price on import) that is flagged, in percent
+ABOVE_REFERENCE_PERCENT = 20
+BELOW_REFERENCE_PERCENT = 30
+
+# Reason codes, one bit per rule
+DISCOUNT_BELOW_MIN = 1
+DISCOUNT_ABOVE_MAX = 2
+MARGIN_BELOW_MIN = 4
+MARGIN_ABOVE_MAX = 8
+PRICE_SUSPICIOUSLY_LOW = 16
+HIGH_PRICE_LOW_MARGIN = 32
+ABOVE_REFERENCE = 64
+BELOW_REFERENCE = 128
+
+SEVERITY_NONE = 0
+SEVERITY_LOW = 1
+SEVERITY_MEDIUM = 2
+SEVERITY_HIGH = 3
+SEVERITY_NAMES = {
+    SEVERITY_NONE: "",
+    SEVERITY_LOW: "low",
+    SEVERITY_MEDIUM: "medium",
+    SEVERITY_HIGH: "high",
+}
+
+# Per-row results of evaluate_rules, all NumPy arrays of the same length
+# (``thresholds`` holds scalars or arrays)
+RuleResults = namedtuple(
+    "RuleResults",
+    ["codes", "severity", "original", "selling", "cost", "reference",
+     "discount", "margin", "deviation", "thresholds"],
+)
+
+
+def default_thresholds():
+    overrides = getattr(settings, "PRICING_PRICE_THRESHOLDS", None) or {}
+    return DEFAULT_THRESHOLDS._replace(**overrides)
+
+
+def as_prices(values):
     """
-    min_percent: Decimal (e.g. 50 means 50%)
+    Prices (Decimal, float or None) as a float64 array; None is NaN.
     """
+    if isinstance(values, np.ndarray):
+        return values.astype(np.float64, copy=False)
+    return np.fromiter(
+        (np.nan if value is None else float(value) for value in values),
+        dtype=np.float64,
+    )
 
-    if mrp is None or net_price is None:
-        return False, "MRP or Net Price missing"
 
-    if mrp <= 0:
-        return False, "Invalid MRP value"
+def or_else(values, fallback):
+    """
+    ``values || fallback`` of JavaScript: 0 and NaN take the fallback.
+    """
+    return np.where((values == 0) | np.isnan(values), fallback, values)
+
 
-    min_percent = Decimal(min_percent) / Decimal("100")
-    min_allowed_price = mrp * min_percent
+def evaluate_rules(mrp, net_price, current_price=None, cost_price=None,
+                   thresholds=None):
+    """
+    Evaluates the threshold rules on every row at once and returns
+    RuleResults: a bitmask of reason codes and a severity per row.
+
+    ``net_price`` is the price being set, ``current_price`` the reference
+    it is compared to (the frontend's competitor price). Missing values
+    fall back exactly as the frontend's parser does: no MRP means the net
+    price is the original price, no cost means 60% of the selling price.
 
-    if net_price < min_allowed_price:
-        return (
-            False,
-            f"Net Price below {min_percent * 100}% of MRP "
-            f"(Min Allowed: ₹{min_allowed_price})"
+    The fields of ``thresholds`` (PriceThresholds) can be scalars or
+    arrays with one value per row. Severity follows the frontend's
+    sequence of overrides, so a later rule can lower it (e.g. "high price
+    with low margin" turns a low-margin "high" into "medium"); rows
+    without issues have SEVERITY_NONE.
+    """
+    thresholds = thresholds or default_thresholds()
+    t = PriceThresholds._make(np.asarray(value, dtype=np.float64) for value in thresholds)
+
+    net = as_prices(net_price)
+    rows = len(net)
+    original = or_else(or_else(as_prices(mrp), net), 100.0)
+    selling = or_else(net, original)
+    if cost_price is None:
+        cost = selling * DEFAULT_COST_RATIO
+    else:
+        cost = or_else(as_prices(cost_price), selling * DEFAULT_COST_RATIO)
+    if current_price is None:
+        reference = np.full(rows, np.nan)
+    else:
+        reference = as_prices(current_price)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        discount = np.where(original > 0, (original - selling) / original * 100, 0.0)
+        margin = np.where(selling > 0, (selling - cost) / selling * 100, 0.0)
+        has_reference = (reference != 0) & ~np.isnan(reference)
+        deviation = np.where(
+            has_reference, (selling - reference) / reference * 100, np.nan
         )
+    discount = np.nan_to_num(discount, nan=0.0)
+    margin = np.nan_to_num(margin, nan=0.0)
+
+    codes = np.zeros(rows, dtype=np.uint16)
+    severity = np.full(rows, SEVERITY_LOW, dtype=np.int8)
+
+    def flag(condition, code, level=None):
+        codes[condition] |= code
+        if level is not None:
+            severity[condition] = level
+
+    low_margin = margin < t.min_margin
+    flag(discount < t.min_discount, DISCOUNT_BELOW_MIN)
+    flag(discount > t.max_discount, DISCOUNT_ABOVE_MAX, SEVERITY_HIGH)
+    flag(low_margin, MARGIN_BELOW_MIN, SEVERITY_HIGH)
+    flag(margin > t.max_margin, MARGIN_ABOVE_MAX, SEVERITY_MEDIUM)
+    flag(selling < t.low_price, PRICE_SUSPICIOUSLY_LOW, SEVERITY_HIGH)
+    flag((selling > t.high_price) & low_margin, HIGH_PRICE_LOW_MARGIN, SEVERITY_MEDIUM)
 
-    return True, "Valid"
+    above = has_reference & (deviation > ABOVE_REFERENCE_PERCENT)
+    codes[above] |= ABOVE_REFERENCE
+    severity[above & (severity != SEVERITY_HIGH)] = SEVERITY_MEDIUM
+    flag(
+        has_reference & ~above & (deviation < -BELOW_REFERENCE_PERCENT),
+        BELOW_REFERENCE,
+        SEVERITY_MEDIUM,
+    )
 
-'''
+    severity[codes == 0] = SEVERITY_NONE
 
-def validate_price(*args, **kwargs):
-    return True, None
+    return RuleResults(
+        codes, severity, original, selling, cost, reference,
+        discount, margin, deviation, t,
+    )
+
+
+def row_thresholds(results, i):
+    return PriceThresholds._make(
+        float(value if value.ndim == 0 else value[i]) for value in results.thresholds
+    )
+
+
+def describe_issues(results, i):
+    """
+    The issues of row ``i`` as the frontend words them, joined into one
+    reason.
+    """
+    codes = int(results.codes[i])
+    t = row_thresholds(results, i)
+    discount = results.discount[i]
+    margin = results.margin[i]
+    deviation = results.deviation[i]
+
+    issues = []
+    if codes & DISCOUNT_BELOW_MIN:
+        issues.append(f"Discount ({discount:.1f}%) is below minimum threshold ({t.min_discount:g}%)")
+    if codes & DISCOUNT_ABOVE_MAX:
+        issues.append(f"Discount ({discount:.1f}%) exceeds maximum threshold ({t.max_discount:g}%)")
+    if codes & MARGIN_BELOW_MIN:
+        issues.append(f"Profit margin ({margin:.1f}%) is below minimum ({t.min_margin:g}%)")
+    if codes & MARGIN_ABOVE_MAX:
+        issues.append(f"Unusually high margin ({margin:.1f}%) - verify pricing")
+    if codes & PRICE_SUSPICIOUSLY_LOW:
+        issues.append(f"Price (₹{results.selling[i]:g}) is suspiciously low")
+    if codes & HIGH_PRICE_LOW_MARGIN:
+        issues.append("High price with low margin - review cost structure")
+    if codes & ABOVE_REFERENCE:
+        issues.append(f"Price is {deviation:.1f}% higher than current sale price")
+    if codes & BELOW_REFERENCE:
+        issues.append(
+            f"Price is {abs(deviation):.1f}% lower than current sale price - potential margin loss"
+        )
+    return "; ".join(issues)
+
+
+def recommend(results, i):
+    """
+    The frontend's recommendation for row ``i``.
+    """
+    codes = int(results.codes[i])
+    t = row_thresholds(results, i)
+    reference = results.reference[i]
+
+    if not codes:
+        return "Pricing is within acceptable ranges."
+    if results.margin[i] < t.min_margin:
+        price = results.cost[i] * (1 + t.min_margin / 100)
+        return f"Consider raising price to ₹{price:.2f} to meet minimum margin."
+    if results.discount[i] > t.max_discount:
+        price = results.original[i] * (1 - t.max_discount / 100)
+        return f"Reduce discount to {t.max_discount:g}% (price: ₹{price:.2f})."
+    if reference and not np.isnan(reference) and results.selling[i] > reference * 1.1:
+        return f"Consider matching current sale price of ₹{reference:.2f}."
+    return "Review pricing strategy for this product."
+
+
+def price_rejections(mrp, net_price, current_price=None, cost_price=None,
+                     thresholds=None):
+    """
+    ``{position: (reason, suggestion)}`` of the rows the rules reject, the
+    ones of high severity. Wording is only built for those rows.
+    """
+    results = evaluate_rules(mrp, net_price, current_price, cost_price, thresholds)
+    return {
+        int(i): (describe_issues(results, i), recommend(results, i))
+        for i in np.flatnonzero(results.severity == SEVERITY_HIGH)
+    }
+
+
+def validate_price(mrp, net_price, current_price=None, thresholds=None):
+    """
+    The rules for one row: ``(True, None)``, or ``(False, reason)`` when
+    they reject it.
+    """
+    rejection = price_rejections(
+        [mrp], [net_price], [current_price], thresholds=thresholds
+    ).get(0)
+    if rejection is None:
+        return True, None
+    return False, rejection[0]
 
 # from decimal import Decimal
 
@@ -0,0 +1,57 @@
+# pricing_monitor/services/promotion_snapshot.py
+from django.utils import timezone
+
+from promotions.models import ProductPromotion, CategoryPromotion
+from promotions.promotion_index import category_promotion_rank, product_promotion_rank
+
+
+class PromotionSnapshot:
+    """
+    Every promotion that is active at one fixed import timestamp.
+
+    Loaded with one query per promotion type, so all rows of an upload are
+    validated against the same point in time and each row's current sale
+    price is a dictionary lookup.
+    """
+
+    def __init__(self, at=None):
+        self.at = at or timezone.now()
+
+        # Overlapping promotions are ranked as on the storefront
+        self.product_promotions = {}
+        product_promos = ProductPromotion.objects.filter(
+            is_active=True,
+            start_date__lte=self.at,
+            end_date__gte=self.at,
+        )
+        for promo in product_promos:
+            self.keep(self.product_promotions, promo.product_id, promo, product_promotion_rank)
+
+        self.category_promotions = {}
+        category_promos = CategoryPromotion.objects.filter(
+            is_active=True,
+            start_date__lte=self.at,
+            end_date__gte=self.at,
+        )
+        for promo in category_promos:
+            self.keep(self.category_promotions, promo.category_id, promo, category_promotion_rank)
+
+    @staticmethod
+    def keep(winners, key, promo, rank):
+        current = winners.get(key)
+        if current is None or rank(promo) > rank(current):
+            winners[key] = promo
+
+    def current_sale_price(self, product):
+        """
+        product promotion > category promotion > sale_price > mrp
+        """
+        promo = self.product_promotions.get(product.id)
+        if promo:
+            return promo.get_discounted_price(product)
+
+        promo = self.category_promotions.get(product.category_id)
+        if promo:
+            return promo.get_discounted_price(product)
+
+        return product.sale_price or product.mrp
@@ -0,0 +1,78 @@
+# pricing_monitor/services/threshold_profiles.py
+import numpy as np
+
+from catalog.models import Category
+from pricing_monitor.models import PriceThresholdProfile
+from .price_rules import PriceThresholds, default_thresholds
+
+
+class ThresholdTable:
+    """
+    The price thresholds of every category, compiled once per import.
+
+    A category uses its own PriceThresholdProfile or, without one, the
+    nearest ancestor's; categories with neither use default_thresholds().
+    The parent chains are resolved here, in memory, from two queries, so
+    the import never walks the tree: ``profile_of[category_id]`` is the
+    row of ``values`` that applies, and lookup() picks the thresholds of
+    a whole chunk with one fancy-indexing call.
+
+    Categories created after the table was built use the defaults.
+    """
+
+    def __init__(self, default=None):
+        default = default or default_thresholds()
+        fields = PriceThresholds._fields
+
+        # Row 0 is the default; profile rows follow in ID order
+        rows = [tuple(float(value) for value in default)]
+        row_of_profile = {}
+        for profile in PriceThresholdProfile.objects.order_by("id"):
+            row_of_profile[profile.id] = len(rows)
+            rows.append(tuple(float(getattr(profile, field)) for field in fields))
+        self.values = np.array(rows, dtype=np.float64).reshape(-1, len(fields))
+
+        parents = {}
+        profiles = {}
+        for category_id, parent_id, profile_id in Category.objects.values_list(
+            "id", "parent_id", "threshold_profile_id"
+        ):
+            parents[category_id] = parent_id
+            profiles[category_id] = profile_id
+
+        size = max(parents, default=-1) + 1
+        self.profile_of = np.zeros(size, dtype=np.int32)
+        resolved = {}
+
+        for category_id in parents:
+            # Walk up to the first category that has a profile or is resolved
+            chain = []
+            current = category_id
+            while current is not None and current not in resolved and current not in chain:
+                chain.append(current)
+                if profiles.get(current) is not None:
+                    break
+                current = parents.get(current)
+
+            row = 0
+            if current is not None and current in resolved:
+                row = resolved[current]
+            elif chain and profiles.get(chain[-1]) is not None:
+                row = row_of_profile[profiles[chain[-1]]]
+            for seen in chain:
+                resolved[seen] = row
+            self.profile_of[category_id] = row
+
+    def lookup(self, category_ids):
+        """
+        PriceThresholds with one value per row (NumPy arrays) for
+        ``category_ids``. None and unknown IDs get the defaults.
+        """
+        ids = np.fromiter(
+            (-1 if category_id is None else category_id for category_id in category_ids),
+            dtype=np.int64,
+        )
+        known = (ids >= 0) & (ids < len(self.profile_of))
+        rows = np.zeros(len(ids), dtype=np.int32)
+        rows[known] = self.profile_of[ids[known]]
+        return PriceThresholds._make(self.values[rows].T)
@@ -0,0 +1,175 @@
+# pricing_monitor/services/xlsx_reader.py
+import re
+from datetime import date, datetime, time
+
+try:
+    import openpyxl
+except ImportError:
+    openpyxl = None
+
+try:
+    import xlrd
+except ImportError:
+    xlrd = None
+
+
+WORKBOOK_EXTENSIONS = (".xlsx", ".xlsm")
+LEGACY_WORKBOOK_EXTENSIONS = (".xls",)
+
+
+# Quoted literals and backslash escapes of a number format
+FORMAT_LITERALS_RE = re.compile(r'"[^"]*"|\\.')
+
+
+def is_percent_format(number_format):
+    """
+    Whether a cell's number format shows its value as a percentage
+    ("0%", "0.00%"), ignoring a "%" inside quoted literals.
+    """
+    if not number_format or "%" not in number_format:
+        return False
+    return "%" in FORMAT_LITERALS_RE.sub("", number_format)
+
+
+def cell_text(value, number_format=None):
+    """
+    A cell value as the text a CSV export of the sheet would contain.
+    Percent-formatted numbers are stored as fractions (15% is 0.15) and
+    exported as "15%".
+    """
+    if value is None:
+        return ""
+    if isinstance(value, bool):
+        return "TRUE" if value else "FALSE"
+    if isinstance(value, (int, float)) and is_percent_format(number_format):
+        return format(value * 100, ".15g") + "%"
+    if isinstance(value, float):
+        # Excel keeps 15 significant digits: 4599.900000000001 -> 4599.9
+        return format(value, ".15g")
+    if isinstance(value, (datetime, date, time)):
+        return value.isoformat()
+    return str(value)
+
+
+class WorkbookRowReader:
+    """
+    Streams ``(row_number, row)`` pairs from the first sheet of an .xlsx
+    upload, with the same row dicts (header -> text) as CSVRowReader.
+
+    The sheet is opened in read-only mode, which parses the XML as it
+    goes instead of building every cell, so memory does not grow with
+    the number of rows (only the workbook's shared-strings table is held
+    in memory). Formulas are read as their cached values.
+
+    Row numbers are the sheet's own; tell() is the number of the last
+    yielded row, and passing it back as ``offset`` resumes after it.
+    """
+
+    encoding = ""
+    fieldnames = None
+    bytes_read = 0   # the whole workbook is read to open it
+
+    def __init__(self, upload_file, offset=0, rows_before=0, encoding=None):
+        if openpyxl is None:
+            raise ValueError("Reading .xlsx files requires the openpyxl package")
+        self.raw = getattr(upload_file, "file", upload_file)
+        self.offset = offset or 0
+        self.last_row = self.offset
+
+    def __iter__(self):
+        for index, values in self.iter_values():
+            yield index, dict(zip(self.fieldnames, values))
+
+    def iter_values(self):
+        """
+        Same rows as iterating the reader, as lists of cell text.
+        ``fieldnames`` is set before the first row.
+        """
+        self.bytes_read = self.raw.seek(0, 2)
+        self.raw.seek(0)
+        workbook = openpyxl.load_workbook(self.raw, read_only=True, data_only=True)
+
+        try:
+            sheet = workbook.worksheets[0]
+            header = next(sheet.iter_rows(max_row=1, values_only=True), None)
+            if header is None:
+                return
+            self.fieldnames = [cell_text(name) for name in header]
+
+            start = max(self.offset + 1, 2)
+            # Cells rather than values_only: percent formats change the text
+            rows = sheet.iter_rows(min_row=start)
+            for index, cells in enumerate(rows, start=start):
+                self.last_row = index
+                if all(cell.value is None or cell.value == "" for cell in cells):
+                    continue
+                yield index, [
+                    cell_text(cell.value, getattr(cell, "number_format", None))
+                    for cell in cells
+                ]
+        finally:
+            workbook.close()
+
+    def tell(self):
+        return self.last_row
+
+
+class LegacyWorkbookRowReader(WorkbookRowReader):
+    """
+    Same as WorkbookRowReader for .xls files, read with xlrd. The .xls
+    format caps a sheet at 65,536 rows, so it is loaded on demand rather
+    than streamed.
+    """
+
+    def __init__(self, upload_file, offset=0, rows_before=0, encoding=None):
+        if xlrd is None:
+            raise ValueError("Reading .xls files requires the xlrd package")
+        self.raw = getattr(upload_file, "file", upload_file)
+        self.offset = offset or 0
+        self.last_row = self.offset
+
+    def iter_values(self):
+        self.raw.seek(0)
+        contents = self.raw.read()
+        self.bytes_read = len(contents)
+        book = xlrd.open_workbook(
+            file_contents=contents, on_demand=True, formatting_info=True
+        )
+
+        try:
+            sheet = book.sheet_by_index(0)
+            if sheet.nrows == 0:
+                return
+            self.fieldnames = [cell_text(name) for name in sheet.row_values(0)]
+
+            for position in range(max(self.offset, 1), sheet.nrows):
+                index = position + 1
+                self.last_row = index
+                cells = sheet.row(position)
+                values = [legacy_cell_value(cell, book.datemode) for cell in cells]
+                if all(value is None or value == "" for value in values):
+                    continue
+                yield index, [
+                    cell_text(value, legacy_number_format(book, cell))
+                    for value, cell in zip(values, cells)
+                ]
+        finally:
+            book.release_resources()
+
+
+def legacy_number_format(book, cell):
+    if cell.xf_index is None:
+        return None
+    xf = book.xf_list[cell.xf_index]
+    number_format = book.format_map.get(xf.format_key)
+    return number_format.format_str if number_format else None
+
+
+def legacy_cell_value(cell, datemode):
+    if cell.ctype == xlrd.XL_CELL_DATE:
+        return xlrd.xldate.xldate_as_datetime(cell.value, datemode)
+    if cell.ctype == xlrd.XL_CELL_BOOLEAN:
+        return bool(cell.value)
+    if cell.ctype in (xlrd.XL_CELL_EMPTY, xlrd.XL_CELL_BLANK):
+        return None
+    return cell.value
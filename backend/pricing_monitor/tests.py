@@ -1,3 +1,1589 @@
-from django.test import TestCase
+import csv
+import gzip
+import hashlib
+import io
+import json
+import os
+import socket
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import timedelta
+from decimal import Decimal
+import zipfile
+from concurrent.futures import Future
+from unittest import mock, skipIf
+
+import openpyxl
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from catalog.models import Category, Product
+from pricing_monitor.models import (
+    ChunkedUpload,
+    FeedRowDigest,
+    CSVImportLog,
+    ImportedProduct,
+    PriceThresholdProfile,
+    ProductCSVUpload,
+    SkippedPriceImport,
+)
+from pricing_monitor.services.audit_writer import AuditWriter
+from pricing_monitor.services.bulk_importer import process_csv_upload_in_chunks
+from pricing_monitor.services.csv_processor import process_csv_upload
+from pricing_monitor.services.csv_reader import CSVRowReader
+from pricing_monitor.services.dry_run import dry_run_csv_upload
+from pricing_monitor.services.deal_expiry import expire_deal_prices
+from pricing_monitor.services.feed_generator import BAD_VALUES, iter_synthetic_rows
+from pricing_monitor.services.import_benchmark import run_import_benchmark
+from pricing_monitor.services.jobs import (
+    Heartbeat,
+    claim_next_upload,
+    default_worker_id,
+    enqueue_uploads,
+    run_upload,
+)
+from pricing_monitor.services.xlsx_reader import WorkbookRowReader
+from pricing_monitor.services.parallel_import import (
+    iter_shard_rows,
+    partition_upload,
+    process_csv_upload_parallel,
+    shard_for,
+)
+from pricing_monitor.services.parsers import (
+    FeedLayout,
+    parse_int,
+    parse_percent,
+    parse_price,
+)
+from pricing_monitor.services import price_rules
+from pricing_monitor.services.price_rules import (
+    DEFAULT_THRESHOLDS,
+    SEVERITY_HIGH,
+    SEVERITY_MEDIUM,
+    SEVERITY_NONE,
+    evaluate_rules,
+    validate_price,
+)
+from pricing_monitor.services.threshold_profiles import ThresholdTable
 
 # Create your tests here.
+
+CSV_HEADER = (
+    "SKU,Category,Sub-category,Brand,Product Name,MRP,Discount,"
+    "Discount Amount,Net Price,Stock,Rating\n"
+)
+
+
+def write_synthetic_csv(path, rows):
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        f.write(CSV_HEADER)
+        for i in range(rows):
+            f.write(
+                f"SKU-{i:07d},Mobiles,Brand {i % 50},Brand {i % 50},"
+                f"Synthetic Phone {i},49999,10,4999.9,{45000 + i % 1000},20,4.4\n"
+            )
+
+
+PEAK_RSS_SCRIPT = """
+import resource, sys
+from pricing_monitor.services.csv_reader import iter_csv_rows
+
+with open(sys.argv[1], "rb") as f:
+    rows = sum(1 for _ in iter_csv_rows(f))
+
+print(rows, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)
+"""
+
+
+@skipIf(sys.platform == "win32", "resource module is not available on Windows")
+class StreamingCSVReaderMemoryTests(SimpleTestCase):
+    """
+    Peak RSS of the streaming reader must not depend on the file size.
+    """
+
+    def read_peak_rss(self, path):
+        result = subprocess.run(
+            [sys.executable, "-c", PEAK_RSS_SCRIPT, path],
+            cwd=settings.BASE_DIR,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        rows, max_rss = result.stdout.split()
+        # ru_maxrss is in KB on Linux and bytes on macOS
+        if sys.platform == "darwin":
+            max_rss = int(max_rss) // 1024
+        return int(rows), int(max_rss)
+
+    def test_peak_rss_is_flat_on_one_million_rows(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            small = os.path.join(tmp, "small.csv")
+            large = os.path.join(tmp, "large.csv")
+            write_synthetic_csv(small, 1_000)
+            write_synthetic_csv(large, 1_000_000)
+
+            small_rows, small_rss = self.read_peak_rss(small)
+            large_rows, large_rss = self.read_peak_rss(large)
+
+        self.assertEqual(small_rows, 1_000)
+        self.assertEqual(large_rows, 1_000_000)
+        # The 1M-row file is ~80 MB; reading it must stay within a few MB
+        # of reading a 1k-row file.
+        self.assertLess(large_rss - small_rss, 16 * 1024)
+
+
+COLD_START_SCRIPT = """
+import json, sys, time
+import django
+from django.db import connection
+
+queries = []
+
+def record(execute, sql, params, many, context):
+    queries.append(sql)
+    return execute(sql, params, many, context)
+
+with connection.execute_wrapper(record):
+    started = time.perf_counter()
+    django.setup()
+    elapsed = time.perf_counter() - started
+
+print(json.dumps({
+    "queries": queries,
+    "setup_seconds": elapsed,
+    "admin_loaded": "pricing_monitor.admin" in sys.modules,
+}))
+"""
+
+
+class ColdStartTests(SimpleTestCase):
+    """
+    django.setup() (which imports every admin module) must not touch the
+    database.
+    """
+
+    def test_setup_runs_no_queries(self):
+        env = dict(os.environ)
+        env.setdefault("DJANGO_SETTINGS_MODULE", "demo_price_glitch.settings")
+
+        result = subprocess.run(
+            [sys.executable, "-c", COLD_START_SCRIPT],
+            cwd=settings.BASE_DIR,
+            env=env,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        report = json.loads(result.stdout.strip().splitlines()[-1])
+
+        self.assertTrue(report["admin_loaded"])
+        self.assertEqual(report["queries"], [])
+
+
+class TemporaryMediaMixin:
+    """
+    The uploads of a test class go to a MEDIA_ROOT of its own, removed
+    once the class has run.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        cls.media_root = tempfile.mkdtemp(prefix="pricing-monitor-tests-")
+        cls.addClassCleanup(shutil.rmtree, cls.media_root, ignore_errors=True)
+        media = override_settings(MEDIA_ROOT=cls.media_root)
+        media.enable()
+        cls.addClassCleanup(media.disable)
+        super().setUpClass()
+
+
+class PartitionUploadTests(TemporaryMediaMixin, TestCase):
+    """
+    Sharding for the parallel importer.
+    """
+
+    def test_rows_of_one_sku_share_a_shard_and_keep_row_numbers(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "feed.csv")
+            write_synthetic_csv(path, 50)
+            with open(path, "a", encoding="utf-8") as f:
+                f.write("SKU-0000007,Mobiles,Brand 7,Brand 7,Synthetic Phone 7,49999,10,4999.9,44000,20,4.4\n")
+            with open(path, "rb") as f:
+                upload = ProductCSVUpload.objects.create(
+                    file=SimpleUploadedFile("feed.csv", f.read()),
+                )
+
+            shards = partition_upload(upload, 4, tmp)
+            rows = {
+                path: list(iter_shard_rows(path))
+                for path, _ in shards
+            }
+
+        self.assertEqual(sum(count for _, count in shards), 51)
+        seen = sorted(index for shard_rows in rows.values() for index, _ in shard_rows)
+        self.assertEqual(seen, list(range(2, 53)))
+
+        for path, shard_rows in rows.items():
+            for index, row in shard_rows:
+                self.assertTrue(path.endswith(f"shard-{shard_for(row.sku, 4)}.csv"))
+
+        sku_7 = [
+            index
+            for shard_rows in rows.values()
+            for index, row in shard_rows
+            if row.sku == "SKU-0000007"
+        ]
+        self.assertEqual(sku_7, [9, 52])
+
+        # Categories are left to the shard imports
+        self.assertFalse(Category.objects.exists())
+
+
+class Interrupted(Exception):
+    pass
+
+
+def resume_feed():
+    lines = [CSV_HEADER.strip()]
+    for i in range(40):
+        sku = f"RES-{i % 30:03d}"          # SKUs 0-9 appear twice
+        net_price = 1000 + i if i != 12 else 2000  # row 14: same as MRP
+        brand = '"Brand\nwith newline"' if i % 7 == 0 else "Brand"
+        category = "Télévisions" if i != 20 else ""   # row 22 is invalid
+        lines.append(
+            f"{sku},{category},Smart TV,{brand},Résumé TV {i % 30},2000,"
+            f"10,200,{net_price},5,4.1"
+        )
+    return ("\r\n".join(lines) + "\r\n").encode("latin-1")
+
+
+def resume_catalog():
+    """
+    The catalog resume_feed() is imported into: one of its SKUs exists
+    already. Returns that product.
+    """
+    tv = Category.objects.create(name="Télévisions", slug="televisions")
+    return Product.objects.create(
+        sku="RES-003", name="Résumé TV 3", slug="resume-tv-3",
+        category=tv, mrp=2000, sale_price=1500,
+    )
+
+
+def create_upload(testcase, name, content, **fields):
+    """
+    An upload of ``content`` whose file is deleted after the test. The
+    deal window defaults to a fixed one, so two imports of the same feed
+    write the same rows.
+    """
+    now = timezone.now()
+    fields.setdefault("consider_price_validation", False)
+    fields.setdefault("deal_starts_at", now)
+    fields.setdefault("deal_ends_at", now + timedelta(days=1))
+    upload = ProductCSVUpload.objects.create(
+        file=SimpleUploadedFile(name, content), **fields
+    )
+    testcase.addCleanup(upload.file.delete, save=False)
+    return upload
+
+
+def import_state():
+    """
+    What the imports wrote so far, to compare two imports of one feed.
+    """
+    return {
+        "products": list(
+            Product.objects.order_by("sku").values_list(
+                "sku", "name", "slug", "mrp", "sale_price", "is_deal_price",
+                "deal_price_ends_at", "category__slug", "subcategory__slug",
+            )
+        ),
+        "imported": list(
+            ImportedProduct.objects.order_by("product__sku").values_list(
+                "product__sku", "mrp", "previous_price", "updated_price",
+            )
+        ),
+        "skipped": list(
+            SkippedPriceImport.objects.order_by("row_number").values_list(
+                "row_number", "sku", "reason",
+            )
+        ),
+        "logs": list(CSVImportLog.objects.values_list("imported", "skipped")),
+    }
+
+
+class ResumeImportTests(TemporaryMediaMixin, TestCase):
+    """
+    An import that stops after a committed chunk and is resumed ends in
+    the same state as an uninterrupted one.
+    """
+
+    def setUp(self):
+        resume_catalog()
+        self.upload = create_upload(self, "resume.csv", resume_feed())
+
+    def test_resumed_import_matches_uninterrupted_import(self):
+        with transaction.atomic():
+            process_csv_upload_in_chunks(self.upload, chunk_size=7)
+            expected = import_state()
+            transaction.set_rollback(True)
+
+        def crash_after_three_chunks(rows_done):
+            if rows_done == 21:
+                raise Interrupted
+
+        upload = ProductCSVUpload.objects.get(id=self.upload.id)
+        with self.assertRaises(Interrupted):
+            process_csv_upload_in_chunks(
+                upload, chunk_size=7, on_progress=crash_after_three_chunks
+            )
+
+        upload = ProductCSVUpload.objects.get(id=self.upload.id)
+        self.assertEqual(upload.checkpoint_row, 21)
+        self.assertEqual(upload.checkpoint_encoding, "latin-1")
+
+        # The reader starts right at the checkpoint, without the prefix
+        first = next(iter(CSVRowReader(
+            upload.file,
+            offset=upload.checkpoint_offset,
+            rows_before=upload.checkpoint_row,
+            encoding=upload.checkpoint_encoding,
+        )))
+        self.assertEqual(first[0], 23)
+        self.assertEqual(first[1]["SKU"], "RES-021")
+
+        process_csv_upload_in_chunks(upload, chunk_size=7, resume=True)
+
+        self.assertEqual(import_state(), expected)
+        # Rows 14 and 22, and the first rows of the ten repeated SKUs
+        self.assertEqual(len(expected["skipped"]), 12)
+
+
+class InlineExecutor:
+    """
+    Stands in for the ProcessPoolExecutor of the parallel importer and runs
+    every shard in this process, inside the test's transaction.
+    """
+
+    def __init__(self, *args, **kwargs):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def submit(self, fn, *args):
+        future = Future()
+        future.set_result(fn(*args))
+        return future
+
+
+class ChunkedImporterTests(TemporaryMediaMixin, TestCase):
+    """
+    The chunked engine writes what the row-by-row importer and the
+    parallel importer write, with a number of queries per chunk that does
+    not grow with the chunk.
+    """
+
+    feed = "\r\n".join([
+        "SKU,Category,Sub-category,Product Name,MRP,Net Price",
+        "CHK-1,Phones,Android,Check 1,1000,950",    # imported
+        "CHK-2,Phones,Android,Check 2,1000,800",    # below the current price
+        "CHK-3,Phones,Android,Check 3,1000,abc",    # not a number
+        "CHK-4,Phones,Android,Check 4,1000,900",    # same price
+        "CHK-9,Phones,Android,Check 9,1000,950",    # not in the catalog
+        "CHK-5,,Android,Check 5,1000,950",          # no category
+        "CHK-6,Phones,Android,Check 6,1000,400",    # 60% off
+        "CHK-1,Phones,Android,Check 1,1000,970",    # repeated SKU
+        "NEW-1,Gadgets,Widgets,New 1,1000,950",     # new category
+        "",
+    ]).encode()
+
+    def setUp(self):
+        phones = Category.objects.create(name="Phones", slug="phones")
+        for sku, sale_price in [("CHK-1", 900), ("CHK-2", 900), ("CHK-3", 900),
+                                ("CHK-4", 900), ("CHK-5", 900), ("CHK-6", 390)]:
+            Product.objects.create(
+                sku=sku, name=f"Check {sku}", slug=sku.lower(),
+                category=phones, mrp=1000, sale_price=sale_price,
+            )
+        # Every upload of a test shares one deal window
+        now = timezone.now()
+        self.deal_window = dict(deal_starts_at=now, deal_ends_at=now + timedelta(days=1))
+
+    def feed_upload(self, content, validate):
+        return create_upload(
+            self, "check.csv", content, consider_price_validation=validate, **self.deal_window
+        )
+
+    def test_chunks_match_row_importer(self):
+        for validate in (True, False):
+            with self.subTest(validate=validate):
+                with transaction.atomic():
+                    process_csv_upload(self.feed_upload(self.feed, validate))
+                    expected = import_state()
+                    transaction.set_rollback(True)
+
+                with transaction.atomic():
+                    process_csv_upload_in_chunks(self.feed_upload(self.feed, validate), chunk_size=3)
+                    self.assertEqual(import_state(), expected)
+                    transaction.set_rollback(True)
+
+                self.assertTrue(expected["imported"])
+                self.assertEqual(len(expected["skipped"]), 9 - len(expected["imported"]))
+
+    def test_parallel_shards_match_chunks(self):
+        for validate in (True, False):
+            with self.subTest(validate=validate):
+                with transaction.atomic():
+                    process_csv_upload_in_chunks(self.feed_upload(self.feed, validate), chunk_size=3)
+                    expected = import_state(), set(Category.objects.values_list("slug", flat=True))
+                    transaction.set_rollback(True)
+
+                with transaction.atomic(), mock.patch(
+                    "pricing_monitor.services.parallel_import.ProcessPoolExecutor",
+                    InlineExecutor,
+                ):
+                    process_csv_upload_parallel(
+                        self.feed_upload(self.feed, validate), workers=3, chunk_size=3
+                    )
+                    categories = set(Category.objects.values_list("slug", flat=True))
+                    self.assertEqual((import_state(), categories), expected)
+                    transaction.set_rollback(True)
+
+                # A rejected row leaves no category behind
+                self.assertEqual("gadgets" in expected[1], not validate)
+
+    def test_queries_per_chunk_do_not_depend_on_its_size(self):
+        def feed(rows):
+            lines = ["SKU,Category,Sub-category,Product Name,MRP,Net Price"]
+            lines += [f"QRY-{i},Phones,Android,Query {i},1000,{900 + i}" for i in range(rows)]
+            return "\r\n".join(lines).encode()
+
+        queries = {}
+        for rows in (5, 10, 40):
+            with transaction.atomic():
+                upload = self.feed_upload(feed(rows), validate=False)
+                with CaptureQueriesContext(connection) as captured:
+                    process_csv_upload_in_chunks(upload, chunk_size=rows)
+                queries[rows] = len(captured)
+                self.assertEqual(Product.objects.filter(sku__startswith="QRY-").count(), rows)
+                transaction.set_rollback(True)
+
+        # The first run also warms caches shared by every import
+        self.assertEqual(queries[10], queries[40])
+
+
+class UploadQueueTests(TemporaryMediaMixin, TestCase):
+    """
+    Queued uploads are claimed by one worker, processed in the background
+    and report their progress through the status endpoint.
+    """
+
+    def setUp(self):
+        self.upload = create_upload(self, "resume.csv", resume_feed())
+
+    def queue(self, upload):
+        ProductCSVUpload.objects.filter(id=upload.id).update(
+            status=ProductCSVUpload.STATUS_UPLOADED
+        )
+
+    def test_an_upload_is_claimed_by_one_worker(self):
+        self.queue(self.upload)
+
+        claimed = claim_next_upload("worker-a")
+        self.assertEqual(claimed.id, self.upload.id)
+        self.assertEqual(claimed.status, ProductCSVUpload.STATUS_PROCESSING)
+        self.assertEqual(claimed.claimed_by, "worker-a")
+
+        self.assertIsNone(claim_next_upload("worker-b"))
+        self.assertEqual(
+            ProductCSVUpload.objects.get(id=self.upload.id).claimed_by, "worker-a"
+        )
+
+    def test_enqueue_resets_job_fields_and_skips_running_uploads(self):
+        ProductCSVUpload.objects.filter(id=self.upload.id).update(
+            status=ProductCSVUpload.STATUS_FAILED,
+            claimed_by="worker-a",
+            rows_done=21,
+            rows_total=40,
+            error="boom",
+            checkpoint_at=timezone.now(),
+            checkpoint_row=21,
+        )
+        running = ProductCSVUpload.objects.create(
+            file=SimpleUploadedFile("running.csv", resume_feed()),
+            status=ProductCSVUpload.STATUS_PROCESSING,
+            claimed_by="worker-b",
+            rows_done=5,
+        )
+        self.addCleanup(running.file.delete, save=False)
+
+        self.assertEqual(enqueue_uploads(ProductCSVUpload.objects.all()), 1)
+
+        upload = ProductCSVUpload.objects.get(id=self.upload.id)
+        self.assertEqual(upload.status, ProductCSVUpload.STATUS_UPLOADED)
+        self.assertEqual(
+            (upload.claimed_by, upload.rows_done, upload.rows_total, upload.error),
+            ("", 0, None, ""),
+        )
+        self.assertIsNone(upload.checkpoint_at)
+        self.assertEqual(upload.checkpoint_row, 0)
+
+        running.refresh_from_db()
+        self.assertEqual(
+            (running.status, running.claimed_by, running.rows_done),
+            (ProductCSVUpload.STATUS_PROCESSING, "worker-b", 5),
+        )
+
+    def test_worker_processes_the_queue_once(self):
+        broken = ProductCSVUpload.objects.create(
+            file=SimpleUploadedFile("broken.zip", zip_bytes({"readme.txt": "no feeds"})),
+            status=ProductCSVUpload.STATUS_UPLOADED,
+        )
+        self.addCleanup(broken.file.delete, save=False)
+        self.queue(self.upload)
+
+        stdout = io.StringIO()
+        stderr = io.StringIO()
+        call_command(
+            "process_csv_uploads", "--once", "--workers", "1", "--worker-id", "worker-a",
+            stdout=stdout, stderr=stderr,
+        )
+
+        upload = ProductCSVUpload.objects.get(id=self.upload.id)
+        self.assertEqual(upload.status, ProductCSVUpload.STATUS_PROCESSED)
+        self.assertEqual((upload.rows_done, upload.rows_total), (40, 40))
+        self.assertIn(f"Upload #{upload.id} done", stdout.getvalue())
+
+        broken.refresh_from_db()
+        self.assertEqual(broken.status, ProductCSVUpload.STATUS_FAILED)
+        self.assertEqual(broken.error, "Archive holds no CSV feeds")
+        self.assertIn(f"Upload #{broken.id} failed", stderr.getvalue())
+
+    def test_status_endpoint_reports_progress(self):
+        url = f"/api/pricing/upload/{self.upload.id}/status/"
+        ProductCSVUpload.objects.filter(id=self.upload.id).update(
+            status=ProductCSVUpload.STATUS_PROCESSING, rows_done=10, rows_total=40,
+        )
+
+        status = self.client.get(url).json()
+        self.assertEqual(status["status"], ProductCSVUpload.STATUS_PROCESSING)
+        self.assertEqual(
+            (status["rows_done"], status["rows_total"], status["progress_percent"]),
+            (10, 40, 25.0),
+        )
+
+        run_upload(ProductCSVUpload.objects.get(id=self.upload.id), chunk_size=7, workers=1)
+
+        status = self.client.get(url).json()
+        self.assertEqual(status["status"], ProductCSVUpload.STATUS_PROCESSED)
+        self.assertTrue(status["processed"])
+        self.assertEqual(status["progress_percent"], 100.0)
+        self.assertEqual(self.client.get("/api/pricing/upload/0/status/").status_code, 404)
+
+
+class StaleUploadTests(TemporaryMediaMixin, TestCase):
+    """
+    A stale heartbeat hands an upload to another worker only once its own
+    worker is known to be gone, so one upload is never imported twice at
+    the same time.
+    """
+
+    def setUp(self):
+        self.upload = create_upload(self, "resume.csv", resume_feed())
+
+    def go_stale(self, claimed_by=None, checkpoint=None):
+        fields = dict(
+            status=ProductCSVUpload.STATUS_PROCESSING,
+            heartbeat_at=timezone.now() - timedelta(hours=1),
+        )
+        if claimed_by is not None:
+            fields.update(claimed_by=claimed_by, checkpoint_at=checkpoint)
+        ProductCSVUpload.objects.filter(id=self.upload.id).update(**fields)
+
+    def test_two_workers_one_import(self):
+        ProductCSVUpload.objects.filter(id=self.upload.id).update(
+            status=ProductCSVUpload.STATUS_UPLOADED
+        )
+        upload = claim_next_upload(default_worker_id())
+        stolen = []
+
+        def second_worker_polls(rows_done):
+            # The first worker looks dead by its heartbeat alone
+            self.go_stale()
+            stolen.append(claim_next_upload("worker-b"))
+
+        run_upload(upload, chunk_size=7, workers=1, on_progress=second_worker_polls)
+
+        self.assertEqual(stolen, [None] * 6)
+        self.assertEqual(CSVImportLog.objects.count(), 1)
+        upload.refresh_from_db()
+        self.assertEqual(upload.status, ProductCSVUpload.STATUS_PROCESSED)
+        self.assertEqual(upload.claimed_by, default_worker_id())
+
+    def test_upload_of_a_dead_worker_is_resumed(self):
+        finished = subprocess.Popen([sys.executable, "-c", "pass"])
+        finished.wait()
+        self.go_stale(
+            f"{socket.gethostname()}:{finished.pid}", checkpoint=timezone.now()
+        )
+
+        claimed = claim_next_upload("worker-b")
+
+        self.assertEqual(claimed.id, self.upload.id)
+        self.assertEqual(claimed.claimed_by, "worker-b")
+
+    def test_unknown_worker_without_checkpoint_is_not_run_twice(self):
+        self.go_stale("elsewhere:4242")
+
+        self.assertIsNone(claim_next_upload("worker-b"))
+        upload = ProductCSVUpload.objects.get(id=self.upload.id)
+        self.assertEqual(upload.status, ProductCSVUpload.STATUS_FAILED)
+        self.assertIn("elsewhere:4242 stopped sending heartbeats", upload.error)
+
+        # With a checkpoint it is resumed where that worker stopped
+        self.go_stale("elsewhere:4242", checkpoint=timezone.now())
+        self.assertEqual(claim_next_upload("worker-b").id, self.upload.id)
+
+
+class HeartbeatTests(TransactionTestCase):
+    """
+    A running job refreshes its heartbeat in the background.
+    """
+
+    def test_beats_until_the_job_ends(self):
+        stale = timezone.now() - timedelta(hours=1)
+        upload = ProductCSVUpload.objects.create(
+            status=ProductCSVUpload.STATUS_PROCESSING, heartbeat_at=stale
+        )
+
+        with Heartbeat(upload.id, interval=timedelta(milliseconds=10)) as heartbeat:
+            for _ in range(200):
+                upload.refresh_from_db()
+                if upload.heartbeat_at != stale:
+                    break
+                time.sleep(0.01)
+
+        self.assertGreater(upload.heartbeat_at, stale)
+        self.assertFalse(heartbeat.thread.is_alive())
+
+
+class AuditWriterTests(TemporaryMediaMixin, TestCase):
+    """
+    Skip and import audit rows are buffered and written in bulk.
+    """
+
+    def setUp(self):
+        self.product = resume_catalog()
+        self.upload = create_upload(self, "resume.csv", resume_feed())
+
+    def test_flushes_by_size_and_upserts_imports(self):
+        product = self.product
+        audit = AuditWriter(self.upload, batch_size=3)
+
+        audit.skip(2, "A", "A", None, None, reason="r", suggestion="s")
+        audit.imported(product, mrp=2000, previous_price=1500, updated_price=1600)
+        self.assertEqual(SkippedPriceImport.objects.count(), 0)
+
+        audit.imported(product, mrp=2000, previous_price=1500, updated_price=1700)
+        audit.skip(3, "B", "B", 10, 5, reason="r", suggestion="s")
+        self.assertEqual(SkippedPriceImport.objects.count(), 2)
+        self.assertEqual(len(audit), 0)
+
+        audit.imported(product, mrp=2000, previous_price=1700, updated_price=1800)
+        audit.flush()
+        record = ImportedProduct.objects.get(csv_upload=self.upload)
+        self.assertEqual(
+            (record.previous_price, record.updated_price), (1700, 1800)
+        )
+
+    def test_row_importer_matches_chunked_importer(self):
+        with transaction.atomic():
+            process_csv_upload_in_chunks(self.upload, chunk_size=7)
+            expected = import_state()
+            transaction.set_rollback(True)
+
+        process_csv_upload(ProductCSVUpload.objects.get(id=self.upload.id))
+
+        self.assertEqual(import_state(), expected)
+
+
+class ImportLogMetricsTests(TemporaryMediaMixin, TestCase):
+    """
+    Every import stores its stage timings, queries, bytes read and peak
+    memory on its CSVImportLog.
+    """
+
+    def setUp(self):
+        self.upload = create_upload(self, "resume.csv", resume_feed())
+
+    def test_chunked_import_records_stages(self):
+        process_csv_upload_in_chunks(self.upload, chunk_size=7)
+
+        log = CSVImportLog.objects.get()
+        self.assertEqual(log.csv_upload, self.upload)
+        self.assertEqual(log.bytes_read, 2 * self.upload.file.size)  # + duplicates pre-pass
+        self.assertGreater(log.queries, 0)
+        self.assertGreater(log.duration_seconds, 0)
+        for stage in ("duplicates", "parse", "preload", "validation",
+                      "categories", "products", "audit"):
+            self.assertIn(stage, log.stage_timings)
+        # One per chunk; parse also runs once to find the end of the file
+        chunks = log.stage_timings["validation"]["calls"]
+        self.assertEqual(chunks, -(-(log.imported + log.skipped + log.unchanged) // 7))
+        self.assertEqual(log.stage_timings["parse"]["calls"], chunks + 1)
+        self.assertEqual(log.queries, log.stage_timings["import"]["queries"])
+
+    def test_row_importer_records_totals(self):
+        process_csv_upload(self.upload)
+
+        log = CSVImportLog.objects.get()
+        self.assertEqual(log.csv_upload, self.upload)
+        self.assertEqual(log.bytes_read, 2 * self.upload.file.size)
+        self.assertGreater(log.queries, 0)
+        self.assertIn("duplicates", log.stage_timings)
+
+
+class DuplicateSKUTests(TemporaryMediaMixin, TestCase):
+    """
+    A SKU listed on several rows is written once, following the upload's
+    duplicate_sku_policy.
+    """
+
+    feed = "\r\n".join([
+        "SKU,Category,Sub-category,Product Name,MRP,Net Price",
+        "DUP-1,Phones,Android,Dup 1,1000,900",
+        "DUP-2,Phones,Android,Dup 2,1000,900",
+        "DUP-1,Phones,Android,Dup 1,1000,800",
+        "DUP-1,Phones,Android,Dup 1,1000,850",
+        "",
+    ]).encode()
+
+    def import_feed(self, policy, importer):
+        upload = ProductCSVUpload.objects.create(
+            file=SimpleUploadedFile("dup.csv", self.feed),
+            consider_price_validation=False,
+            duplicate_sku_policy=policy,
+        )
+        self.addCleanup(upload.file.delete, save=False)
+        counts = importer(upload)
+
+        product = Product.objects.filter(sku="DUP-1").first()
+        skipped = list(
+            SkippedPriceImport.objects.order_by("row_number").values_list(
+                "row_number", "reason"
+            )
+        )
+        return counts, product and product.sale_price, skipped
+
+    def test_policies(self):
+        expected = {
+            "last": ((2, 2), 850, [
+                (2, "Duplicate SKU: row 5 is imported instead"),
+                (4, "Duplicate SKU: row 5 is imported instead"),
+            ]),
+            "first": ((2, 2), 900, [
+                (4, "Duplicate SKU: row 2 is imported instead"),
+                (5, "Duplicate SKU: row 2 is imported instead"),
+            ]),
+            "reject": ((1, 3), None, [
+                (2, "SKU appears 3 times in the file"),
+                (4, "SKU appears 3 times in the file"),
+                (5, "SKU appears 3 times in the file"),
+            ]),
+        }
+        importers = {
+            "rows": process_csv_upload,
+            "chunks": lambda upload: process_csv_upload_in_chunks(upload, chunk_size=2),
+        }
+
+        for policy, result in expected.items():
+            for label, importer in importers.items():
+                with self.subTest(policy=policy, importer=label):
+                    with transaction.atomic():
+                        self.assertEqual(self.import_feed(policy, importer), result)
+                        if policy != "reject":
+                            self.assertEqual(
+                                ImportedProduct.objects.filter(product__sku="DUP-1").count(), 1
+                            )
+                        transaction.set_rollback(True)
+
+
+class FeedDeltaTests(TemporaryMediaMixin, TestCase):
+    """
+    Re-sent files are not processed twice, and the rows of a feed that did
+    not change since its last import are not processed again.
+    """
+
+    header = "SKU,Category,Sub-category,Product Name,MRP,Net Price"
+
+    def upload(self, *rows, feed_key="supplier-a"):
+        upload = ProductCSVUpload.objects.create(
+            file=SimpleUploadedFile("feed.csv", "\r\n".join((self.header,) + rows).encode()),
+            consider_price_validation=False,
+            feed_key=feed_key,
+        )
+        self.addCleanup(upload.file.delete, save=False)
+        return upload
+
+    def test_identical_file_is_not_processed_twice(self):
+        rows = ("IDM-1,Phones,Android,Idem 1,1000,900",)
+        first = self.upload(*rows)
+        self.assertEqual(run_upload(first), (1, 0))
+
+        again = self.upload(*rows, feed_key="")
+        self.assertEqual(run_upload(again), (0, 0))
+
+        again.refresh_from_db()
+        self.assertEqual(again.duplicate_of, first)
+        self.assertTrue(again.processed)
+        self.assertEqual(CSVImportLog.objects.count(), 1)
+
+    def test_identical_file_is_imported_again_once_its_deals_expired(self):
+        rows = ("IDM-2,Phones,Android,Idem 2,1000,900",)
+        first = self.upload(*rows)
+        self.assertEqual(run_upload(first), (1, 0))
+
+        # The first upload's deal window closes and its prices are cleared
+        closed = timezone.now() - timedelta(minutes=1)
+        ProductCSVUpload.objects.filter(id=first.id).update(deal_ends_at=closed)
+        Product.objects.filter(sku="IDM-2").update(deal_price_ends_at=closed)
+        expire_deal_prices()
+        self.assertIsNone(Product.objects.get(sku="IDM-2").sale_price)
+
+        again = self.upload(*rows, feed_key="")
+        self.assertEqual(run_upload(again), (1, 0))
+
+        again.refresh_from_db()
+        self.assertIsNone(again.duplicate_of)
+        self.assertEqual(str(Product.objects.get(sku="IDM-2").sale_price), "900.00")
+
+    def test_only_changed_rows_are_processed(self):
+        process_csv_upload_in_chunks(self.upload(
+            "DLT-1,Phones,Android,Delta 1,1000,900",
+            "DLT-2,Phones,Android,Delta 2,1000,900",
+            "DLT-3,Phones,Android,Delta 3,1000,900",
+        ))
+        self.assertEqual(FeedRowDigest.objects.filter(feed_key="supplier-a").count(), 3)
+
+        # Its deal expired: the same row has to be applied again
+        Product.objects.filter(sku="DLT-3").update(sale_price=None, is_deal_price=False)
+
+        upload = self.upload(
+            "DLT-1,Phones,Android,Delta 1,1000,900",
+            "DLT-2,Phones,Android,Delta 2,1000,950",
+            "DLT-3,Phones,Android,Delta 3,1000,900",
+        )
+        imported, skipped = process_csv_upload_in_chunks(upload)
+
+        self.assertEqual((imported, skipped), (2, 0))
+        self.assertEqual(
+            list(CSVImportLog.objects.order_by("-id").values_list(
+                "imported", "skipped", "unchanged")[:1]),
+            [(2, 0, 1)],
+        )
+        self.assertEqual(
+            sorted(upload.imported_products.values_list("product__sku", flat=True)),
+            ["DLT-2", "DLT-3"],
+        )
+        self.assertEqual(str(Product.objects.get(sku="DLT-2").sale_price), "950.00")
+
+        # Another feed does not share the digests
+        other = self.upload(
+            "DLT-1,Phones,Android,Delta 1,1000,900", feed_key="supplier-b"
+        )
+        self.assertEqual(process_csv_upload_in_chunks(other), (0, 1))
+
+    def test_row_importer_entry_point_keeps_the_digests(self):
+        rows = (
+            "DLT-1,Phones,Android,Delta 1,1000,900",
+            "DLT-2,Phones,Android,Delta 2,1000,900",
+        )
+        self.assertEqual(process_csv_upload(self.upload(*rows)), (2, 0))
+        self.assertEqual(FeedRowDigest.objects.filter(feed_key="supplier-a").count(), 2)
+
+        # Same rows, another file: nothing to process
+        again = self.upload(*rows, "DLT-3,Phones,Android,Delta 3,1000,900")
+        self.assertEqual(process_csv_upload(again), (1, 0))
+        self.assertEqual(
+            CSVImportLog.objects.filter(csv_upload=again).values_list(
+                "imported", "skipped", "unchanged").get(),
+            (1, 0, 2),
+        )
+        self.assertEqual(FeedRowDigest.objects.filter(feed_key="supplier-a").count(), 3)
+
+
+class ImportBenchmarkTests(TemporaryMediaMixin, TestCase):
+    """
+    Synthetic feeds and the import benchmark runner.
+    """
+
+    def test_duplicate_and_bad_rates(self):
+        rows = list(iter_synthetic_rows(2_000, duplicate_rate=0.1, bad_rate=0.05))
+
+        skus = {row["SKU"] for row in rows}
+        self.assertLess(len(skus), 1_900)
+        self.assertGreater(len(skus), 1_700)
+        bad = [
+            row for row in rows
+            if any(row[column] == value for column, value in BAD_VALUES)
+        ]
+        self.assertTrue(50 < len(bad) < 150)
+
+        # Prices change with the seed, the products do not
+        plain = [row["SKU"] for row in iter_synthetic_rows(100, seed=1)]
+        self.assertEqual(plain, [row["SKU"] for row in iter_synthetic_rows(100, seed=2)])
+
+    def test_reports_stages_and_cleans_up(self):
+        result = run_import_benchmark(
+            rows=300, duplicate_rate=0.1, bad_rate=0.1, promotions=2, chunk_size=100
+        )
+
+        self.assertEqual(result["rows"], 300)
+        self.assertEqual(result["imported"] + result["skipped"], 300)
+        self.assertLess(result["queries_per_row"], 1)
+        for stage in ("generate", "seed_catalog", "promotions", "import",
+                      "duplicates", "parse", "preload", "validation",
+                      "categories", "products", "audit"):
+            self.assertIn(stage, result["stages"])
+        self.assertEqual(result["stages"]["preload"]["calls"], 3)
+        json.dumps(result)
+
+        self.assertFalse(Product.objects.exists())
+        self.assertFalse(Category.objects.exists())
+        self.assertFalse(ProductCSVUpload.objects.exists())
+
+
+class ChunkedUploadTests(TemporaryMediaMixin, TestCase):
+    """
+    A feed sent in byte ranges becomes a ProductCSVUpload only once its
+    checksum matches; resending a range changes nothing.
+    """
+
+    content = resume_feed()
+
+    def start(self):
+        response = self.client.post(
+            "/api/pricing/upload/chunked/",
+            {"file_name": "big-feed.csv", "size": len(self.content), "feed_key": "supplier-a"},
+            content_type="application/json",
+        )
+        self.assertEqual(response.status_code, 201)
+        return response.json()
+
+    def put(self, url, start, end):
+        return self.client.put(
+            url,
+            self.content[start:end + 1],
+            content_type="application/octet-stream",
+            headers={"Content-Range": f"bytes {start}-{end}/{len(self.content)}"},
+        )
+
+    def finish(self, url, checksum):
+        return self.client.post(url, {"sha256": checksum}, content_type="application/json")
+
+    def test_retried_and_overlapping_chunks_assemble_the_file(self):
+        started = self.start()
+        url = started["chunk_url"]
+
+        self.assertEqual(self.put(url, 0, 99).json()["received"], 100)
+        # Retry of the same range, then a range overlapping it
+        self.assertEqual(self.put(url, 0, 99).json()["received"], 100)
+        self.assertEqual(self.put(url, 50, 199).json()["received"], 200)
+        # A gap is refused with the offset to continue from
+        response = self.put(url, 300, 399)
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.json()["received"], 200)
+
+        self.assertEqual(self.finish(started["finish_url"], "0" * 64).status_code, 400)
+        self.assertEqual(
+            self.put(url, 200, len(self.content) - 1).json()["received"],
+            len(self.content),
+        )
+        self.assertFalse(ProductCSVUpload.objects.exists())
+
+        checksum = hashlib.sha256(self.content).hexdigest()
+        response = self.finish(started["finish_url"], checksum)
+        self.assertEqual(response.status_code, 201)
+        upload = ProductCSVUpload.objects.get(id=response.json()["upload_id"])
+        self.addCleanup(upload.file.delete, save=False)
+
+        with upload.file.open("rb") as f:
+            self.assertEqual(f.read(), self.content)
+        self.assertEqual(upload.status, ProductCSVUpload.STATUS_UPLOADED)
+        self.assertEqual(upload.feed_key, "supplier-a")
+        self.assertEqual(upload.content_digest, checksum)
+        # Finishing again is a no-op
+        self.assertEqual(
+            self.finish(started["finish_url"], checksum).json()["upload_id"], upload.id
+        )
+
+    def test_checksum_mismatch_discards_the_upload(self):
+        started = self.start()
+        self.put(started["chunk_url"], 0, len(self.content) - 1)
+        part_file = ChunkedUpload.objects.get().part_file
+
+        response = self.finish(started["finish_url"], "0" * 64)
+
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(ChunkedUpload.objects.exists())
+        self.assertFalse(ProductCSVUpload.objects.exists())
+        self.assertFalse(os.path.exists(os.path.join(settings.MEDIA_ROOT, part_file)))
+
+    def test_abandoned_uploads_expire(self):
+        abandoned = self.start()
+        self.put(abandoned["chunk_url"], 0, 99)
+        active = self.start()
+        finished = self.start()
+        self.put(finished["chunk_url"], 0, len(self.content) - 1)
+        upload_id = self.finish(
+            finished["finish_url"], hashlib.sha256(self.content).hexdigest()
+        ).json()["upload_id"]
+        self.addCleanup(ProductCSVUpload.objects.get(id=upload_id).file.delete, save=False)
+
+        ChunkedUpload.objects.exclude(token=active["upload_token"]).update(
+            updated_at=timezone.now() - timedelta(days=2)
+        )
+        part_file = ChunkedUpload.objects.get(token=abandoned["upload_token"]).part_file
+        stdout = io.StringIO()
+        call_command("expire_chunked_uploads", stdout=stdout)
+
+        self.assertIn("Deleted 1 abandoned chunked upload(s)", stdout.getvalue())
+        self.assertFalse(ChunkedUpload.objects.filter(token=abandoned["upload_token"]).exists())
+        self.assertFalse(os.path.exists(os.path.join(settings.MEDIA_ROOT, part_file)))
+        self.assertEqual(self.put(abandoned["chunk_url"], 100, 199).status_code, 404)
+
+        # Recent and finished uploads stay
+        self.assertEqual(self.put(active["chunk_url"], 0, 99).json()["received"], 100)
+        self.assertTrue(ChunkedUpload.objects.filter(csv_upload_id=upload_id).exists())
+
+
+def zip_bytes(files):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as archive:
+        for name, content in files.items():
+            archive.writestr(name, content)
+    return buffer.getvalue()
+
+
+class CompressedFeedTests(TemporaryMediaMixin, TestCase):
+    """
+    .csv.gz and .zip uploads are stored compressed and decompressed while
+    they are imported; every CSV of a zip is a feed of its own.
+    """
+
+    header = "SKU,Category,Sub-category,Product Name,MRP,Net Price"
+
+    def setUp(self):
+        resume_catalog()
+        self.upload = create_upload(self, "resume.csv", resume_feed())
+
+    def test_gzip_feed_imports_like_the_plain_file(self):
+        with transaction.atomic():
+            process_csv_upload_in_chunks(self.upload, chunk_size=7)
+            expected = import_state()
+            transaction.set_rollback(True)
+
+        upload = create_upload(
+            self, "resume.csv.gz", gzip.compress(resume_feed()),
+            deal_starts_at=self.upload.deal_starts_at,
+            deal_ends_at=self.upload.deal_ends_at,
+        )
+
+        process_csv_upload_in_chunks(upload, chunk_size=7)
+
+        self.assertTrue(upload.file.name.endswith(".csv.gz"))
+        self.assertEqual(import_state(), expected)
+
+    def test_zip_of_several_csvs_is_one_job(self):
+        upload = ProductCSVUpload.objects.create(
+            file=SimpleUploadedFile("feeds.zip", zip_bytes({
+                "phones.csv": "\r\n".join([
+                    self.header,
+                    "ZIP-1,Phones,Android,Zip 1,1000,900",
+                    "ZIP-2,Phones,Android,Zip 2,1000,900",
+                ]),
+                "tvs/tvs.csv": "\r\n".join([
+                    self.header,
+                    "ZIP-3,Televisions,Smart TV,Zip 3,5000,4500",
+                ]),
+                "README.txt": "not a feed",
+            })),
+            consider_price_validation=False,
+            feed_key="supplier-z",
+            status=ProductCSVUpload.STATUS_PROCESSING,
+        )
+        self.addCleanup(upload.file.delete, save=False)
+
+        self.assertEqual(run_upload(upload), (3, 0))
+
+        upload.refresh_from_db()
+        self.assertEqual(upload.status, ProductCSVUpload.STATUS_PROCESSED)
+        self.assertEqual((upload.rows_done, upload.rows_total), (3, 3))
+        feeds = list(upload.archive_feeds.order_by("id"))
+        self.assertEqual(
+            [(feed.archive_member, feed.feed_key, feed.processed) for feed in feeds],
+            [
+                ("phones.csv", "supplier-z:phones.csv", True),
+                ("tvs/tvs.csv", "supplier-z:tvs/tvs.csv", True),
+            ],
+        )
+        self.assertEqual(
+            sorted(CSVImportLog.objects.values_list("file_name", "imported")),
+            [
+                (f"{upload.file.name}:phones.csv", 2),
+                (f"{upload.file.name}:tvs/tvs.csv", 1),
+            ],
+        )
+        self.assertEqual(str(Product.objects.get(sku="ZIP-3").sale_price), "4500.00")
+
+        # Running the archive again leaves its processed feeds alone
+        self.assertEqual(run_upload(upload), (0, 0))
+
+    def test_upload_api_accepts_compressed_feeds(self):
+        for name in ("feed.csv.gz", "feeds.zip"):
+            with self.subTest(name=name):
+                response = self.client.post(
+                    "/api/pricing/upload/",
+                    {"file": SimpleUploadedFile(name, gzip.compress(resume_feed()))},
+                )
+                self.assertEqual(response.status_code, 201)
+                upload = ProductCSVUpload.objects.get(id=response.json()["upload_id"])
+                self.addCleanup(upload.file.delete, save=False)
+
+        response = self.client.post(
+            "/api/pricing/upload/",
+            {"file": SimpleUploadedFile("feed.tar.gz", b"")},
+        )
+        self.assertEqual(response.status_code, 400)
+
+
+class DryRunTests(TemporaryMediaMixin, TestCase):
+    """
+    A dry run reports what an import would do without writing it.
+    """
+
+    def setUp(self):
+        phones = Category.objects.create(name="Phones", slug="phones")
+        for sku, sale_price in [("DRY-1", 900), ("DRY-2", 900), ("DRY-3", 900)]:
+            Product.objects.create(
+                sku=sku, name=f"Dry {sku}", slug=sku.lower(),
+                category=phones, mrp=1000, sale_price=sale_price,
+            )
+
+        feed = "\r\n".join([
+            "SKU,Category,Sub-category,Product Name,MRP,Net Price",
+            "DRY-1,Phones,Android,Dry DRY-1,1000,950",   # increase
+            "DRY-2,Phones,Android,Dry DRY-2,1000,850",   # decrease
+            "DRY-3,Phones,Android,Dry DRY-3,1000,900",   # unchanged
+            "DRY-4,Phones,Android,Dry DRY-4,1000,700",   # rejected: repeated below
+            "DRY-4,Phones,Android,Dry DRY-4,1000,750",   # create (last row wins)
+            "DRY-5,,Android,Dry DRY-5,1000,700",         # rejected
+            "",
+        ])
+        self.upload = ProductCSVUpload.objects.create(
+            file=SimpleUploadedFile("dry.csv", feed.encode()),
+            consider_price_validation=False,
+        )
+        self.addCleanup(self.upload.file.delete, save=False)
+
+    def test_summary_and_artifact_without_writes(self):
+        products = list(Product.objects.order_by("sku").values())
+        categories = Category.objects.count()
+
+        summary = dry_run_csv_upload(self.upload)
+        self.addCleanup(self.upload.dry_run_file.delete, save=False)
+
+        self.assertEqual(summary, {
+            "create": 1,
+            "increase": 1,
+            "decrease": 1,
+            "unchanged": 1,
+            "rejected": 2,
+            "rows": 6,
+        })
+        self.assertEqual(list(Product.objects.order_by("sku").values()), products)
+        self.assertEqual(Category.objects.count(), categories)
+        self.assertFalse(SkippedPriceImport.objects.exists())
+        self.assertFalse(CSVImportLog.objects.exists())
+
+        upload = ProductCSVUpload.objects.get(id=self.upload.id)
+        self.assertEqual(upload.dry_run_summary, summary)
+        with upload.dry_run_file.open("rb") as f:
+            diff = list(csv.DictReader(io.TextIOWrapper(f, encoding="utf-8")))
+        self.assertEqual(
+            [(row["SKU"], row["Action"], row["Change"]) for row in diff],
+            [
+                ("DRY-1", "increase", "50.00"),
+                ("DRY-2", "decrease", "-50.00"),
+                ("DRY-3", "unchanged", "0"),
+                ("DRY-4", "rejected", ""),
+                ("DRY-4", "create", ""),
+                ("DRY-5", "rejected", ""),
+            ],
+        )
+
+        # The real import agrees with the preview
+        imported, skipped = process_csv_upload_in_chunks(upload)
+        self.assertEqual(imported, 3)
+        self.assertEqual(skipped, 3)
+
+    def test_admin_reports_archives_of_several_feeds(self):
+        self.client.force_login(
+            get_user_model().objects.create_superuser("admin", "admin@example.com", "password")
+        )
+        feed = "SKU,Category,Sub-category,Product Name,MRP,Net Price\r\n"
+        archive = ProductCSVUpload.objects.create(
+            file=SimpleUploadedFile("feeds.zip", zip_bytes({"a.csv": feed, "b.csv": feed})),
+            consider_price_validation=False,
+        )
+        self.addCleanup(archive.file.delete, save=False)
+
+        response = self.client.post(
+            "/admin/pricing_monitor/productcsvupload/",
+            {"action": "dry_run_csv", "_selected_action": [archive.id]},
+            follow=True,
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [(m.level_tag, str(m)) for m in response.context["messages"]],
+            [("error", f"{archive}: Archive holds 2 CSV feeds; "
+                       "process it with the background worker")],
+        )
+        archive.refresh_from_db()
+        self.assertIsNone(archive.dry_run_summary)
+
+
+XLSX_FIXTURE = os.path.join(settings.BASE_DIR, "data", "Pricing_Monitor-excel.xlsx")
+
+
+class WorkbookReaderTests(TemporaryMediaMixin, TestCase):
+    """
+    .xlsx uploads feed the same rows as CSV uploads.
+    """
+
+    def test_fixture_rows_match_a_csv_export(self):
+        with open(XLSX_FIXTURE, "rb") as f:
+            rows = list(WorkbookRowReader(f))
+
+        self.assertEqual(len(rows), 9)
+        index, row = rows[0]
+        self.assertEqual(index, 2)
+        self.assertEqual(row["SKU"], "SMG-S23-256")
+        self.assertEqual(row["MRP"], "45999")
+        # Formula cells are read as their cached values
+        self.assertEqual(row["Discount Amount"], "4599.9")
+        self.assertEqual(row["Net Price"], "41399.1")
+
+    def test_percent_cells_read_like_a_csv_export(self):
+        workbook = openpyxl.Workbook()
+        sheet = workbook.active
+        sheet.append(["SKU", "MRP", "Discount", "Note"])
+        sheet.append(["PCT-1", 1000, 0.15, 0.5])
+        sheet.append(["PCT-2", 1000, 0.155, 7])
+        sheet["C2"].number_format = "0%"
+        sheet["C3"].number_format = "0.0%"
+        sheet["D2"].number_format = '0" %"'    # a literal, not a percentage
+        buffer = io.BytesIO()
+        workbook.save(buffer)
+        buffer.seek(0)
+
+        rows = [row for _, row in WorkbookRowReader(buffer)]
+
+        self.assertEqual([row["Discount"] for row in rows], ["15%", "15.5%"])
+        self.assertEqual(parse_percent(rows[0]["Discount"]), Decimal("15"))
+        self.assertEqual([row["Note"] for row in rows], ["0.5", "7"])
+
+    def test_resumes_after_offset(self):
+        with open(XLSX_FIXTURE, "rb") as f:
+            reader = WorkbookRowReader(f, offset=5)
+            rows = list(reader)
+
+        self.assertEqual([index for index, _ in rows], [6, 7, 8, 9, 10])
+        self.assertEqual(reader.tell(), 10)
+
+    def test_import_from_workbook(self):
+        with open(XLSX_FIXTURE, "rb") as f:
+            upload = ProductCSVUpload.objects.create(
+                file=SimpleUploadedFile("Pricing_Monitor-excel.xlsx", f.read()),
+                consider_price_validation=False,
+            )
+        self.addCleanup(upload.file.delete, save=False)
+
+        imported, skipped = process_csv_upload_in_chunks(upload)
+
+        self.assertEqual(imported + skipped, 9)
+        product = Product.objects.get(sku="SMG-S23-256")
+        self.assertEqual(str(product.sale_price), "41399.10")
+
+
+XLSX_PEAK_RSS_SCRIPT = """
+import resource, sys
+import openpyxl
+from pricing_monitor.services.xlsx_reader import WorkbookRowReader
+
+path, rows = sys.argv[1], int(sys.argv[2])
+workbook = openpyxl.Workbook(write_only=True)
+sheet = workbook.create_sheet()
+sheet.append(["SKU", "Category", "Sub-category", "Product Name", "MRP", "Net Price"])
+for i in range(rows):
+    sheet.append([f"SKU-{i:07d}", "Mobiles", f"Brand {i % 50}", f"Phone {i}", 49999, 45000 + i % 1000])
+workbook.save(path)
+del workbook, sheet
+
+before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+with open(path, "rb") as f:
+    count = sum(1 for _ in WorkbookRowReader(f))
+after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+print(count, after - before)
+"""
+
+
+@skipIf(sys.platform == "win32", "resource module is not available on Windows")
+class StreamingWorkbookReaderMemoryTests(SimpleTestCase):
+    """
+    Reading a sheet must not build all of its cells in memory.
+    """
+
+    def read_rss_growth(self, path, rows):
+        result = subprocess.run(
+            [sys.executable, "-c", XLSX_PEAK_RSS_SCRIPT, path, str(rows)],
+            cwd=settings.BASE_DIR,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        count, growth = result.stdout.split()
+        if sys.platform == "darwin":
+            growth = int(growth) // 1024
+        return int(count), int(growth)
+
+    def test_peak_rss_growth_is_small_on_fifty_thousand_rows(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            rows, growth = self.read_rss_growth(os.path.join(tmp, "large.xlsx"), 50_000)
+
+        self.assertEqual(rows, 50_000)
+        # Only the shared strings stay in memory (~5 MB here); loading the
+        # whole sheet takes ~130 MB.
+        self.assertLess(growth, 16 * 1024)
+
+
+class FeedParserTests(SimpleTestCase):
+    """
+    Feed cells are parsed the way Indian price sheets write them.
+    """
+
+    def test_prices(self):
+        self.assertEqual(parse_price("45999"), Decimal("45999"))
+        self.assertEqual(parse_price("65,000"), Decimal("65000"))
+        self.assertEqual(parse_price("₹1,70,000.50"), Decimal("170000.50"))
+        self.assertEqual(parse_price(" Rs. 9,750 "), Decimal("9750"))
+        self.assertEqual(parse_price("1,000,000"), Decimal("1000000"))
+        self.assertEqual(parse_price(4599.9), Decimal("4599.9"))
+
+    def test_rejects_malformed_prices(self):
+        for value in (None, "", "abc", "1,50", "1,0000", "15%", "²"):
+            with self.subTest(value=value):
+                self.assertIsNone(parse_price(value))
+
+    def test_percent_and_int(self):
+        self.assertEqual(parse_percent("15%"), Decimal("15"))
+        self.assertEqual(parse_percent("12.5 %"), Decimal("12.5"))
+        self.assertEqual(parse_int("1,200"), 1200)
+        self.assertIsNone(parse_int("12.5"))
+
+    def test_layout_pads_short_rows(self):
+        layout = FeedLayout(
+            ["SKU", "Product Name", "Category", "Sub-category", "MRP", "Net Price"]
+        )
+
+        row = layout.row(["SKU-1", "Phone", "Mobiles"])
+
+        self.assertEqual(row.sku, "SKU-1")
+        self.assertIsNone(row.net_price)
+
+
+def frontend_validate(mrp, net_price, reference, t=DEFAULT_THRESHOLDS):
+    """
+    validateProduct of the frontend (utils/priceValidation.ts), row by
+    row, for an import row: ``(codes, severity)``.
+    """
+    original = mrp or net_price or 100
+    selling = net_price or original
+    cost = selling * 0.6
+    discount = (original - selling) / original * 100 if original > 0 else 0
+    margin = (selling - cost) / selling * 100 if selling > 0 else 0
+
+    codes = 0
+    severity = "low"
+    if discount < t.min_discount:
+        codes |= price_rules.DISCOUNT_BELOW_MIN
+    if discount > t.max_discount:
+        codes |= price_rules.DISCOUNT_ABOVE_MAX
+        severity = "high"
+    if margin < t.min_margin:
+        codes |= price_rules.MARGIN_BELOW_MIN
+        severity = "high"
+    if margin > t.max_margin:
+        codes |= price_rules.MARGIN_ABOVE_MAX
+        severity = "medium"
+    if selling < t.low_price:
+        codes |= price_rules.PRICE_SUSPICIOUSLY_LOW
+        severity = "high"
+    if selling > t.high_price and margin < t.min_margin:
+        codes |= price_rules.HIGH_PRICE_LOW_MARGIN
+        severity = "medium"
+    if reference:
+        diff = (selling - reference) / reference * 100
+        if diff > 20:
+            codes |= price_rules.ABOVE_REFERENCE
+            severity = "high" if severity == "high" else "medium"
+        elif diff < -30:
+            codes |= price_rules.BELOW_REFERENCE
+            severity = "medium"
+    return codes, severity if codes else ""
+
+
+class PriceRuleTests(SimpleTestCase):
+    """
+    The vectorised threshold rules agree with the frontend's validateProduct.
+    """
+
+    def test_matches_frontend_row_by_row(self):
+        import random
+
+        rng = random.Random(7)
+        rows = [
+            (
+                rng.choice([None, 0, rng.uniform(1, 5000)]),
+                rng.choice([rng.uniform(0.5, 20), rng.uniform(1, 6000)]),
+                rng.choice([None, 0, rng.uniform(1, 6000)]),
+            )
+            for _ in range(5_000)
+        ]
+        thresholds = DEFAULT_THRESHOLDS._replace(min_margin=45, max_margin=35)
+
+        for t in (DEFAULT_THRESHOLDS, thresholds):
+            results = evaluate_rules(*zip(*rows), thresholds=t)
+            for i, row in enumerate(rows):
+                codes, severity = frontend_validate(*row, t=t)
+                self.assertEqual(int(results.codes[i]), codes, row)
+                self.assertEqual(
+                    price_rules.SEVERITY_NAMES[int(results.severity[i])], severity, row
+                )
+
+    def test_per_row_thresholds_and_wording(self):
+        results = evaluate_rules(
+            [Decimal("1000"), Decimal("1000"), Decimal("1000")],
+            [Decimal("400"), Decimal("400"), Decimal("900")],
+            [None, Decimal("1000"), None],
+            thresholds=DEFAULT_THRESHOLDS._replace(max_discount=[50, 70, 50]),
+        )
+
+        self.assertEqual(list(results.severity), [SEVERITY_HIGH, SEVERITY_MEDIUM, SEVERITY_NONE])
+        self.assertEqual(
+            validate_price(Decimal("1000"), Decimal("400")),
+            (False, "Discount (60.0%) exceeds maximum threshold (50%)"),
+        )
+        self.assertEqual(validate_price(Decimal("1000"), Decimal("900")), (True, None))
+        self.assertEqual(
+            price_rules.recommend(results, 0), "Reduce discount to 50% (price: ₹500.00)."
+        )
+
+
+class PriceRuleImportTests(TemporaryMediaMixin, TestCase):
+    """
+    Rows the threshold rules mark high severity are not imported.
+    """
+
+    feed = "\r\n".join([
+        "SKU,Category,Sub-category,Product Name,MRP,Net Price",
+        "RUL-1,Phones,Android,Rule 1,1000,950",   # fine
+        "RUL-2,Phones,Android,Rule 2,1000,400",   # 60% off
+        "RUL-3,Phones,Android,Rule 3,1000,8",     # suspiciously low
+        "",
+    ]).encode()
+
+    def setUp(self):
+        phones = Category.objects.create(name="Phones", slug="phones")
+        for sku, sale_price in [("RUL-1", 900), ("RUL-2", 390), ("RUL-3", 7)]:
+            Product.objects.create(
+                sku=sku, name=f"Rule {sku}", slug=sku.lower(),
+                category=phones, mrp=1000, sale_price=sale_price,
+            )
+
+    def test_importers_reject_high_severity_rows(self):
+        importers = {
+            "rows": process_csv_upload,
+            "chunks": lambda upload: process_csv_upload_in_chunks(upload, chunk_size=2),
+        }
+
+        for label, importer in importers.items():
+            with self.subTest(importer=label), transaction.atomic():
+                upload = ProductCSVUpload.objects.create(
+                    file=SimpleUploadedFile("rules.csv", self.feed),
+                    consider_price_validation=True,
+                )
+                self.addCleanup(upload.file.delete, save=False)
+
+                self.assertEqual(importer(upload), (1, 2))
+                skipped = dict(SkippedPriceImport.objects.values_list("sku", "reason"))
+                self.assertEqual(
+                    skipped["RUL-2"], "Discount (60.0%) exceeds maximum threshold (50%)"
+                )
+                self.assertIn("suspiciously low", skipped["RUL-3"])
+                transaction.set_rollback(True)
+
+    def test_category_profile_overrides_default_thresholds(self):
+        lenient = PriceThresholdProfile.objects.create(name="Clearance", max_discount=70)
+        Category.objects.filter(slug="phones").update(threshold_profile=lenient)
+
+        upload = ProductCSVUpload.objects.create(
+            file=SimpleUploadedFile("rules.csv", self.feed),
+            consider_price_validation=True,
+        )
+        self.addCleanup(upload.file.delete, save=False)
+
+        self.assertEqual(process_csv_upload_in_chunks(upload, chunk_size=2), (2, 1))
+        self.assertEqual(
+            list(SkippedPriceImport.objects.values_list("sku", flat=True)), ["RUL-3"]
+        )
+
+
+class ThresholdTableTests(TestCase):
+    """
+    Categories use their own profile, else the nearest ancestor's, else
+    the defaults.
+    """
+
+    def test_profiles_are_inherited_from_the_nearest_ancestor(self):
+        strict = PriceThresholdProfile.objects.create(name="Strict", max_discount=20)
+        lenient = PriceThresholdProfile.objects.create(name="Lenient", max_discount=70)
+        root = Category.objects.create(name="Root", slug="root", threshold_profile=strict)
+        child = Category.objects.create(name="Child", slug="child", parent=root)
+        grandchild = Category.objects.create(name="Grandchild", slug="grandchild", parent=child)
+        own = Category.objects.create(
+            name="Own", slug="own", parent=child, threshold_profile=lenient
+        )
+        plain = Category.objects.create(name="Plain", slug="plain")
+
+        table = ThresholdTable()
+        thresholds = table.lookup(
+            [root.id, child.id, grandchild.id, own.id, plain.id, None, 10**6]
+        )
+
+        self.assertEqual(
+            thresholds.max_discount.tolist(), [20, 20, 20, 70, 50, 50, 50]
+        )
+        self.assertEqual(thresholds.min_margin.tolist(), [15] * 7)
@@ -1,6 +1,28 @@
 from django.urls import path
-from .api_views import ProductCSVUploadAPIView
+from .api_views import (
+    ChunkedUploadAPIView,
+    ChunkedUploadChunkAPIView,
+    ChunkedUploadFinishAPIView,
+    ProductCSVUploadAPIView,
+    ProductCSVUploadStatusAPIView,
+)
 
 urlpatterns = [
     path("api/pricing/upload/", ProductCSVUploadAPIView.as_view(), name="pricing-upload"),
+    path(
+        "api/pricing/upload/<int:upload_id>/status/",
+        ProductCSVUploadStatusAPIView.as_view(),
+        name="pricing-upload-status",
+    ),
+    path("api/pricing/upload/chunked/", ChunkedUploadAPIView.as_view(), name="pricing-upload-chunked"),
+    path(
+        "api/pricing/upload/chunked/<uuid:token>/",
+        ChunkedUploadChunkAPIView.as_view(),
+        name="pricing-upload-chunk",
+    ),
+    path(
+        "api/pricing/upload/chunked/<uuid:token>/finish/",
+        ChunkedUploadFinishAPIView.as_view(),
+        name="pricing-upload-finish",
+    ),
 ]
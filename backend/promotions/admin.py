@@ -1,7 +1,7 @@
 # promotions/admin.py
 from django.contrib import admin
 from django.utils import timezone
-from .models import CategoryPromotion, ProductPromotion
+from .models import CategoryPromotion, ProductPriceSnapshot, ProductPromotion
 
 
 @admin.register(CategoryPromotion)
@@ -70,6 +70,28 @@ class ProductPromotionAdmin(admin.ModelAdmin):
 
         super().save_model(request, obj, form, change)
 
+@admin.register(ProductPriceSnapshot)
+class ProductPriceSnapshotAdmin(admin.ModelAdmin):
+    # Written by promotions.price_snapshots only
+    list_display = (
+        "product",
+        "final_price",
+        "discount",
+        "source",
+        "label",
+        "valid_until",
+        "computed_at",
+    )
+    list_filter = ("source",)
+    search_fields = ("product__name", "product__sku")
+    list_select_related = ("product",)
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
 @admin.display(boolean=True)
 def currently_active(self, obj):
     return obj.currently_active
\ No newline at end of file
@@ -0,0 +1,45 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from promotions.price_snapshots import (
+    DEFAULT_SNAPSHOT_BATCH_SIZE,
+    next_snapshot_expiry,
+    refresh_stale_snapshots,
+)
+
+
+class Command(BaseCommand):
+    help = "Reprices products whose price snapshot is missing or whose deal or promotion window opened or closed"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--loop",
+            action="store_true",
+            help="Keep running and wake up when the next snapshot expires",
+        )
+        parser.add_argument(
+            "--max-sleep",
+            type=float,
+            default=60,
+            help="Longest wait between checks in --loop mode",
+        )
+        parser.add_argument("--batch-size", type=int, default=DEFAULT_SNAPSHOT_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        while True:
+            refreshed = refresh_stale_snapshots(batch_size=options["batch_size"])
+            if refreshed:
+                self.stdout.write(f"Refreshed {refreshed} price snapshot(s)")
+
+            if not options["loop"]:
+                return
+
+            sleep = options["max_sleep"]
+            next_expiry = next_snapshot_expiry()
+            if next_expiry is not None:
+                until_next = (next_expiry - timezone.now()).total_seconds()
+                sleep = max(0, min(sleep, until_next))
+
+            time.sleep(sleep)
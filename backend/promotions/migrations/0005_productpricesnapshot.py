@@ -0,0 +1,29 @@
+# Generated by Django 6.0.1 on 2026-10-16 23:05
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0012_category_threshold_profile'),
+        ('promotions', '0004_alter_categorypromotion_category'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductPriceSnapshot',
+            fields=[
+                ('product', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='price_snapshot', serialize=False, to='catalog.product')),
+                ('final_price', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('discount', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('source', models.CharField(choices=[('deal', 'Deal price'), ('product', 'Product promotion'), ('category', 'Category promotion'), ('mrp', 'MRP')], max_length=20)),
+                ('label', models.CharField(blank=True, max_length=50)),
+                ('valid_until', models.DateTimeField(blank=True, db_index=True, null=True)),
+                ('computed_at', models.DateTimeField()),
+                ('category_promotion', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='promotions.categorypromotion')),
+                ('product_promotion', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='promotions.productpromotion')),
+            ],
+        ),
+    ]
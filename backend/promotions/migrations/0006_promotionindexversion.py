@@ -0,0 +1,21 @@
+# Generated by Django 6.0.1 on 2026-10-17 01:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('promotions', '0005_productpricesnapshot'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PromotionIndexVersion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('version', models.CharField(max_length=32)),
+                ('changed_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
@@ -97,11 +97,12 @@ class ProductPromotion(models.Model):
         now = timezone.now()
         return self.is_active and self.start_date <= now <= self.end_date
 
-    def get_discounted_price(self):
+    def get_discounted_price(self, product=None):
         """
         Returns discounted price for THIS product promotion
         """
-        price = self.product.sale_price or self.product.mrp
+        product = product or self.product
+        price = product.sale_price or product.mrp
 
         if not price:
             return None
@@ -113,3 +114,69 @@ class ProductPromotion(models.Model):
             return price - self.discount_value
 
         return price
+
+
+class ProductPriceSnapshot(models.Model):
+    """
+    The price a customer pays for a product right now, as worked out by
+    promotions.pricing.PricingEngine. Kept up to date by
+    promotions.price_snapshots so storefront pages read it with a join.
+    """
+
+    SOURCE_CHOICES = (
+        ("deal", "Deal price"),
+        ("product", "Product promotion"),
+        ("category", "Category promotion"),
+        ("mrp", "MRP"),
+    )
+
+    product = models.OneToOneField(
+        Product,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="price_snapshot"
+    )
+
+    final_price = models.DecimalField(max_digits=10, decimal_places=2)
+    discount = models.DecimalField(max_digits=10, decimal_places=2)
+    source = models.CharField(max_length=20, choices=SOURCE_CHOICES)
+    label = models.CharField(max_length=50, blank=True)
+
+    # Active promotions when computed, whether they set the price or not
+    product_promotion = models.ForeignKey(
+        ProductPromotion,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="+"
+    )
+    category_promotion = models.ForeignKey(
+        CategoryPromotion,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="+"
+    )
+
+    # When a deal or promotion window next opens or closes
+    valid_until = models.DateTimeField(null=True, blank=True, db_index=True)
+    computed_at = models.DateTimeField()
+
+    def __str__(self):
+        return f"{self.product} @ {self.final_price}"
+
+
+class PromotionIndexVersion(models.Model):
+    """
+    A single row: the version of the promotion data every process's
+    PromotionIndex is compared against (see promotions.promotion_index).
+    It changes in the same transaction as the promotion save or delete
+    that calls for a rebuild, so every process sees the change once it is
+    committed, and not before.
+    """
+
+    version = models.CharField(max_length=32)
+    changed_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return self.version
@@ -0,0 +1,89 @@
+# promotions/money.py
+from decimal import Decimal
+
+import numpy as np
+
+
+# Money is integer paise inside the pricing core; Decimal rupees only at
+# the edges (models, templates, sessions) through to_paise / from_paise.
+PAISE = Decimal("0.01")
+
+# Percentages are integer hundredths of a percent, like discount_value's
+# two decimals: 1250 is 12.5%, PERCENT_SCALE is 100%
+PERCENT_SCALE = 10000
+
+
+def to_paise(amount):
+    """
+    Rupees (Decimal, int or str) as integer paise. Amounts with more than
+    two decimals are rounded half to even.
+    """
+    return int(Decimal(amount).quantize(PAISE) * 100)
+
+
+def from_paise(paise):
+    """
+    Integer paise as a two-decimal Decimal in rupees
+    """
+    return Decimal(int(paise)).scaleb(-2)
+
+
+def promotion_terms(promo):
+    """
+    ``(is_percentage, value)`` of a ProductPromotion or CategoryPromotion,
+    ``value`` in hundredths (of a percent or of a rupee)
+    """
+    return promo.discount_type.lower() == "percentage", to_paise(promo.discount_value)
+
+
+# ----------------------------------------------------------------------
+# Rounding rules
+#
+# Flat: price - amount, never below zero. Exact, no rounding.
+# Percentage: price * (100% - percent), rounded to whole paise half to
+# even (2.345 -> 2.34, 2.355 -> 2.36) and never below zero. This is what
+# Decimal.quantize() did to the exact result before.
+# ----------------------------------------------------------------------
+
+def round_half_even(numerator, denominator):
+    """
+    ``numerator / denominator`` rounded to an integer, ties to even.
+    ``numerator`` is not negative.
+    """
+    quotient, remainder = divmod(numerator, denominator)
+    twice = 2 * remainder
+    if twice > denominator or (twice == denominator and quotient % 2):
+        quotient += 1
+    return quotient
+
+
+def discounted(price, is_percentage, value):
+    """
+    ``price`` paise after a percentage or flat discount of ``value``
+    (hundredths, not negative)
+    """
+    if is_percentage:
+        if value >= PERCENT_SCALE:
+            return 0
+        return round_half_even(price * (PERCENT_SCALE - value), PERCENT_SCALE)
+    return max(price - value, 0)
+
+
+def discounted_array(prices, is_percentage, values):
+    """
+    discounted() over NumPy int64 arrays in one pass. A flat discount of
+    0 leaves a price as it is.
+    """
+    prices = np.asarray(prices, dtype=np.int64)
+    values = np.asarray(values, dtype=np.int64)
+    is_percentage = np.asarray(is_percentage, dtype=bool)
+
+    # Largest intermediate: 10^10 paise (max_digits=10) * 10^4
+    kept = np.maximum(PERCENT_SCALE - values, 0)
+    quotient, remainder = np.divmod(prices * kept, PERCENT_SCALE)
+    twice = 2 * remainder
+    round_up = (twice > PERCENT_SCALE) | ((twice == PERCENT_SCALE) & (quotient % 2 == 1))
+    percentage_prices = quotient + round_up
+
+    flat_prices = np.maximum(prices - values, 0)
+    return np.where(is_percentage, percentage_prices, flat_prices)
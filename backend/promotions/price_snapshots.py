@@ -0,0 +1,188 @@
+# promotions/price_snapshots.py
+from django.db.models import Q
+from django.utils import timezone
+
+from catalog.closure import descendant_ids
+from catalog.models import Product
+from promotions.models import ProductPriceSnapshot
+from promotions.pricing import (
+    SOURCE_CATEGORY,
+    SOURCE_PRODUCT,
+    PriceQuote,
+    PricingEngine,
+)
+
+
+DEFAULT_SNAPSHOT_BATCH_SIZE = 500
+
+SNAPSHOT_FIELDS = [
+    "final_price",
+    "discount",
+    "source",
+    "label",
+    "product_promotion",
+    "category_promotion",
+    "valid_until",
+    "computed_at",
+]
+
+# Product fields that change a product's price
+PRICE_FIELDS = {
+    "mrp",
+    "sale_price",
+    "is_deal_price",
+    "deal_price_starts_at",
+    "deal_price_ends_at",
+    "category",
+    "subcategory",
+}
+
+
+def with_price_snapshots(queryset):
+    """
+    ``queryset`` with each product's snapshot and its promotions joined in
+    """
+    return queryset.select_related(
+        "price_snapshot",
+        "price_snapshot__product_promotion",
+        "price_snapshot__category_promotion",
+    )
+
+
+def refresh_price_snapshots(products, at=None):
+    """
+    Reprices ``products`` and stores their snapshots (one upsert). Each
+    product also gets the new quote as ``product.pricing``.
+    """
+    at = at or timezone.now()
+    products = [product for product in products if product.pk is not None]
+    quotes = PricingEngine(at=at).price(products)
+
+    ProductPriceSnapshot.objects.bulk_create(
+        [
+            ProductPriceSnapshot(
+                product_id=product.pk,
+                final_price=quote.final_price,
+                discount=quote.discount,
+                source=quote.source,
+                label=quote.label or "",
+                product_promotion=quote.product_promotion,
+                category_promotion=quote.category_promotion,
+                valid_until=quote.valid_until,
+                computed_at=at,
+            )
+            for product, quote in zip(products, quotes)
+        ],
+        update_conflicts=True,
+        unique_fields=["product"],
+        update_fields=SNAPSHOT_FIELDS,
+    )
+    return len(products)
+
+
+def refresh_products(queryset, batch_size=DEFAULT_SNAPSHOT_BATCH_SIZE, at=None):
+    """
+    Refreshes the snapshots of every product in ``queryset``, in batches
+    of primary keys
+    """
+    refreshed = 0
+    last_id = 0
+    while True:
+        batch = list(queryset.filter(id__gt=last_id).order_by("id")[:batch_size])
+        if not batch:
+            return refreshed
+        refreshed += refresh_price_snapshots(batch, at=at)
+        last_id = batch[-1].id
+
+
+def refresh_product_snapshots(product_ids, batch_size=DEFAULT_SNAPSHOT_BATCH_SIZE):
+    return refresh_products(
+        Product.objects.filter(id__in=list(product_ids)), batch_size=batch_size
+    )
+
+
+def refresh_category_snapshots(category_ids, batch_size=DEFAULT_SNAPSHOT_BATCH_SIZE):
+    """
+    Refreshes the products of ``category_ids`` and of all their
+    sub-categories (a category promotion applies to the whole subtree)
+    """
+    subtree = descendant_ids(category_ids)
+    return refresh_products(
+        Product.objects.filter(Q(category_id__in=subtree) | Q(subcategory_id__in=subtree)),
+        batch_size=batch_size,
+    )
+
+
+def stale_products(at=None):
+    """
+    Products without a snapshot or whose snapshot's window has closed
+    """
+    at = at or timezone.now()
+    return Product.objects.filter(
+        Q(price_snapshot__isnull=True) | Q(price_snapshot__valid_until__lte=at)
+    )
+
+
+def refresh_stale_snapshots(at=None, batch_size=DEFAULT_SNAPSHOT_BATCH_SIZE):
+    at = at or timezone.now()
+    return refresh_products(stale_products(at), batch_size=batch_size, at=at)
+
+
+def next_snapshot_expiry():
+    """
+    When the next snapshot's window closes, or None
+    """
+    return (
+        ProductPriceSnapshot.objects
+        .filter(valid_until__isnull=False)
+        .order_by("valid_until")
+        .values_list("valid_until", flat=True)
+        .first()
+    )
+
+
+def snapshot_quote(product, snapshot):
+    promotion = None
+    if snapshot.source == SOURCE_PRODUCT:
+        promotion = snapshot.product_promotion
+    elif snapshot.source == SOURCE_CATEGORY:
+        promotion = snapshot.category_promotion
+
+    return PriceQuote(
+        mrp=product.mrp,
+        final_price=snapshot.final_price,
+        discount=snapshot.discount,
+        promotion=promotion,
+        product_promotion=snapshot.product_promotion,
+        category_promotion=snapshot.category_promotion,
+        label=snapshot.label or None,
+        source=snapshot.source,
+        valid_until=snapshot.valid_until,
+    )
+
+
+def snapshot_prices(products, at=None):
+    """
+    A PriceQuote per product, read from the snapshots (load ``products``
+    through with_price_snapshots). Missing or expired snapshots are
+    refreshed on the spot. Each quote is kept as ``product.pricing``.
+    """
+    at = at or timezone.now()
+    products = list(products)
+
+    stale = []
+    for product in products:
+        try:
+            snapshot = product.price_snapshot
+        except ProductPriceSnapshot.DoesNotExist:
+            snapshot = None
+
+        if snapshot is None or (snapshot.valid_until and snapshot.valid_until <= at):
+            stale.append(product)
+        else:
+            product.__dict__["pricing"] = snapshot_quote(product, snapshot)
+
+    if stale:
+        refresh_price_snapshots(stale, at=at)
+
+    return [product.pricing for product in products]
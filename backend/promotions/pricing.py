@@ -0,0 +1,236 @@
+# promotions/pricing.py
+from collections import namedtuple
+
+from django.utils import timezone
+
+from catalog.closure import ancestor_chains
+from promotions.money import (
+    discounted,
+    discounted_array,
+    from_paise,
+    promotion_terms,
+    to_paise,
+)
+from pricing_monitor.models import ImportedProduct
+from promotions.promotion_index import promotion_index
+
+
+SPECIAL_PROMOTION = "Special Promotion"
+PRODUCT_PROMOTION = "Product Promotion"
+CATEGORY_PROMOTION = "Category Promotion"
+
+# What set a quote's final price
+SOURCE_DEAL = "deal"
+SOURCE_PRODUCT = "product"
+SOURCE_CATEGORY = "category"
+SOURCE_MRP = "mrp"
+
+
+# One product's storefront price. ``promotion`` is the promotion that set
+# ``final_price`` (None for deal prices and MRP); ``product_promotion`` and
+# ``category_promotion`` are the active ones whether they won or not.
+# ``valid_until`` is when a deal or promotion window next opens or closes
+# (None: not before something is edited).
+PriceQuote = namedtuple(
+    "PriceQuote",
+    [
+        "mrp",
+        "final_price",
+        "discount",
+        "promotion",
+        "product_promotion",
+        "category_promotion",
+        "label",
+        "source",
+        "valid_until",
+    ],
+)
+
+
+def apply_discount(price, promo):
+    """
+    ``price`` less a percentage or flat promotion, never below zero
+    (rounding rules: see promotions.money)
+    """
+    return from_paise(discounted(to_paise(price), *promotion_terms(promo)))
+
+
+class PricingEngine:
+    """
+    Final price, discount and applied promotion of a whole list of products.
+
+    Priority, per product:
+    1. Deal price (pricing_monitor)
+    2. Product promotion
+    3. Category promotion of the nearest category, walking up from the
+       sub-category, then from the category
+    4. MRP
+
+    Promotions of a product's child categories no longer apply to it: a
+    product filed under "Mobiles" does not get the "OnePlus" promotion.
+    Product.active_promotion used to fall back to them; calculate_price,
+    get_final_price, calculate_product_price and the cart never did.
+
+    A page costs the same two queries whatever its size: the ancestors of
+    its categories (catalog.closure) and the imported products (for labels). Promotions come from the
+    process's PromotionIndex; everything is resolved in memory, against
+    one fixed timestamp.
+    """
+
+    def __init__(self, at=None):
+        self.at = at or timezone.now()
+
+    def price(self, products):
+        """
+        A PriceQuote per product, in order. Each quote is also kept on its
+        product as ``product.pricing`` so templates read it without queries.
+        """
+        products = list(products)
+        if not products:
+            return []
+        product_ids = [product.id for product in products]
+        promotions = promotion_index()
+        chains = ancestor_chains(
+            {product.subcategory_id for product in products}
+            | {product.category_id for product in products}
+        )
+
+        imported = set(
+            ImportedProduct.objects.filter(product_id__in=product_ids)
+            .values_list("product_id", flat=True)
+        )
+
+        # Decide what prices each product first, then do the arithmetic for
+        # all of them at once, in integer paise
+        decisions = []
+        prices = []
+        is_percentage = []
+        values = []
+        for product in products:
+            category_ids = self.ancestors(product, chains)
+            product_promo = promotions.product_promotion(product.id, self.at)
+            category_promo = next(
+                (
+                    promo
+                    for promo in (
+                        promotions.category_promotion(category_id, self.at)
+                        for category_id in category_ids
+                    )
+                    if promo
+                ),
+                None,
+            )
+
+            # Deal price wins and switches promotions off
+            promotion = None
+            price = product.sale_price
+            if not self.has_live_deal(product):
+                price = product.mrp
+                promotion = product_promo or category_promo
+            percentage, value = promotion_terms(promotion) if promotion else (False, 0)
+
+            prices.append(to_paise(price))
+            is_percentage.append(percentage)
+            values.append(value)
+            decisions.append((
+                product,
+                product_promo,
+                category_promo,
+                promotion,
+                self.valid_until(product, category_ids, promotions),
+            ))
+
+        final_prices = discounted_array(prices, is_percentage, values).tolist()
+
+        quotes = []
+        for decision, final_price in zip(decisions, final_prices):
+            product, product_promo, category_promo, promotion, valid_until = decision
+            quote = self.quote(
+                product,
+                product_promo,
+                category_promo,
+                promotion,
+                final_price,
+                special=product.id in imported,
+                valid_until=valid_until,
+            )
+            product.__dict__["pricing"] = quote
+            quotes.append(quote)
+
+        return quotes
+
+    def price_one(self, product):
+        return self.price([product])[0]
+
+    @staticmethod
+    def ancestors(product, chains):
+        """
+        Category IDs to look for promotions in, nearest first
+        """
+        ids = []
+        for start in (product.subcategory_id, product.category_id):
+            for category_id in chains.get(start, [start] if start else []):
+                if category_id not in ids:
+                    ids.append(category_id)
+        return ids
+
+    def valid_until(self, product, category_ids, promotions):
+        changes = [promotions.next_change(product.id, category_ids, self.at)]
+        if product.is_deal_price and product.sale_price:
+            changes.extend([product.deal_price_starts_at, product.deal_price_ends_at])
+        return min(
+            (change for change in changes if change is not None and change > self.at),
+            default=None,
+        )
+
+    def has_live_deal(self, product):
+        return bool(
+            product.is_deal_price
+            and product.sale_price
+            and product.deal_price_is_live(self.at)
+        )
+
+    def quote(self, product, product_promo, category_promo, promotion, final_paise,
+              special=False, valid_until=None):
+        """
+        The PriceQuote of ``product`` sold at ``final_paise``, set by
+        ``promotion`` (None: deal price or MRP)
+        """
+        mrp_paise = to_paise(product.mrp)
+
+        if special:
+            label = SPECIAL_PROMOTION
+        elif product_promo:
+            label = PRODUCT_PROMOTION
+        elif category_promo:
+            label = CATEGORY_PROMOTION
+        else:
+            label = None
+
+        if self.has_live_deal(product):
+            source = SOURCE_DEAL
+        elif product_promo:
+            source = SOURCE_PRODUCT
+        elif category_promo:
+            source = SOURCE_CATEGORY
+        else:
+            source = SOURCE_MRP
+
+        return PriceQuote(
+            mrp=product.mrp,
+            final_price=from_paise(final_paise),
+            discount=from_paise(mrp_paise - final_paise),
+            promotion=promotion,
+            product_promotion=product_promo,
+            category_promotion=category_promo,
+            label=label,
+            source=source,
+            valid_until=valid_until,
+        )
+
+
+def price_products(products, at=None):
+    """
+    Shortcut for PricingEngine(at).price(products)
+    """
+    return PricingEngine(at=at).price(products)
@@ -0,0 +1,208 @@
+# promotions/promotion_index.py
+import threading
+import uuid
+from bisect import bisect_right
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from promotions.models import CategoryPromotion, ProductPromotion, PromotionIndexVersion
+
+
+# Primary key of the single PromotionIndexVersion row
+VERSION_ID = 1
+
+# DateTimeField resolution: a promotion ending at ``end_date`` is over from
+# ``end_date + RESOLUTION`` on
+RESOLUTION = timedelta(microseconds=1)
+
+
+def product_promotion_rank(promo):
+    """
+    Overlapping product promotions: the highest discount_value wins, then
+    the newest. Shared by the storefront and the import validation.
+    """
+    return (promo.discount_value, promo.id)
+
+
+def category_promotion_rank(promo):
+    """
+    Overlapping promotions of one category: the newest wins.
+    """
+    return (promo.created_at, promo.id)
+
+
+class Timeline:
+    """
+    The winning promotion of one product or category over time.
+
+    The promotions' start and end dates cut time into segments in which
+    the set of live promotions does not change; the winner of each segment
+    is worked out once, so ``at(t)`` is a bisect over the segment bounds.
+    """
+
+    def __init__(self, promotions, rank):
+        self.bounds = sorted(
+            {promo.start_date for promo in promotions}
+            | {promo.end_date + RESOLUTION for promo in promotions}
+        )
+        self.winners = []
+        for start in self.bounds:
+            live = [
+                promo for promo in promotions
+                if promo.start_date <= start <= promo.end_date
+            ]
+            self.winners.append(max(live, key=rank) if live else None)
+
+    def at(self, when):
+        index = bisect_right(self.bounds, when) - 1
+        return self.winners[index] if index >= 0 else None
+
+    def next_change(self, when):
+        """
+        The first moment after ``when`` at which the winner may change
+        """
+        index = bisect_right(self.bounds, when)
+        return self.bounds[index] if index < len(self.bounds) else None
+
+
+class PromotionIndex:
+    """
+    Every enabled promotion, indexed per product and per category, so
+    "active promotion at time t" never touches the database.
+
+    When several overlap, the product promotion with the highest
+    discount_value wins, as Product.active_promotion's "highest discount
+    wins" query did (ties: the newest); the newest category promotion wins,
+    as get_active_category_promotion's query did.
+    """
+
+    def __init__(self, version=None):
+        self.version = version
+        self.built_at = timezone.now()
+
+        by_product = defaultdict(list)
+        for promo in ProductPromotion.objects.filter(is_active=True):
+            by_product[promo.product_id].append(promo)
+
+        by_category = defaultdict(list)
+        for promo in CategoryPromotion.objects.filter(is_active=True):
+            by_category[promo.category_id].append(promo)
+
+        self.products = {
+            product_id: Timeline(promos, rank=product_promotion_rank)
+            for product_id, promos in by_product.items()
+        }
+        self.categories = {
+            category_id: Timeline(promos, rank=category_promotion_rank)
+            for category_id, promos in by_category.items()
+        }
+
+    def product_promotion(self, product_id, at):
+        timeline = self.products.get(product_id)
+        return timeline.at(at) if timeline else None
+
+    def category_promotion(self, category_id, at):
+        timeline = self.categories.get(category_id)
+        return timeline.at(at) if timeline else None
+
+    def next_change(self, product_id, category_ids, at):
+        """
+        When a promotion of the product or of any of ``category_ids``
+        next opens or closes after ``at``, or None
+        """
+        timelines = [self.products.get(product_id)]
+        timelines.extend(self.categories.get(category_id) for category_id in category_ids)
+        changes = [
+            timeline.next_change(at) for timeline in timelines if timeline is not None
+        ]
+        return min((change for change in changes if change is not None), default=None)
+
+
+_index = None
+_lock = threading.Lock()
+
+# Within a request the version stamp is read once: ``_request.version`` is
+# what the current request saw, None until it looked
+_request = threading.local()
+
+
+def current_version():
+    """
+    The version stamp every process compares its index against. Kept in
+    the database (one primary key lookup), so a change committed by any
+    process is seen by all of them, whatever the cache backend.
+    """
+    version = (
+        PromotionIndexVersion.objects
+        .filter(id=VERSION_ID)
+        .values_list("version", flat=True)
+        .first()
+    )
+    if version is None:
+        version = PromotionIndexVersion.objects.get_or_create(
+            id=VERSION_ID, defaults={"version": uuid.uuid4().hex}
+        )[0].version
+    return version
+
+
+def invalidate():
+    """
+    Marks every process's index stale; each rebuilds on its next lookup
+    after the current transaction commits. A random stamp rather than a
+    counter, so a rolled-back change never leaves a stamp that a later,
+    different change could reuse.
+    """
+    PromotionIndexVersion.objects.update_or_create(
+        id=VERSION_ID, defaults={"version": uuid.uuid4().hex}
+    )
+    # The request that made the change sees it
+    _request.version = None
+
+
+def begin_request():
+    _request.active = True
+    _request.version = None
+
+
+def end_request():
+    _request.active = False
+    _request.version = None
+
+
+def request_version():
+    """
+    The version stamp, read at most once per request; outside requests
+    (workers, management commands) on every call.
+    """
+    if not getattr(_request, "active", False):
+        return current_version()
+    if _request.version is None:
+        _request.version = current_version()
+    return _request.version
+
+
+def promotion_index():
+    """
+    This process's PromotionIndex, rebuilt when the version stamp moved
+    or it is older than PROMOTIONS_INDEX_MAX_AGE (a safety net for
+    changes that skip signals, such as queryset.update()).
+    """
+    global _index
+
+    version = request_version()
+    max_age = getattr(settings, "PROMOTIONS_INDEX_MAX_AGE", timedelta(minutes=5))
+    index = _index
+    if (
+        index is not None
+        and index.version == version
+        and timezone.now() - index.built_at < max_age
+    ):
+        return index
+
+    with _lock:
+        if _index is index:
+            _index = PromotionIndex(version=version)
+        return _index
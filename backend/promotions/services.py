@@ -2,6 +2,8 @@ from django.utils import timezone
 from decimal import Decimal
 
 from promotions.models import ProductPromotion, CategoryPromotion
+from promotions.pricing import PricingEngine, apply_discount
+from promotions.promotion_index import promotion_index
 
 def calculate_price(product):
     """
@@ -10,126 +12,37 @@ def calculate_price(product):
     2. Product Promotion
     3. Category Promotion
     4. MRP
-    """
-
-    mrp = product.mrp
-
-    # ===================== DEAL PRICE (TOP PRIORITY) =====================
-    # if product.has_deal_price:
-    #     return {
-    #         "mrp": mrp,
-    #         "final_price": product.sale_price,
-    #         "discount": mrp - product.sale_price,
-    #         "promotion": None,   # 🔥 FORCE promotion OFF
-    #     }
-    if product.is_deal_price and product.sale_price:
-        return {
-            "mrp": mrp,
-            "final_price": product.sale_price,
-            "discount": mrp - product.sale_price,
-            "promotion": None,   # force promotions OFF
-        }
-
-    now = timezone.now()
 
-    # ===================== PRODUCT PROMOTION =====================
-    product_promo = ProductPromotion.objects.filter(
-        product=product,
-        is_active=True,
-        start_date__lte=now,
-        end_date__gte=now,
-    ).first()
-
-    if product_promo:
-        final_price = apply_discount(mrp, product_promo)
-        return {
-            "mrp": mrp,
-            "final_price": final_price,
-            "discount": mrp - final_price,
-            "promotion": product_promo,
-        }
-
-    # ===================== CATEGORY PROMOTION =====================
-    category_promo = CategoryPromotion.objects.filter(
-        category=product.category,
-        is_active=True,
-    ).first()
-
-    if category_promo:
-        final_price = apply_discount(mrp, category_promo)
-        return {
-            "mrp": mrp,
-            "final_price": final_price,
-            "discount": mrp - final_price,
-            "promotion": category_promo,
-        }
-
-    # ===================== NO PROMO =====================
+    Prices one product; listings should price the whole page with
+    promotions.pricing.PricingEngine instead.
+    """
+    quote = PricingEngine().price_one(product)
     return {
-        "mrp": mrp,
-        "final_price": mrp,
-        "discount": Decimal("0.00"),
-        "promotion": None,
+        "mrp": quote.mrp,
+        "final_price": quote.final_price,
+        "discount": quote.discount,
+        "promotion": quote.promotion,
     }
 
 
 def get_active_promotion_for_product(product):
-    now = timezone.now()
-
-    # 1️⃣ Product promotion (highest priority after deal price)
-    product_promo = (
-        ProductPromotion.objects
-        .filter(product=product, start_date__lte=now, end_date__gte=now, active=True)
-        .first()
-    )
-    if product_promo:
-        return product_promo
-
-    # 2️⃣ Category promotion
-    category_promo = (
-        CategoryPromotion.objects
-        .filter(category=product.category, start_date__lte=now, end_date__gte=now, active=True)
-        .first()
-    )
-    return category_promo
+    quote = PricingEngine().price_one(product)
+    return quote.product_promotion or quote.category_promotion
 
 
 def get_active_product_promotion(product):
-    now = timezone.now()
-
-    return ProductPromotion.objects.filter(
-        product=product,
-        is_active=True,
-        start_date__lte=now,
-        end_date__gte=now,
-    ).order_by("-id").first()
+    return PricingEngine().price_one(product).product_promotion
 
 
 def get_active_category_promotion(category, product=None):
     now = timezone.now()
+    promotions = promotion_index()
 
     # 🔴 DISABLE category promo if product promo exists
-    if product:
-        product_promo_exists = ProductPromotion.objects.filter(
-            product=product,
-            is_active=True,
-            start_date__lte=now,
-            end_date__gte=now,
-        ).exists()
-
-        if product_promo_exists:
-            return None
-
-    return (
-        CategoryPromotion.objects.filter(
-            category=category,
-            is_active=True,
-            start_date__lte=now,
-            end_date__gte=now,
-        )
-        .order_by("-id")
-        .first()
-    )
+    if product and promotions.product_promotion(product.id, now):
+        return None
+
+    return promotions.category_promotion(category.id, now)
 
 
 # def calculate_price(product):
@@ -205,32 +118,7 @@ def get_active_category_promotion(category, product=None):
 #     return price
 
 def get_final_price(product):
-    base_price = product.mrp
-    now = timezone.now()
-
-    # 1️⃣ Product promotion (highest priority)
-    product_promo = ProductPromotion.objects.filter(
-        product=product,
-        is_active=True,
-        start_date__lte=now,
-        end_date__gte=now,
-    ).first()
-
-    if product_promo:
-        return apply_discount(base_price, product_promo)
-
-    # 2️⃣ Category promotion
-    category_promo = CategoryPromotion.objects.filter(
-        category=product.category,
-        is_active=True,
-        start_date__lte=now,
-        end_date__gte=now,
-    ).first()
-
-    if category_promo:
-        return apply_discount(base_price, category_promo)
-
-    return base_price
+    return PricingEngine().price_one(product).final_price
 
 
 # def apply_discount(price, promo):
@@ -243,26 +131,13 @@ def get_final_price(product):
 
 #     return max(price - discount, Decimal("0.00"))
 
-def apply_discount(price, promo):
-    """
-    Correctly applies percentage or flat discount
-    """
-
-    if promo.discount_type == "PERCENTAGE" or promo.discount_type == "percentage":
-        discount_amount = (price * promo.discount_value) / Decimal("100")
-        return (price - discount_amount).quantize(Decimal("0.01"))
-
-    # FLAT discount
-    return (price - promo.discount_value).quantize(Decimal("0.01"))
-
 
 def get_active_promotion(product):
-    product_promo = get_active_product_promotion(product)
-    if product_promo:
-        return ("product", product_promo)
+    quote = PricingEngine().price_one(product)
+    if quote.product_promotion:
+        return ("product", quote.product_promotion)
 
-    category_promo = get_active_category_promotion(product.category)
-    if category_promo:
-        return ("category", category_promo)
+    if quote.category_promotion:
+        return ("category", quote.category_promotion)
 
-    return (None, None)
\ No newline at end of file
+    return (None, None)
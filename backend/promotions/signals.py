@@ -0,0 +1,109 @@
+# promotions/signals.py
+from django.core.signals import request_finished, request_started
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from catalog.models import Category, Product
+from promotions.models import CategoryPromotion, ProductPromotion
+from promotions.price_snapshots import (
+    PRICE_FIELDS,
+    refresh_category_snapshots,
+    refresh_product_snapshots,
+)
+from promotions.promotion_index import begin_request, end_request, invalidate
+
+
+@receiver(post_save, sender=CategoryPromotion)
+@receiver(post_delete, sender=CategoryPromotion)
+@receiver(post_save, sender=ProductPromotion)
+@receiver(post_delete, sender=ProductPromotion)
+def promotion_changed(sender, **kwargs):
+    # Every process rebuilds its promotion index on its next lookup
+    invalidate()
+
+
+# The promotion index reads its version stamp once per request
+
+@receiver(request_started)
+def promotion_request_started(sender, **kwargs):
+    begin_request()
+
+
+@receiver(request_finished)
+def promotion_request_finished(sender, **kwargs):
+    end_request()
+
+
+# Price snapshots are refreshed once the change is committed, and only for
+# the products it affects. A promotion moved to another product or
+# category affects both the old and the new one.
+
+def stored_value(instance, field):
+    """
+    ``field`` as it is stored for ``instance``, None if it is new
+    """
+    if instance._state.adding or instance.pk is None:
+        return None
+    return (
+        type(instance)._default_manager
+        .filter(pk=instance.pk)
+        .values_list(field, flat=True)
+        .first()
+    )
+
+
+@receiver(pre_save, sender=ProductPromotion)
+def remember_promoted_product(sender, instance, **kwargs):
+    instance._previous_product_id = stored_value(instance, "product_id")
+
+
+@receiver(pre_save, sender=CategoryPromotion)
+def remember_promoted_category(sender, instance, **kwargs):
+    instance._previous_category_id = stored_value(instance, "category_id")
+
+
+@receiver(pre_save, sender=Category)
+def remember_parent(sender, instance, **kwargs):
+    instance._previous_parent_id = stored_value(instance, "parent_id")
+
+
+def targets(*ids):
+    return [target for target in dict.fromkeys(ids) if target is not None]
+
+
+@receiver(post_save, sender=ProductPromotion)
+@receiver(post_delete, sender=ProductPromotion)
+def product_promotion_changed(sender, instance, **kwargs):
+    product_ids = targets(
+        instance.product_id, getattr(instance, "_previous_product_id", None)
+    )
+    transaction.on_commit(lambda: refresh_product_snapshots(product_ids))
+
+
+@receiver(post_save, sender=CategoryPromotion)
+@receiver(post_delete, sender=CategoryPromotion)
+def category_promotion_changed(sender, instance, **kwargs):
+    category_ids = targets(
+        instance.category_id, getattr(instance, "_previous_category_id", None)
+    )
+    transaction.on_commit(lambda: refresh_category_snapshots(category_ids))
+
+
+@receiver(post_save, sender=Category)
+def category_saved(sender, instance, created=False, raw=False, **kwargs):
+    # A moved category's subtree inherits other ancestors' promotions.
+    # Category.save relinks the closure in the same transaction, so the
+    # refresh sees the new ancestors.
+    if created or raw or getattr(instance, "_previous_parent_id", None) == instance.parent_id:
+        return
+    category_id = instance.pk
+    transaction.on_commit(lambda: refresh_category_snapshots([category_id]))
+
+
+@receiver(post_save, sender=Product)
+def product_saved(sender, instance, update_fields=None, **kwargs):
+    if update_fields is not None and not PRICE_FIELDS & set(update_fields):
+        return
+    product_id = instance.pk
+    transaction.on_commit(lambda: refresh_product_snapshots([product_id]))
@@ -1,3 +1,487 @@
-from django.test import TestCase
+from datetime import timedelta
+from decimal import Decimal
+from types import SimpleNamespace
 
-# Create your tests here.
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.signals import request_finished, request_started
+from django.test import SimpleTestCase, TestCase
+from django.utils import timezone
+from hypothesis import given, settings, strategies as st
+
+from catalog.models import Category, Product
+from pricing_monitor.models import ProductCSVUpload
+from pricing_monitor.services.bulk_importer import process_csv_upload_in_chunks
+from pricing_monitor.services.promotion_snapshot import PromotionSnapshot
+from pricing_monitor.tests import TemporaryMediaMixin
+from promotions.models import (
+    CategoryPromotion,
+    ProductPriceSnapshot,
+    ProductPromotion,
+    PromotionIndexVersion,
+)
+from promotions.money import (
+    discounted,
+    discounted_array,
+    from_paise,
+    promotion_terms,
+    to_paise,
+)
+from promotions.price_snapshots import (
+    refresh_stale_snapshots,
+    snapshot_prices,
+    with_price_snapshots,
+)
+from promotions.pricing import (
+    CATEGORY_PROMOTION,
+    PRODUCT_PROMOTION,
+    PricingEngine,
+    apply_discount,
+)
+from promotions.promotion_index import invalidate, promotion_index
+
+
+class PricingEngineTests(TestCase):
+    """
+    A list of products is priced in two queries, with
+    deal price > product promotion > nearest category promotion > MRP.
+    """
+
+    def setUp(self):
+        now = timezone.now()
+        window = {"start_date": now - timedelta(days=1), "end_date": now + timedelta(days=1)}
+
+        self.phones = Category.objects.create(name="Phones", slug="phones")
+        self.android = Category.objects.create(name="Android", slug="android", parent=self.phones)
+        self.pixel = Category.objects.create(name="Pixel", slug="pixel", parent=self.android)
+        laptops = Category.objects.create(name="Laptops", slug="laptops")
+
+        CategoryPromotion.objects.create(
+            category=self.phones, discount_type="PERCENTAGE", discount_value=10, **window
+        )
+        CategoryPromotion.objects.create(
+            category=self.android, discount_type="FLAT", discount_value=50, **window
+        )
+        # Expired: ignored
+        CategoryPromotion.objects.create(
+            category=laptops,
+            discount_type="PERCENTAGE",
+            discount_value=90,
+            start_date=now - timedelta(days=10),
+            end_date=now - timedelta(days=5),
+        )
+
+        def product(sku, category, subcategory=None, **fields):
+            return Product.objects.create(
+                sku=sku, name=sku, slug=sku.lower(), category=category,
+                subcategory=subcategory, mrp=Decimal("1000.00"), **fields
+            )
+
+        self.promoted = product("P-1", self.phones, self.pixel)
+        ProductPromotion.objects.create(
+            product=self.promoted, discount_type="percentage", discount_value=25, **window
+        )
+        self.nearest = product("P-2", self.phones, self.pixel)   # Android's flat 50
+        self.parent = product("P-3", self.phones)                # Phones' 10%
+        self.deal = product(
+            "P-4", self.phones, self.pixel, sale_price=Decimal("700.00"), is_deal_price=True
+        )
+        self.plain = product("P-5", laptops)
+
+    def test_prices_a_page_in_constant_queries(self):
+        products = list(Product.objects.order_by("sku"))
+
+        # Within a request the version stamp is read once
+        request_started.send(sender=self.__class__)
+        self.addCleanup(request_finished.send, sender=self.__class__)
+        promotion_index()
+        with self.assertNumQueries(2):
+            quotes = PricingEngine().price(products)
+
+        self.assertEqual(
+            [quote.final_price for quote in quotes],
+            [Decimal("750.00"), Decimal("950.00"), Decimal("900.00"),
+             Decimal("700.00"), Decimal("1000.00")],
+        )
+        self.assertEqual(quotes[0].label, PRODUCT_PROMOTION)
+        self.assertEqual(quotes[1].promotion.category, self.android)
+        self.assertEqual(quotes[2].label, CATEGORY_PROMOTION)
+        self.assertIsNone(quotes[3].promotion)
+        self.assertEqual(quotes[3].discount, Decimal("300.00"))
+        self.assertIsNone(quotes[4].promotion)
+        self.assertEqual(quotes[4].discount, Decimal("0.00"))
+
+        # Template properties read the quote without further queries
+        with self.assertNumQueries(0):
+            for product in products:
+                product.final_price, product.active_promotion, product.get_promotion_label()
+
+    def test_single_product_prices_itself(self):
+        product = Product.objects.get(sku="P-2")
+
+        self.assertEqual(product.final_price, Decimal("950.00"))
+        self.assertEqual(product.active_category_promotion.category, self.android)
+        self.assertIsNone(product.active_product_promotion)
+
+
+class PromotionIndexTests(TestCase):
+    """
+    Active promotions are answered from memory and the index is rebuilt
+    after a promotion is saved or deleted.
+    """
+
+    def setUp(self):
+        # Rolled-back test transactions send no signals
+        invalidate()
+        self.now = timezone.now()
+        self.category = Category.objects.create(name="Phones", slug="phones")
+        self.product = Product.objects.create(
+            sku="IDX-1", name="Index", slug="idx-1", category=self.category, mrp=1000
+        )
+
+    def promote(self, start_days, end_days, **fields):
+        fields.setdefault("discount_value", 10)
+        return ProductPromotion.objects.create(
+            product=self.product,
+            discount_type="flat",
+            start_date=self.now + timedelta(days=start_days),
+            end_date=self.now + timedelta(days=end_days),
+            **fields
+        )
+
+    def test_answers_active_promotion_at_any_time(self):
+        long = self.promote(0, 10)
+        short = self.promote(2, 4)    # newer: wins while both are live
+        self.promote(5, 6, is_active=False)
+
+        index = promotion_index()
+        with self.assertNumQueries(0):
+            at = lambda days: index.product_promotion(self.product.id, self.now + timedelta(days=days))
+            self.assertIsNone(at(-1))
+            self.assertEqual(at(1), long)
+            self.assertEqual(at(3), short)
+            self.assertEqual(at(5), long)
+            self.assertEqual(index.product_promotion(self.product.id, long.end_date), long)
+            self.assertIsNone(at(11))
+            self.assertIsNone(index.product_promotion(self.product.id + 1, self.now))
+
+    def test_highest_product_discount_wins(self):
+        big = self.promote(-1, 1, discount_value=50)
+        self.promote(-1, 1, discount_value=20)    # newer, smaller
+        index = promotion_index()
+        self.assertEqual(index.product_promotion(self.product.id, self.now), big)
+
+        # Equal discounts: the newest wins
+        newest = self.promote(-1, 1, discount_value=50)
+        self.assertEqual(promotion_index().product_promotion(self.product.id, self.now), newest)
+
+    def test_import_validation_ranks_promotions_like_the_storefront(self):
+        big = self.promote(-1, 1, discount_value=50)
+        self.promote(-1, 1, discount_value=20)
+        CategoryPromotion.objects.create(
+            category=self.category,
+            discount_type="FLAT",
+            discount_value=5,
+            start_date=self.now - timedelta(days=1),
+            end_date=self.now + timedelta(days=1),
+        )
+        newer = CategoryPromotion.objects.create(
+            category=self.category,
+            discount_type="FLAT",
+            discount_value=1,
+            start_date=self.now - timedelta(days=1),
+            end_date=self.now + timedelta(days=1),
+        )
+
+        snapshot = PromotionSnapshot(at=self.now)
+        index = promotion_index()
+        self.assertEqual(snapshot.product_promotions[self.product.id], big)
+        self.assertEqual(index.product_promotion(self.product.id, self.now), big)
+        self.assertEqual(snapshot.category_promotions[self.category.id], newer)
+        self.assertEqual(index.category_promotion(self.category.id, self.now), newer)
+
+    def test_rebuilds_after_promotions_change(self):
+        index = promotion_index()
+        self.assertIs(promotion_index(), index)
+        self.assertIsNone(index.product_promotion(self.product.id, self.now))
+
+        promo = self.promote(-1, 1)
+        index = promotion_index()
+        self.assertEqual(index.product_promotion(self.product.id, self.now), promo)
+
+        promo.delete()
+        self.assertIsNone(promotion_index().product_promotion(self.product.id, self.now))
+
+        CategoryPromotion.objects.create(
+            category=self.category,
+            discount_type="FLAT",
+            discount_value=5,
+            start_date=self.now - timedelta(days=1),
+            end_date=self.now + timedelta(days=1),
+        )
+        self.assertIsNotNone(promotion_index().category_promotion(self.category.id, self.now))
+
+    def request(self):
+        request_started.send(sender=self.__class__)
+        self.addCleanup(request_finished.send, sender=self.__class__)
+
+    def test_rebuilds_after_another_process_changes_promotions(self):
+        self.request()
+        index = promotion_index()
+
+        # Another process saves a promotion: no signal reaches this one,
+        # only the version stamp it wrote to the database
+        promo = ProductPromotion.objects.bulk_create([ProductPromotion(
+            product=self.product,
+            discount_type="flat",
+            discount_value=10,
+            start_date=self.now - timedelta(days=1),
+            end_date=self.now + timedelta(days=1),
+        )])[0]
+        PromotionIndexVersion.objects.update(version="another-process")
+
+        # The current request keeps the index it started with, without
+        # reading the stamp again
+        with self.assertNumQueries(0):
+            self.assertIs(promotion_index(), index)
+
+        # The next request sees the change
+        request_finished.send(sender=self.__class__)
+        self.request()
+        index = promotion_index()
+        self.assertEqual(index.version, "another-process")
+        self.assertEqual(index.product_promotion(self.product.id, self.now).id, promo.id)
+
+    def test_outside_requests_every_lookup_reads_the_stamp(self):
+        index = promotion_index()
+        PromotionIndexVersion.objects.update(version="another-process")
+        self.assertIsNot(promotion_index(), index)
+
+
+class ProductPriceSnapshotTests(TemporaryMediaMixin, TestCase):
+    """
+    Snapshots are refreshed for the products a change affects and read
+    back with a join.
+    """
+
+    def setUp(self):
+        invalidate()
+        self.now = timezone.now()
+        self.phones = Category.objects.create(name="Phones", slug="phones")
+        self.android = Category.objects.create(name="Android", slug="android", parent=self.phones)
+        laptops = Category.objects.create(name="Laptops", slug="laptops")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.phone = Product.objects.create(
+                sku="SNP-1", name="Phone", slug="snp-1", category=self.phones,
+                subcategory=self.android, mrp=1000,
+            )
+            self.laptop = Product.objects.create(
+                sku="SNP-2", name="Laptop", slug="snp-2", category=laptops, mrp=5000,
+            )
+
+    def snapshot(self, product):
+        return ProductPriceSnapshot.objects.get(product=product)
+
+    def test_promotion_change_refreshes_affected_products_only(self):
+        laptop_computed_at = self.snapshot(self.laptop).computed_at
+        self.assertEqual(self.snapshot(self.phone).source, "mrp")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            promo = CategoryPromotion.objects.create(
+                category=self.phones,
+                discount_type="PERCENTAGE",
+                discount_value=10,
+                start_date=self.now - timedelta(days=1),
+                end_date=self.now + timedelta(days=1),
+            )
+
+        snapshot = self.snapshot(self.phone)
+        self.assertEqual(snapshot.source, "category")
+        self.assertEqual(snapshot.final_price, Decimal("900.00"))
+        self.assertEqual(snapshot.valid_until, promo.end_date + timedelta(microseconds=1))
+        self.assertEqual(self.snapshot(self.laptop).computed_at, laptop_computed_at)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            promo.delete()
+        self.assertEqual(self.snapshot(self.phone).final_price, Decimal("1000.00"))
+
+    def test_reassigned_promotion_refreshes_old_and_new_targets(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            promo = ProductPromotion.objects.create(
+                product=self.phone,
+                discount_type="flat",
+                discount_value=100,
+                start_date=self.now - timedelta(days=1),
+                end_date=self.now + timedelta(days=1),
+            )
+        self.assertEqual(self.snapshot(self.phone).final_price, Decimal("900.00"))
+
+        promo.product = self.laptop
+        with self.captureOnCommitCallbacks(execute=True):
+            promo.save()
+        self.assertEqual(self.snapshot(self.phone).final_price, Decimal("1000.00"))
+        self.assertEqual(self.snapshot(self.laptop).final_price, Decimal("4900.00"))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            category_promo = CategoryPromotion.objects.create(
+                category=self.android,
+                discount_type="PERCENTAGE",
+                discount_value=10,
+                start_date=self.now - timedelta(days=1),
+                end_date=self.now + timedelta(days=1),
+            )
+        self.assertEqual(self.snapshot(self.phone).final_price, Decimal("900.00"))
+
+        category_promo.category = self.laptop.category
+        with self.captureOnCommitCallbacks(execute=True):
+            category_promo.save()
+        self.assertEqual(self.snapshot(self.phone).final_price, Decimal("1000.00"))
+        # The laptop's own promotion still wins, but the snapshot knows
+        # the category one now applies too
+        self.assertEqual(self.snapshot(self.laptop).category_promotion, category_promo)
+
+    def test_moved_category_refreshes_its_subtree(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            CategoryPromotion.objects.create(
+                category=self.laptop.category,
+                discount_type="PERCENTAGE",
+                discount_value=10,
+                start_date=self.now - timedelta(days=1),
+                end_date=self.now + timedelta(days=1),
+            )
+        self.assertEqual(self.snapshot(self.phone).final_price, Decimal("1000.00"))
+
+        # Android moves under Laptops: the phone below it now inherits
+        # the Laptops promotion
+        self.android.parent = self.laptop.category
+        with self.captureOnCommitCallbacks(execute=True):
+            self.android.save()
+        snapshot = self.snapshot(self.phone)
+        self.assertEqual((snapshot.source, snapshot.final_price), ("category", Decimal("900.00")))
+
+        # Moved back: the promotion no longer applies
+        self.android.parent = self.phones
+        with self.captureOnCommitCallbacks(execute=True):
+            self.android.save()
+        self.assertEqual(self.snapshot(self.phone).final_price, Decimal("1000.00"))
+
+    def test_reads_prices_with_a_join_and_refreshes_expired_ones(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            promo = ProductPromotion.objects.create(
+                product=self.phone,
+                discount_type="flat",
+                discount_value=100,
+                start_date=self.now - timedelta(days=1),
+                end_date=self.now + timedelta(hours=1),
+            )
+
+        with self.assertNumQueries(1):
+            products = list(with_price_snapshots(Product.objects.order_by("sku")))
+            quotes = snapshot_prices(products)
+        self.assertEqual(quotes[0].final_price, Decimal("900.00"))
+        self.assertEqual(quotes[0].promotion, promo)
+        self.assertEqual(quotes[1].final_price, Decimal("5000.00"))
+
+        # Once the promotion window closes the snapshot is repriced
+        later = self.now + timedelta(hours=2)
+        self.assertEqual(refresh_stale_snapshots(at=later), 1)
+        self.assertEqual(self.snapshot(self.phone).final_price, Decimal("1000.00"))
+
+    def test_bulk_import_refreshes_snapshots(self):
+        upload = ProductCSVUpload.objects.create(
+            file=SimpleUploadedFile(
+                "snapshots.csv",
+                b"SKU,Category,Sub-category,Product Name,MRP,Net Price\r\n"
+                b"SNP-1,Phones,Android,Phone,1000,800\r\n",
+            ),
+            consider_price_validation=False,
+        )
+        self.addCleanup(upload.file.delete, save=False)
+
+        self.assertEqual(process_csv_upload_in_chunks(upload), (1, 0))
+
+        snapshot = self.snapshot(self.phone)
+        self.assertEqual((snapshot.source, snapshot.final_price), ("deal", Decimal("800.00")))
+        self.assertEqual(snapshot.label, "Special Promotion")
+        self.assertEqual(snapshot.valid_until, Product.objects.get(sku="SNP-1").deal_price_ends_at)
+
+
+def decimal_apply_discount(price, promo):
+    """
+    apply_discount as it was before the integer paise core (Decimal
+    arithmetic, no floor at zero), the reference the core is checked
+    against
+    """
+    if promo.discount_type == "PERCENTAGE" or promo.discount_type == "percentage":
+        discount_amount = (price * promo.discount_value) / Decimal("100")
+        return (price - discount_amount).quantize(Decimal("0.01"))
+
+    # FLAT discount
+    return (price - promo.discount_value).quantize(Decimal("0.01"))
+
+
+# Anything a DecimalField(max_digits=10, decimal_places=2) holds
+amounts = st.decimals(min_value=0, max_value=Decimal("99999999.99"), places=2)
+percentages = st.decimals(min_value=0, max_value=Decimal("150"), places=2)
+discount_types = st.sampled_from(["PERCENTAGE", "percentage", "FLAT", "flat"])
+promotions = st.builds(
+    SimpleNamespace,
+    discount_type=discount_types,
+    discount_value=st.one_of(percentages, amounts),
+)
+
+
+class MoneyTests(SimpleTestCase):
+    """
+    The integer paise core gives the same prices as Decimal arithmetic,
+    except that a price never drops below zero.
+    """
+
+    @settings(max_examples=500, deadline=None)
+    @given(price=amounts, promo=promotions)
+    def test_apply_discount_matches_decimal_arithmetic(self, price, promo):
+        expected = decimal_apply_discount(price, promo)
+        result = apply_discount(price, promo)
+
+        if expected >= 0:
+            self.assertEqual(result, expected)
+        else:
+            # The one intended difference: discounts larger than the
+            # price used to give negative prices
+            self.assertEqual(result, Decimal("0.00"))
+        self.assertEqual(result.as_tuple().exponent, -2)
+
+    def test_discounts_larger_than_the_price_stop_at_zero(self):
+        flat = SimpleNamespace(discount_type="FLAT", discount_value=Decimal("150"))
+        percent = SimpleNamespace(discount_type="PERCENTAGE", discount_value=Decimal("120"))
+
+        self.assertEqual(decimal_apply_discount(Decimal("100"), flat), Decimal("-50.00"))
+        self.assertEqual(apply_discount(Decimal("100"), flat), Decimal("0.00"))
+        self.assertEqual(decimal_apply_discount(Decimal("100"), percent), Decimal("-20.00"))
+        self.assertEqual(apply_discount(Decimal("100"), percent), Decimal("0.00"))
+
+    @settings(max_examples=200, deadline=None)
+    @given(st.lists(st.tuples(amounts, promotions), min_size=1, max_size=50))
+    def test_batch_matches_one_by_one(self, cases):
+        prices = [to_paise(price) for price, _ in cases]
+        terms = [promotion_terms(promo) for _, promo in cases]
+
+        batch = discounted_array(
+            prices, [percentage for percentage, _ in terms], [value for _, value in terms]
+        )
+
+        self.assertEqual(
+            batch.tolist(),
+            [discounted(price, *term) for price, term in zip(prices, terms)],
+        )
+
+    def test_rounding_rules(self):
+        percent = lambda value: SimpleNamespace(discount_type="PERCENTAGE", discount_value=Decimal(value))
+        flat = lambda value: SimpleNamespace(discount_type="FLAT", discount_value=Decimal(value))
+
+        # 4.69 * 50% = 2.345 -> 2.34 and 4.71 * 50% = 2.355 -> 2.36: ties to even
+        self.assertEqual(apply_discount(Decimal("4.69"), percent("50")), Decimal("2.34"))
+        self.assertEqual(apply_discount(Decimal("4.71"), percent("50")), Decimal("2.36"))
+        self.assertEqual(apply_discount(Decimal("100"), percent("120")), Decimal("0.00"))
+        self.assertEqual(apply_discount(Decimal("100"), flat("250")), Decimal("0.00"))
+        self.assertEqual(from_paise(to_paise(Decimal("170000.5"))), Decimal("170000.50"))